@@ -0,0 +1,248 @@
+"""Compare the sync views under WSGI with the async views under ASGI
+
+    python -m benchmarks.asgi_vs_wsgi [--requests 2000] [--concurrency 32]
+                                      [--workers 8] [--db-latency 2]
+
+Calls the applications in levelup/wsgi.py and levelup/asgi.py in process,
+so no server is needed. WSGI requests go to /events through a pool of
+--workers threads, like a threaded WSGI server. ASGI requests go to
+/async/events from --concurrency tasks on one event loop. Both modes send
+the same mix of event list and event detail requests against a file
+database, and report requests per second and p50/p99 latency.
+
+SQLite answers in microseconds, so --db-latency adds a sleep before every
+query to stand in for the network round trip to a database server.
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.harness import percentile, setup_django, test_database, timer
+
+setup_django()
+
+# pylint: disable=wrong-import-position
+from django.contrib.auth.models import User
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.authtoken.models import Token
+
+from levelup.asgi import application as asgi_application
+from levelup.wsgi import application as wsgi_application
+from levelupapi.models import Event, EventGamer, Game, Gamer, GameType
+
+# setup_test_environment() allows this host name
+HOST = 'testserver'
+
+
+def seed(gamer_count=50, game_count=20, event_count=400):
+    """Create gamers with tokens, and events with a few attendees each"""
+    rng = random.Random(1)
+
+    User.objects.bulk_create(
+        User(username=f'gamer{index}', first_name='Gamer', last_name=str(index))
+        for index in range(gamer_count))
+    users = list(User.objects.all())
+    Gamer.objects.bulk_create(Gamer(user=user, bio='Gamez') for user in users)
+    Token.objects.bulk_create(Token(user=user, key=f'{user.pk:040d}') for user in users)
+    gamers = list(Gamer.objects.values_list('pk', flat=True))
+
+    game_type = GameType.objects.create(label='Board')
+    Game.objects.bulk_create(
+        Game(game_type=game_type, gamer_id=rng.choice(gamers), title=f'Game {index}',
+             maker='Maker', number_of_players=4, skill_level=3)
+        for index in range(game_count))
+    games = list(Game.objects.values_list('pk', flat=True))
+
+    Event.objects.bulk_create(
+        Event(game_id=rng.choice(games), organizer_id=rng.choice(gamers),
+              description='Game night', date='2022-06-01', time='19:00')
+        for _ in range(event_count))
+    events = list(Event.objects.values_list('pk', flat=True))
+    EventGamer.objects.bulk_create(
+        EventGamer(event_id=event_id, gamer_id=gamer_id)
+        for event_id in events for gamer_id in rng.sample(gamers, 3))
+    Event.objects.refresh_attendees_count()
+
+    tokens = list(Token.objects.values_list('key', flat=True))
+    return tokens, games, events
+
+
+def request_mix(count, tokens, games, events):
+    """Build the (path, query string, token) of each request, half lists and half details"""
+    rng = random.Random(2)
+    requests = []
+    for index in range(count):
+        if index % 2:
+            requests.append(('/events', f'game={rng.choice(games)}', rng.choice(tokens)))
+        else:
+            requests.append((f'/events/{rng.choice(events)}', '', rng.choice(tokens)))
+    return requests
+
+
+def add_db_latency(seconds):
+    """Sleep before every query on every new connection
+
+    The PRAGMA statements levelupapi.database runs on new connections are
+    left alone, since they only configure the local SQLite library.
+    """
+    def delay(execute, sql, params, many, context):
+        if not sql.startswith('PRAGMA'):
+            time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):  # pylint: disable=unused-argument
+        connection.execute_wrappers.append(delay)
+
+    connection_created.connect(install, weak=False)
+
+
+def wsgi_call(path, query, token):
+    """Send one GET request to the WSGI application and return its status"""
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'HTTP_HOST': HOST,
+        'HTTP_AUTHORIZATION': f'Token {token}',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.url_scheme': 'http',
+        'wsgi.errors': io.StringIO(),
+    }
+    status = []
+    body = wsgi_application(environ, lambda code, headers: status.append(code))
+    try:
+        b''.join(body)
+    finally:
+        body.close()
+    return int(status[0].split()[0])
+
+
+async def asgi_call(path, query, token):
+    """Send one GET request to the ASGI application and return its status"""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', HOST.encode()), (b'authorization', f'Token {token}'.encode())],
+        'client': ('127.0.0.1', 0),
+        'server': (HOST, 80),
+    }
+    done = asyncio.Event()
+    sent = []
+
+    async def receive():
+        if not sent:
+            sent.append(True)
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client stays connected until the response is complete
+        await done.wait()
+        return {'type': 'http.disconnect'}
+
+    status = []
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif not message.get('more_body'):
+            done.set()
+
+    await asgi_application(scope, receive, send)
+    return status[0]
+
+
+def run_wsgi(requests, workers):
+    """Serve the requests from a pool of threads, one request per thread at a time"""
+    latencies = []
+
+    def call(request):
+        with timer() as elapsed:
+            status = wsgi_call(*request)
+        latencies.append(elapsed[0])
+        return status
+
+    def close_connection(_):
+        connections.close_all()
+
+    with timer() as total, ThreadPoolExecutor(workers) as pool:
+        statuses = list(pool.map(call, requests))
+        list(pool.map(close_connection, range(workers)))
+
+    return total[0], latencies, statuses
+
+
+def run_asgi(requests, concurrency):
+    """Serve the requests from tasks on one event loop, at most `concurrency` at a time"""
+    latencies = []
+
+    async def main():
+        queue = list(reversed(requests))
+        statuses = []
+
+        async def client():
+            while queue:
+                request = queue.pop()
+                with timer() as elapsed:
+                    statuses.append(await asgi_call(*request))
+                latencies.append(elapsed[0])
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return statuses
+
+    with timer() as total:
+        statuses = asyncio.run(main())
+
+    return total[0], latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32,
+                        help='requests in flight at once under ASGI')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='WSGI worker threads')
+    parser.add_argument('--db-latency', type=float, default=2,
+                        help='milliseconds added to every query')
+    options = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    with test_database(name=os.path.join(directory, 'asgi.sqlite3')):
+        tokens, games, events = seed()
+        requests = request_mix(options.requests, tokens, games, events)
+        connections.close_all()
+        if options.db_latency:
+            add_db_latency(options.db_latency / 1000)
+
+        async_requests = [('/async' + path, query, token) for path, query, token in requests]
+        results = {
+            f'WSGI, {options.workers} threads': run_wsgi(requests, options.workers),
+            f'ASGI, {options.concurrency} in flight': run_asgi(
+                async_requests, options.concurrency),
+        }
+        connections.close_all()
+
+    print(f'{options.requests} requests, {options.db_latency} ms added per query\n')
+    print(f'{"":24} {"req/s":>8} {"p50 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    for label, (total, latencies, statuses) in results.items():
+        errors = sum(status != 200 for status in statuses)
+        print(f'{label:24} {len(statuses) / total:>8.1f} '
+              f'{percentile(latencies, 0.5) * 1000:>8.2f} '
+              f'{percentile(latencies, 0.99) * 1000:>8.2f} {errors:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Time /games/search on a large generated database
+
+    python -m benchmarks.game_search [--games 1000000] [--requests 50]
+
+Fills a fresh file database with generate_data, --games games and a few
+events, then times each query in QUERIES --requests times: the FTS5 lookup
+alone, /games/search through Django's test client, and, for comparison,
+the icontains filter on title and maker that other databases fall back to.
+The fallback scans every game, so it only runs a few times.
+
+generate_data titles are two words out of sixteen each plus the game's id,
+so "dragon" matches one game in sixteen, while an id matches a single game.
+"""
+import argparse
+import itertools
+import os
+import tempfile
+
+from benchmarks.harness import percentile, setup_django, test_database, timer
+
+setup_django()
+
+# pylint: disable=wrong-import-position
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from levelupapi.cache import get_cache
+from levelupapi.models import Game
+from levelupapi.search import SEARCH_TABLE, WORD, match_expression, search_game_ids
+
+FALLBACK_RUNS = 3
+
+
+def queries(game_count):
+    """Return (name, query text) of each search to time"""
+    return [
+        ('rare word', str(game_count // 2)),
+        ('one word', 'dragon'),
+        ('one letter', 'd'),
+        ('two letters', 'dr'),
+        ('two words', 'dragon que'),
+        ('word and maker', 'quest hasbro'),
+        ('game type', 'racing'),
+    ]
+
+
+def count_matches(text):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT count(*) FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s',
+                       [match_expression(text)])
+        return cursor.fetchone()[0]
+
+
+def icontains(text, limit):
+    games = Game.objects.all()
+    for word in WORD.findall(text):
+        games = games.filter(Q(title__icontains=word) | Q(maker__icontains=word))
+    return list(games.order_by('title', 'id').values_list('id', flat=True)[:limit])
+
+
+def time_calls(count, call):
+    """Return the p50 and p95 milliseconds of `count` calls"""
+    latencies = []
+    for _ in range(count):
+        with timer() as elapsed:
+            call()
+        latencies.append(elapsed[0])
+    return percentile(latencies, 0.5) * 1000, percentile(latencies, 0.95) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=1000000)
+    parser.add_argument('--requests', type=int, default=50)
+    options = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    with test_database(name=os.path.join(directory, 'search.sqlite3')):
+        with timer() as loading:
+            call_command('generate_data', events=10000, gamers=1000, games=options.games,
+                         verbosity=0)
+        get_cache().clear()
+        token = Token.objects.order_by('user_id').first()
+        client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        print(f'{options.games} games, generated in {loading[0]:.1f} s, '
+              f'{options.requests} calls per query, milliseconds\n')
+        print(f'{"":16} {"matches":>8} {"fts p50":>8} {"fts p95":>8} '
+              f'{"http p50":>9} {"http p95":>9} {"icontains":>10}')
+        for name, text in queries(options.games):
+            matches = count_matches(text)
+            fts = time_calls(options.requests, lambda text=text: search_game_ids(text, 20))
+            # A new URL every call, or the response cache would answer it
+            calls = itertools.count()
+            http = time_calls(options.requests, lambda text=text, calls=calls: client.get(
+                '/games/search', {'q': text, 'call': next(calls)}))
+            fallback, _ = time_calls(FALLBACK_RUNS, lambda text=text: icontains(text, 20))
+            print(f'{name:16} {matches:>8} {fts[0]:>8.2f} {fts[1]:>8.2f} '
+                  f'{http[0]:>9.2f} {http[1]:>9.2f} {fallback:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Shared setup for the benchmark scripts
+
+Each script is run from the repository root, e.g.
+
+    python -m benchmarks.query_plans
+
+and works on a throwaway test database, never on db.sqlite3, and on a
+throwaway cache directory.
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+def setup_django():
+    """Configure Django with the project settings
+
+    The levelup cache goes to a temporary directory, shared with any server
+    the benchmark starts, so clearing it never touches a dev server's cache.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'levelup.settings')
+    os.environ.setdefault('MY_SECRET_KEY', 'benchmark')
+    os.environ.setdefault('LEVELUP_CACHE_DIR', tempfile.mkdtemp(prefix='levelup-bench-cache-'))
+
+    import django  # pylint: disable=import-outside-toplevel
+    django.setup()
+
+
+@contextmanager
+def test_database(keepdb=False, name=None):
+    """Create the test database with every migration applied, then drop it
+
+    SQLite test databases live in memory unless `name` gives a file path,
+    whatever the TEST NAME of the settings, which the unit tests use.
+    """
+    from django.db import connection  # pylint: disable=import-outside-toplevel
+    from django.test.utils import (  # pylint: disable=import-outside-toplevel
+        setup_test_environment, teardown_test_environment)
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.settings_dict['TEST']['NAME'] = name
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+@contextmanager
+def timer():
+    """Measure the wall time of a block in seconds, read from result[0]"""
+    result = [0.0]
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result[0] = time.perf_counter() - start
+
+
+def percentile(samples, fraction):
+    """Return the value below which `fraction` of the sorted samples fall"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
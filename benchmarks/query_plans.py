@@ -0,0 +1,183 @@
+"""Show that the hot list and report queries are answered from indexes
+
+    python -m benchmarks.query_plans [--events 50000]
+
+Seeds a test database, prints EXPLAIN QUERY PLAN for the event list, with
+each of its EventFilter filters, and the games by user report, and times
+each query with and without the index it is expected to use. Exits with status 1 if a plan doesn't use its index.
+"""
+import argparse
+import datetime
+import random
+import sys
+
+from benchmarks.harness import setup_django, test_database, timer
+
+setup_django()
+
+# pylint: disable=wrong-import-position
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import F
+
+from levelupapi.filters import attended_by
+from levelupapi.models import Event, EventGamer, Game, Gamer, GameType
+from levelupreports.refresh import rebuild_reports
+from levelupreports.views.users.games_by_user import GAMES_BY_USER_SQL
+
+
+def seed(event_count, gamer_count=200, game_count=500):
+    """Fill the database with gamers, games, events and signups"""
+    rng = random.Random(1)
+
+    User.objects.bulk_create(
+        User(username=f'gamer{index}', first_name='Gamer', last_name=str(index))
+        for index in range(gamer_count))
+    users = list(User.objects.values_list('pk', flat=True))
+    Gamer.objects.bulk_create(Gamer(user_id=user_id, bio='Gamez') for user_id in users)
+    gamers = list(Gamer.objects.values_list('pk', flat=True))
+
+    game_types = GameType.objects.bulk_create(
+        GameType(label=label) for label in ('Board', 'Card', 'Video'))
+    Game.objects.bulk_create(
+        Game(game_type=rng.choice(game_types), gamer_id=rng.choice(gamers),
+             title=f'Game {index}', maker='Maker', number_of_players=4, skill_level=3)
+        for index in range(game_count))
+    games = list(Game.objects.values_list('pk', flat=True))
+
+    start = datetime.date(2022, 1, 1)
+    Event.objects.bulk_create((
+        Event(game_id=rng.choice(games), organizer_id=rng.choice(gamers),
+              description='Game night', date=start + datetime.timedelta(days=rng.randrange(365)),
+              time=datetime.time(rng.randrange(24), rng.choice((0, 30))))
+        for _ in range(event_count)), batch_size=5000)
+
+    event_ids = list(Event.objects.values_list('pk', flat=True))
+    EventGamer.objects.bulk_create((
+        EventGamer(event_id=event_id, gamer_id=gamer_id)
+        for event_id in event_ids
+        for gamer_id in rng.sample(gamers, 2)), batch_size=5000)
+
+    Event.objects.refresh_attendees_count()
+    rebuild_reports()
+    return games[0], gamers[0], game_types[0].pk
+
+
+def explain(sql, params):
+    """Return the EXPLAIN QUERY PLAN lines of a query"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def run(sql, params, repeat=20):
+    """Return the best wall time of running a query and fetching its rows"""
+    best = float('inf')
+    for _ in range(repeat):
+        with connection.cursor() as cursor, timer() as elapsed:
+            cursor.execute(sql, params)
+            cursor.fetchall()
+        best = min(best, elapsed[0])
+    return best
+
+
+def index_sql(name):
+    """Return the CREATE INDEX statement of an index, or None if it can't be dropped
+
+    Unique constraints are part of the CREATE TABLE statement on SQLite, and
+    their automatic indexes have no statement of their own.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = %s", [name])
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def check(label, sql, params, indexes):
+    """Print a query's plan and timings, and report whether it used an index"""
+    plan = explain(sql, params)
+    used = [name for name in indexes if any(name in line for line in plan)]
+
+    print(f'\n== {label}')
+    for line in plan:
+        print(f'   {line}')
+
+    with_index = run(sql, params)
+    statements = {name: index_sql(name) for name in used}
+    if used and all(statements.values()):
+        with connection.cursor() as cursor:
+            for name in used:
+                cursor.execute(f'DROP INDEX "{name}"')
+        without_index = run(sql, params)
+        with connection.cursor() as cursor:
+            for statement in statements.values():
+                cursor.execute(statement)
+        print(f'   with index: {with_index * 1000:.3f} ms, '
+              f'without: {without_index * 1000:.3f} ms')
+    else:
+        print(f'   with index: {with_index * 1000:.3f} ms')
+    if not used:
+        print(f'   !! expected one of {", ".join(indexes)}')
+    return bool(used)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=50000)
+    options = parser.parse_args()
+
+    with test_database():
+        game_id, gamer_id, game_type_id = seed(options.events)
+        gamer = Gamer.objects.get(pk=gamer_id)
+
+        # EventView.list?game=<id>, in the order keyset pagination asks for
+        events = Event.objects.with_joined(gamer).filter(
+            game_id=game_id).order_by('date', 'time', 'id')
+        sql, params = events.query.sql_with_params()
+
+        # The joined flag probes EventGamer by (event, gamer). SQLite names the
+        # index of the unique_event_gamer constraint sqlite_autoindex_*
+        joined_sql = ('SELECT 1 FROM levelupapi_eventgamer '
+                      'WHERE event_id = %s AND gamer_id = %s LIMIT 1')
+
+        results = [
+            check('EventView.list?game=', sql, params, ['event_game_date_time_idx']),
+            check('Event joined lookup', joined_sql, [1, gamer_id],
+                  ['sqlite_autoindex_levelupapi_eventgamer_1', 'unique_event_gamer',
+                   'eventgamer_gamer_event_idx']),
+            check('UserGameList', GAMES_BY_USER_SQL, [], ['usergamereport_gamer_game_idx']),
+        ]
+
+        # EventFilter's filters, each in date order like a page of /events
+        in_date_order = Event.objects.order_by('date', 'time', 'id')
+        march = {'date__gte': datetime.date(2022, 3, 1), 'date__lte': datetime.date(2022, 3, 31)}
+        filters = [
+            ('?date_after=&date_before=', in_date_order.filter(**march),
+             ['event_date_time_idx']),
+            ('?date_after=&time_after=&time_before=', in_date_order.filter(
+                **march, time__gte=datetime.time(18), time__lte=datetime.time(21)),
+             ['event_date_time_idx']),
+            ('?organizer=', in_date_order.filter(organizer_id=gamer_id),
+             ['event_organizer_date_time_idx']),
+            ('?organizer=&date_after=', in_date_order.filter(
+                organizer_id=gamer_id, date__gte=march['date__gte']),
+             ['event_organizer_date_time_idx']),
+            ('?game_type=&date_after=&date_before=', in_date_order.filter(
+                **march, game__game_type_id=game_type_id),
+             # Either the type's games, each one's events by date, or the dates
+             ['event_game_date_time_idx', 'event_date_time_idx']),
+            ('?attendee=', in_date_order.filter(pk__in=attended_by(gamer_id)),
+             ['eventgamer_gamer_event_idx']),
+            ('?open=true&date_after=&date_before=', in_date_order.filter(
+                **march, attendees_count__lt=F('game__number_of_players')),
+             ['event_date_time_idx']),
+        ]
+        for label, queryset, indexes in filters:
+            sql, params = queryset.query.sql_with_params()
+            results.append(check(f'EventView.list{label}', sql, params, indexes))
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
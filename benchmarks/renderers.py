@@ -0,0 +1,76 @@
+"""Compare DRF's JSONRenderer with levelupapi.renderers.FastJSONRenderer
+
+    python -m benchmarks.renderers [--rows 1000,10000] [--repeat 5]
+
+Builds the data of the full /events list, as EventSerializer gives it to
+the renderer, for each --rows count, then renders it with both renderers.
+The outputs must be the same bytes. Reports the best encode time of
+--repeat runs, and the peak memory tracemalloc sees allocated during one
+render, which includes the rendered bytes themselves.
+"""
+import argparse
+import tracemalloc
+
+from benchmarks.harness import setup_django, test_database, timer
+
+setup_django()
+
+# pylint: disable=wrong-import-position
+from rest_framework.renderers import JSONRenderer
+
+from benchmarks.serializers import seed
+from levelupapi.renderers import FastJSONRenderer, get_encoder
+from levelupapi.views.event import EventSerializer, event_queryset
+from levelupapi.views.helpers import plan_queryset
+
+
+def encode_time(renderer, data, repeat):
+    """Return the fastest of `repeat` renders, in seconds"""
+    best = None
+    for _ in range(repeat):
+        with timer() as elapsed:
+            renderer.render(data)
+        best = elapsed[0] if best is None else min(best, elapsed[0])
+    return best
+
+
+def peak_memory(renderer, data):
+    """Return the most memory allocated at once during a render, in bytes"""
+    tracemalloc.start()
+    try:
+        renderer.render(data)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', default='1000,10000',
+                        help='comma separated event counts')
+    parser.add_argument('--repeat', type=int, default=5)
+    options = parser.parse_args()
+
+    if get_encoder() is None:
+        raise SystemExit('No fast encoder, install orjson or set LEVELUP_JSON_ENCODER')
+
+    renderers = {'JSONRenderer': JSONRenderer(), 'FastJSONRenderer': FastJSONRenderer()}
+    print(f'{"events":>7} {"renderer":18} {"ms":>9} {"peak KiB":>9} {"KiB out":>9}')
+
+    for rows in (int(count) for count in options.rows.split(',')):
+        with test_database():
+            gamer = seed(rows)
+            events = plan_queryset(event_queryset(gamer, {}), EventSerializer).order_by('pk')
+            data = EventSerializer(events, many=True).data
+
+        outputs = {name: renderer.render(data) for name, renderer in renderers.items()}
+        if len(set(outputs.values())) != 1:
+            raise SystemExit(f'{rows} events: the renderers disagree')
+
+        for name, renderer in renderers.items():
+            print(f'{rows:>7} {name:18} {encode_time(renderer, data, options.repeat) * 1000:>9.2f} '
+                  f'{peak_memory(renderer, data) / 1024:>9.0f} {len(outputs[name]) / 1024:>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Compare the DRF serializers with the values fast path
+
+    python -m benchmarks.serializers [--rows 10000] [--repeat 3]
+
+Seeds --rows events and as many games, then builds the data of the full
+/events and /games lists both ways: EventSerializer and GameSerializer over
+the planned querysets the views use, and levelupapi.views.fastpath over the
+same querysets. The query time is included, since the fast path makes its
+own queries. Both must produce the same data, and the best of --repeat runs
+is reported per 10,000 rows.
+"""
+import argparse
+import random
+
+from benchmarks.harness import setup_django, test_database, timer
+
+setup_django()
+
+# pylint: disable=wrong-import-position
+from django.contrib.auth.models import User
+from django.db.models import Count
+
+from levelupapi.models import Event, EventGamer, Game, Gamer, GameType
+from levelupapi.views.event import EventSerializer, event_queryset
+from levelupapi.views.fastpath import serialize_values
+from levelupapi.views.game import GameSerializer
+from levelupapi.views.helpers import plan_queryset
+
+
+def seed(rows, gamer_count=200):
+    """Create `rows` games and `rows` events with three attendees each"""
+    rng = random.Random(1)
+
+    User.objects.bulk_create(
+        User(username=f'gamer{index}', first_name='Gamer', last_name=str(index))
+        for index in range(gamer_count))
+    Gamer.objects.bulk_create(Gamer(user=user, bio='Gamez') for user in User.objects.all())
+    gamers = list(Gamer.objects.values_list('pk', flat=True))
+
+    game_type = GameType.objects.create(label='Board')
+    Game.objects.bulk_create(
+        Game(game_type=game_type, gamer_id=rng.choice(gamers), title=f'Game {index}',
+             maker='Maker', number_of_players=4, skill_level=3)
+        for index in range(rows))
+    games = list(Game.objects.values_list('pk', flat=True))
+
+    Event.objects.bulk_create(
+        Event(game_id=rng.choice(games), organizer_id=rng.choice(gamers),
+              description='Game night', date='2022-06-01', time='19:00')
+        for _ in range(rows))
+    EventGamer.objects.bulk_create(
+        EventGamer(event_id=event_id, gamer_id=gamer_id)
+        for event_id in Event.objects.values_list('pk', flat=True)
+        for gamer_id in rng.sample(gamers, 3))
+    Event.objects.refresh_attendees_count()
+
+    return Gamer.objects.get(pk=gamers[0])
+
+
+def best_of(repeat, build):
+    """Run build() `repeat` times and return (fastest seconds, its data)"""
+    best, data = None, None
+    for _ in range(repeat):
+        with timer() as elapsed:
+            data = build()
+        best = elapsed[0] if best is None else min(best, elapsed[0])
+    return best, data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    options = parser.parse_args()
+
+    with test_database():
+        gamer = seed(options.rows)
+        lists = {
+            '/events': (plan_queryset(event_queryset(gamer, {}), EventSerializer)
+                        .order_by('pk'), EventSerializer),
+            '/games': (plan_queryset(Game.objects.annotate(event_count=Count('events')),
+                                     GameSerializer).order_by('pk'), GameSerializer),
+        }
+
+        results = []
+        for path, (queryset, serializer_class) in lists.items():
+            # all() gives each run a fresh queryset, without cached rows
+            slow, expected = best_of(options.repeat, lambda: serializer_class(
+                queryset.all(), many=True).data)
+            fast, data = best_of(options.repeat, lambda: serialize_values(
+                queryset.all(), serializer_class))
+            if data != expected:
+                raise SystemExit(f'{path}: the fast path data differs from the serializer')
+            results.append((path, slow, fast))
+
+    scale = 10000 / options.rows
+    print(f'{options.rows} rows, seconds per 10k rows (best of {options.repeat})\n')
+    print(f'{"":10} {"DRF":>8} {"values":>8} {"speedup":>8}')
+    for path, slow, fast in results:
+        print(f'{path:10} {slow * scale:>8.3f} {fast * scale:>8.3f} {slow / fast:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""Hammer a few events with concurrent signups and check none is oversubscribed
+
+    python -m benchmarks.signup_contention [--threads 8] [--events 5]
+                                           [--gamers 200] [--seats 20]
+
+Each thread signs its share of the --gamers gamers up for every one of
+the --events events, in its own random order, so all the threads keep
+racing each other for the seats of the same few events. There are more
+gamers than seats, and the last signups find the events full. The
+workload runs once per mode, on new events each time:
+
+    unchecked  event.attendees.add(), the signup before seats were checked
+    seats      levelupapi.seats.take_seat, which refuses full events
+    waitlist   take_seat(waitlist=True), full events put gamers in line
+    churn      like waitlist, but a quarter of the calls leave an event the
+               thread signed up for, whose seat goes to the first in line
+
+Afterwards every event is checked: no more attendees than --seats, an
+attendees_count equal to its EventGamer rows, and nobody waiting for an
+event with a free seat. The benchmark exits with status 1 when a mode
+other than unchecked breaks one of these.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+
+from benchmarks.harness import percentile, setup_django, test_database, timer
+
+setup_django()
+
+# pylint: disable=wrong-import-position
+from django.contrib.auth.models import User
+from django.db import OperationalError, connections, transaction
+from django.db.models import Count, F, Q
+
+from levelupapi.models import Event, EventGamer, Game, Gamer, GameType, WaitlistEntry
+from levelupapi.seats import ADDED, leave_event, take_seat
+from levelupreports.refresh import rebuild_reports
+
+MODES = ('unchecked', 'seats', 'waitlist', 'churn')
+LEAVE_SHARE = 0.25
+
+
+def seed(gamer_count, seats):
+    """Create the gamers and a game with `seats` players"""
+    User.objects.bulk_create(
+        User(username=f'gamer{index}', first_name='Gamer', last_name=str(index))
+        for index in range(gamer_count))
+    Gamer.objects.bulk_create(
+        Gamer(user_id=user_id, bio='Gamez')
+        for user_id in User.objects.values_list('pk', flat=True))
+    gamers = list(Gamer.objects.values_list('pk', flat=True))
+
+    game = Game.objects.create(
+        game_type=GameType.objects.create(label='Board'), gamer_id=gamers[0],
+        title='Catan', maker='Kosmos', number_of_players=seats, skill_level=3)
+    # bulk_create skipped the signals that add the gamers to the reports
+    rebuild_reports()
+    return gamers, game
+
+
+def create_events(game, count):
+    events = Event.objects.bulk_create(
+        Event(game=game, organizer_id=game.gamer_id, description='Game night',
+              date='2022-06-01', time='19:00')
+        for _ in range(count))
+    return [event.pk for event in events]
+
+
+def unchecked_signup(event_id, gamer_id):
+    """Do what EventView.signup did before it checked the seats"""
+    with transaction.atomic():
+        Event.objects.get(pk=event_id).attendees.add(gamer_id)
+    return ADDED, None
+
+
+def call(mode, rng, event_id, gamer_id, joined):
+    """Make one call of the mode, returning its outcome"""
+    if mode == 'unchecked':
+        return unchecked_signup(event_id, gamer_id)[0]
+    if mode == 'seats':
+        return take_seat(event_id, gamer_id)[0]
+    if mode == 'churn' and joined and rng.random() < LEAVE_SHARE:
+        return 'left' if leave_event(*joined.pop(rng.randrange(len(joined)))) else 'waited'
+    joined.append((event_id, gamer_id))
+    return take_seat(event_id, gamer_id, waitlist=True)[0]
+
+
+def run_mode(mode, event_ids, gamers, threads):
+    """Sign each thread's share of the gamers up for every event
+
+    Returns:
+        dict: calls per second, signups per second, outcome counts, latencies
+    """
+    outcomes, latencies, errors = {}, [], []
+    lock = threading.Lock()
+
+    def work(index):
+        rng = random.Random(index)
+        order = [(event_id, gamer_id)
+                 for event_id in event_ids for gamer_id in gamers[index::threads]]
+        rng.shuffle(order)
+        mine, times, joined = {}, [], []
+        try:
+            for event_id, gamer_id in order:
+                with timer() as elapsed:
+                    try:
+                        outcome = call(mode, rng, event_id, gamer_id, joined)
+                    except OperationalError as error:
+                        outcome = 'error'
+                        with lock:
+                            errors.append(str(error))
+                mine[outcome] = mine.get(outcome, 0) + 1
+                times.append(elapsed[0])
+        finally:
+            connections.close_all()
+        with lock:
+            for outcome, count in mine.items():
+                outcomes[outcome] = outcomes.get(outcome, 0) + count
+            latencies.extend(times)
+
+    workers = [threading.Thread(target=work, args=(index,)) for index in range(threads)]
+    with timer() as elapsed:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    return {
+        'calls': len(latencies) / elapsed[0],
+        'signups': outcomes.get(ADDED, 0) / elapsed[0],
+        'outcomes': outcomes,
+        'errors': errors,
+        'p50': percentile(latencies, 0.5),
+        'p99': percentile(latencies, 0.99),
+    }
+
+
+def check_events(event_ids, seats):
+    """Return a description of every broken seat invariant"""
+    problems = []
+    events = Event.objects.filter(pk__in=event_ids).annotate(
+        rows=Count('attendees', distinct=True), waiting=Count('waitlist', distinct=True))
+    for event in events:
+        if event.rows > seats:
+            problems.append(f'event {event.pk}: {event.rows} attendees for {seats} seats')
+        if event.attendees_count != event.rows:
+            problems.append(f'event {event.pk}: attendees_count {event.attendees_count}, '
+                            f'{event.rows} rows')
+        if event.waiting and event.rows < seats:
+            problems.append(f'event {event.pk}: {event.waiting} waiting with '
+                            f'{seats - event.rows} free seats')
+
+    # Nobody should be both seated and waiting
+    seated_and_waiting = WaitlistEntry.objects.filter(event_id__in=event_ids).filter(
+        Q(event__attendees=F('gamer'))).count()
+    if seated_and_waiting:
+        problems.append(f'{seated_and_waiting} gamers are seated and waiting')
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--events', type=int, default=5)
+    parser.add_argument('--gamers', type=int, default=200)
+    parser.add_argument('--seats', type=int, default=20)
+    options = parser.parse_args()
+
+    results, failures = {}, []
+    directory = tempfile.mkdtemp()
+    with test_database(name=os.path.join(directory, 'signups.sqlite3')):
+        gamers, game = seed(options.gamers, options.seats)
+        for mode in MODES:
+            event_ids = create_events(game, options.events)
+            result = run_mode(mode, event_ids, gamers, options.threads)
+            result['problems'] = check_events(event_ids, options.seats)
+            result['seated'] = EventGamer.objects.filter(event_id__in=event_ids).count()
+            results[mode] = result
+            if mode != 'unchecked' and (result['problems'] or result['errors']):
+                failures.append(mode)
+
+    print(f'{options.threads} threads, {options.events * options.gamers} calls per mode, '
+          f'{options.events} events of {options.seats} seats\n')
+    print(f'{"":10} {"calls/s":>8} {"signups/s":>10} {"seated":>7} {"p50 ms":>7} '
+          f'{"p99 ms":>7} {"errors":>7} {"problems":>9}  outcomes')
+    for mode, result in results.items():
+        outcomes = ', '.join(f'{outcome} {count}'
+                             for outcome, count in sorted(result['outcomes'].items()))
+        print(f'{mode:10} {result["calls"]:>8.0f} {result["signups"]:>10.1f} '
+              f'{result["seated"]:>7} {result["p50"] * 1000:>7.2f} '
+              f'{result["p99"] * 1000:>7.2f} {len(result["errors"]):>7} '
+              f'{len(result["problems"]):>9}  {outcomes}')
+
+    for mode in failures:
+        print(f'\n{mode} broke the seat limits:')
+        for problem in (results[mode]['problems'] + results[mode]['errors'])[:20]:
+            print(f'  {problem}')
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
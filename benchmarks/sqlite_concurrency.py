@@ -0,0 +1,193 @@
+"""Compare concurrent signups with and without the SQLite connection tuning
+
+    python -m benchmarks.sqlite_concurrency [--writers 8] [--readers 4] [--signups 200]
+
+Runs the same workload against a file database twice: once with Django's
+SQLite defaults (rollback journal, full fsync, deferred transactions) and
+once with the project settings (LEVELUP_SQLITE_PRAGMAS and immediate
+transactions). Writer threads sign gamers up for events the
+way EventView.signup does, while reader threads list events. Reports write
+throughput, "database is locked" errors and the cost of opening a
+connection compared to reusing one.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.harness import percentile, setup_django, test_database, timer
+
+setup_django()
+
+# pylint: disable=wrong-import-position
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection, connections, transaction
+from django.test.utils import override_settings
+
+from levelupapi.models import Event, EventGamer, Game, Gamer, GameType
+
+# Django's defaults. journal_mode is stored in the database file, so it has
+# to be switched back explicitly after a WAL run
+UNTUNED = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'busy_timeout': None,
+    'mmap_size': None,
+    'cache_size': None,
+    'temp_store': None,
+}
+
+
+def seed(gamer_count, event_count):
+    """Create the gamers and events the writers sign up for"""
+    User.objects.bulk_create(
+        User(username=f'gamer{index}', first_name='Gamer', last_name=str(index))
+        for index in range(gamer_count))
+    Gamer.objects.bulk_create(
+        Gamer(user_id=user_id, bio='Gamez')
+        for user_id in User.objects.values_list('pk', flat=True))
+
+    game_type = GameType.objects.create(label='Board')
+    game = Game.objects.create(
+        game_type=game_type, gamer=Gamer.objects.first(), title='Catan',
+        maker='Kosmos', number_of_players=4, skill_level=3)
+    Event.objects.bulk_create(
+        Event(game=game, organizer_id=Gamer.objects.first().pk, description='Game night',
+              date='2022-06-01', time='19:00')
+        for _ in range(event_count))
+
+    return (list(Gamer.objects.values_list('pk', flat=True)),
+            list(Event.objects.values_list('pk', flat=True)))
+
+
+def signup(gamer_id, event_id):
+    """Do what EventView.signup does for one gamer and event"""
+    with transaction.atomic():
+        gamer = Gamer.objects.get(pk=gamer_id)
+        event = Event.objects.get(pk=event_id)
+        EventGamer.objects.create(gamer=gamer, event=event)
+
+
+def run_workload(pairs, writers, readers):
+    """Run the signups across writer threads while readers list events
+
+    Returns:
+        dict: signups per second, locked errors and signup latencies
+    """
+    chunks = [pairs[index::writers] for index in range(writers)]
+    latencies, errors = [], []
+    lock = threading.Lock()
+    writing = threading.Event()
+    writing.set()
+
+    def write(chunk):
+        try:
+            for gamer_id, event_id in chunk:
+                with timer() as elapsed:
+                    try:
+                        signup(gamer_id, event_id)
+                    except OperationalError as error:
+                        with lock:
+                            errors.append(str(error))
+                        continue
+                with lock:
+                    latencies.append(elapsed[0])
+        finally:
+            connections.close_all()
+
+    def read():
+        try:
+            while writing.is_set():
+                try:
+                    list(Event.objects.select_related('game').order_by('date', 'time')[:50])
+                except OperationalError as error:
+                    with lock:
+                        errors.append(str(error))
+                # Pace the readers like requests, instead of holding the GIL
+                time.sleep(0.01)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=write, args=(chunk,)) for chunk in chunks]
+    reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+
+    with timer() as elapsed:
+        for thread in reader_threads + threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    writing.clear()
+    for thread in reader_threads:
+        thread.join()
+
+    return {
+        'throughput': len(latencies) / elapsed[0],
+        'locked': sum('locked' in error for error in errors),
+        'errors': len(errors),
+        'p50': percentile(latencies, 0.5),
+        'p99': percentile(latencies, 0.99),
+    }
+
+
+def connect_cost(repeat=200):
+    """Return the mean seconds to open a connection and to reuse one"""
+    with timer() as reconnect:
+        for _ in range(repeat):
+            connection.close()
+            connection.ensure_connection()
+    with timer() as reuse:
+        for _ in range(repeat):
+            connection.close_if_unusable_or_obsolete()
+            connection.ensure_connection()
+    return reconnect[0] / repeat, reuse[0] / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--signups', type=int, default=200,
+                        help='signups per writer thread')
+    options = parser.parse_args()
+
+    total = options.writers * options.signups
+    gamer_count = 50
+    event_count = -(-total // gamer_count)
+
+    directory = tempfile.mkdtemp()
+    with test_database(name=os.path.join(directory, 'concurrency.sqlite3')):
+        gamers, events = seed(gamer_count, event_count)
+        pairs = [(gamer_id, event_id) for event_id in events for gamer_id in gamers][:total]
+        half = total // 2
+
+        results = {}
+        tuned_options = dict(connection.settings_dict['OPTIONS'])
+        runs = (('django defaults', UNTUNED, {}, pairs[:half]),
+                ('tuned', {}, tuned_options, pairs[half:]))
+
+        for label, pragmas, options_dict, batch in runs:
+            # Every thread's connection is built from this same dictionary
+            connection.settings_dict['OPTIONS'] = options_dict
+            with override_settings(LEVELUP_SQLITE_PRAGMAS=pragmas):
+                connections.close_all()
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    journal = cursor.fetchone()[0]
+                result = run_workload(batch, options.writers, options.readers)
+                result['journal'] = journal
+                result['connect'], result['reuse'] = connect_cost()
+                connections.close_all()
+            results[label] = result
+
+    print(f'{options.writers} writers, {options.readers} readers, {half} signups each run\n')
+    print(f'{"":16} {"journal":>8} {"signups/s":>10} {"locked":>7} {"p50 ms":>8} '
+          f'{"p99 ms":>8} {"connect ms":>11} {"reuse ms":>9}')
+    for label, result in results.items():
+        print(f'{label:16} {result["journal"]:>8} {result["throughput"]:>10.1f} '
+              f'{result["locked"]:>7} {result["p50"] * 1000:>8.2f} {result["p99"] * 1000:>8.2f} '
+              f'{result["connect"] * 1000:>11.3f} {result["reuse"] * 1000:>9.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+"""Time the core endpoints on the fixtures scaled up, against a stored baseline
+
+    python -m benchmarks.suite [--scale 10000,100000,1000000] [--requests 50]
+                               [--baseline benchmarks/baseline.json]
+                               [--save] [--tolerance 0.5]
+
+For each --scale, a fresh file database is loaded with levelupapi/fixtures
+and then grown from them until it holds that many events, see
+scale_fixtures. Every endpoint in ENDPOINTS is then called --requests
+times in process through Django's test client, authenticated with the
+fixture token. The first call of each endpoint runs with the queries
+captured to count them, and the calls after it are timed.
+
+The results are compared with the baseline stored for the same scale.
+The suite exits with status 1 when an endpoint makes more queries than it
+did, or its p50 or p95 latency grew by more than --tolerance, e.g. 0.5 for
+50%. --save writes the results as the new baseline for their scale.
+Latencies depend on the machine, so record the baseline on the machine
+the suite is compared on.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+from benchmarks.harness import percentile, setup_django, test_database, timer
+
+setup_django()
+
+# pylint: disable=wrong-import-position
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from levelupapi.cache import get_cache
+from levelupapi.models import Event, EventGamer, Game, Gamer, GameType
+from levelupreports.refresh import rebuild_reports
+
+FIXTURES = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events', 'event_gamers']
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+BATCH_SIZE = 5000
+
+# Rows per event of the other tables
+GAMES_PER_EVENT = 0.1
+GAMERS_PER_EVENT = 0.05
+ATTENDEES_PER_EVENT = 3
+
+
+def scale_fixtures(event_count, seed=1):
+    """Grow the loaded fixtures until there are `event_count` events
+
+    New users, gamers, games and events are copies of the fixture rows,
+    taken in turn, with numbered names and titles. Games and events get a
+    random owner, game and organizer, and every event gets a few attendees,
+    no more than its game has players.
+    """
+    rng = random.Random(seed)
+
+    def grow(model, target, copy):
+        templates = list(model.objects.all())
+        missing = target - len(templates)
+        if missing > 0:
+            model.objects.bulk_create(
+                (copy(templates[index % len(templates)], index) for index in range(missing)),
+                batch_size=BATCH_SIZE)
+        return list(model.objects.values_list('pk', flat=True))
+
+    user_ids = grow(User, max(10, int(event_count * GAMERS_PER_EVENT)), lambda user, index: User(
+        username=f'{user.username}-{index}', password=user.password,
+        first_name=user.first_name, last_name=f'{user.last_name} {index}',
+        email=f'{index}.{user.email}'))
+
+    gamer_users = set(Gamer.objects.values_list('user_id', flat=True))
+    Gamer.objects.bulk_create(
+        (Gamer(user_id=user_id, bio='Me') for user_id in user_ids if user_id not in gamer_users),
+        batch_size=BATCH_SIZE)
+    gamer_ids = list(Gamer.objects.values_list('pk', flat=True))
+    game_type_ids = list(GameType.objects.values_list('pk', flat=True))
+
+    game_ids = grow(Game, max(10, int(event_count * GAMES_PER_EVENT)), lambda game, index: Game(
+        title=f'{game.title} {index}', maker=game.maker, gamer_id=rng.choice(gamer_ids),
+        game_type_id=rng.choice(game_type_ids), number_of_players=game.number_of_players,
+        skill_level=game.skill_level))
+
+    attending = set(EventGamer.objects.values_list('event_id', flat=True))
+    grow(Event, event_count, lambda event, index: Event(
+        game_id=rng.choice(game_ids), organizer_id=rng.choice(gamer_ids),
+        description=event.description, date=event.date, time=event.time))
+
+    EventGamer.objects.bulk_create(
+        (EventGamer(event_id=event_id, gamer_id=gamer_id)
+         for event_id, players in Event.objects.values_list('pk', 'game__number_of_players')
+         if event_id not in attending
+         for gamer_id in rng.sample(gamer_ids, min(players, ATTENDEES_PER_EVENT))),
+        batch_size=BATCH_SIZE)
+
+    # bulk_create skips the signals that keep these up to date
+    Event.objects.refresh_attendees_count()
+    rebuild_reports()
+
+
+def endpoints(event_count):
+    """Return (name, method, path) of each endpoint to time"""
+    rng = random.Random(2)
+    game_id = rng.randint(1, max(10, int(event_count * GAMES_PER_EVENT)))
+    event_id = rng.randint(1, event_count)
+    # An event with a free seat that gamer 1, the fixture token's gamer, doesn't attend yet
+    free_event_id = Event.objects.exclude(attendees=1).filter(
+        attendees_count__lt=F('game__number_of_players')).order_by('-pk').values_list(
+            'pk', flat=True).first()
+
+    return [
+        ('event page', 'get', '/events?page_size=100&ordering=date'),
+        ('events of a game', 'get', f'/events?game={game_id}'),
+        ('event detail', 'get', f'/events/{event_id}'),
+        ('game page', 'get', '/games?page_size=100'),
+        ('gamer page', 'get', '/gamers?page_size=100'),
+        ('games by user report', 'get', '/reports/usergames'),
+        # Every signup is undone by the leave that follows it
+        ('signup', 'post', f'/events/{free_event_id}/signup'),
+        ('leave', 'delete', f'/events/{free_event_id}/leave'),
+    ]
+
+
+def run_endpoints(event_count, requests):
+    """Call every endpoint and measure it
+
+    Returns:
+        dict: {name: {p50_ms, p95_ms, p99_ms, queries}}
+    """
+    token = Token.objects.get(user_id=1)
+    client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+    calls = endpoints(event_count)
+    results = {name: [] for name, _, _ in calls}
+    queries = {}
+
+    for index in range(requests):
+        for name, method, path in calls:
+            if index == 0:
+                with CaptureQueriesContext(connection) as context:
+                    response = getattr(client, method)(path)
+                queries[name] = len(context.captured_queries)
+            else:
+                with timer() as elapsed:
+                    response = getattr(client, method)(path)
+                results[name].append(elapsed[0])
+
+            if response.status_code >= 400:
+                raise SystemExit(f'{name}: {method.upper()} {path} returned {response.status_code}')
+            if response.streaming:
+                b''.join(response.streaming_content)
+
+    return {name: {
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'queries': queries[name],
+    } for name, latencies in results.items()}
+
+
+def compare(results, baseline, tolerance):
+    """Print the results next to the baseline
+
+    Returns:
+        list: a description of every regression
+    """
+    regressions = []
+    print(f'{"":22} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"queries":>8}  baseline p50/p95/queries')
+    for name, result in results.items():
+        base = baseline.get(name)
+        line = (f'{name:22} {result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f} '
+                f'{result["p99_ms"]:>9.2f} {result["queries"]:>8}')
+        if base is None:
+            print(f'{line}  (none)')
+            continue
+        print(f'{line}  {base["p50_ms"]:.2f}/{base["p95_ms"]:.2f}/{base["queries"]}')
+
+        if result['queries'] > base['queries']:
+            regressions.append(f'{name}: {result["queries"]} queries, was {base["queries"]}')
+        for key in ('p50_ms', 'p95_ms'):
+            if result[key] > base[key] * (1 + tolerance):
+                regressions.append(f'{name}: {key} {result[key]:.2f}, was {base[key]:.2f}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', default='10000',
+                        help='comma separated event counts, e.g. 10000,100000,1000000')
+    parser.add_argument('--requests', type=int, default=50,
+                        help='calls per endpoint, the first one counts the queries')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save', action='store_true',
+                        help='store the results as the baseline for their scale')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='allowed latency growth over the baseline, 0.5 is 50%%')
+    options = parser.parse_args()
+
+    baselines = {}
+    if os.path.exists(options.baseline):
+        with open(options.baseline, encoding='utf-8') as baseline_file:
+            baselines = json.load(baseline_file)
+
+    regressions = []
+    directory = tempfile.mkdtemp()
+    for event_count in (int(scale) for scale in options.scale.split(',')):
+        with test_database(name=os.path.join(directory, f'suite-{event_count}.sqlite3')):
+            with timer() as loading:
+                call_command('loaddata', *FIXTURES, verbosity=0)
+                scale_fixtures(event_count)
+            get_cache().clear()
+            results = run_endpoints(event_count, max(2, options.requests))
+
+        print(f'\n{event_count} events, loaded in {loading[0]:.1f} s, '
+              f'{options.requests} requests per endpoint\n')
+        regressions += [f'{event_count} events, {regression}' for regression in compare(
+            results, baselines.get(str(event_count), {}), options.tolerance)]
+        baselines[str(event_count)] = results
+
+    if options.save:
+        with open(options.baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump(baselines, baseline_file, indent=2)
+            baseline_file.write('\n')
+        print(f'\nSaved the baseline to {options.baseline}')
+    elif regressions:
+        print('\nREGRESSIONS')
+        for regression in regressions:
+            print(f'  {regression}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'levelup.settings')
+# Django advises against persistent connections under ASGI
+os.environ.setdefault('LEVELUP_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
@@ -49,11 +49,35 @@ INSTALLED_APPS = [
 # THIS IS NEW
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'levelupapi.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'levelupapi.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# Per route timings of sampled requests, see levelupapi/profiling.py. A
+# SAMPLE_RATE of 0 turns the profiling middleware off
+LEVELUP_PROFILING = {
+    'SAMPLE_RATE': float(os.environ.get('LEVELUP_PROFILE_SAMPLE_RATE', 0)),
+    # Seconds between writes of a process's histograms to the cache
+    'FLUSH_SECONDS': 10,
+}
+
+# Encodes the responses of levelupapi.renderers.FastJSONRenderer. orjson is
+# used when it is installed, set to None to always use the json module
+LEVELUP_JSON_ENCODER = 'levelupapi.renderers.orjson_dumps'
+
+# Token lookups cached by levelupapi.authentication.CachedTokenAuthentication
+LEVELUP_TOKEN_CACHE = {
+    'MAX_SIZE': 1024,
+    'TTL': 300,
+    # Set to an alias from CACHES to share cached tokens between processes
+    'CACHE_ALIAS': None,
 }
 
 # THIS IS NEW
@@ -65,12 +89,14 @@ CORS_ORIGIN_WHITELIST = (
 
 # UPDATE THIS
 MIDDLEWARE = [
+    'levelupapi.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'levelupapi.middleware.ReadReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -103,9 +129,93 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Seconds a connection is kept open for the next request, 0 closes
+        # it after every request and None keeps it forever. levelup/asgi.py
+        # defaults it to 0: under ASGI each request's sync code may run on a
+        # different thread, and connections left on idle threads aren't closed
+        'CONN_MAX_AGE': int(os.environ.get('LEVELUP_CONN_MAX_AGE', 600)),
+        # Check that a reused connection still works before each request
+        'CONN_HEALTH_CHECKS': True,
+        # Take the write lock when a transaction begins. A deferred
+        # transaction that reads before it writes can't wait for the lock,
+        # and fails with "database is locked" whatever busy_timeout is
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+        # Tests use a file too: an in-memory database shares one cache between
+        # connections, which fail at once instead of waiting for a lock, so
+        # tests couldn't sign up from several threads
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Read replica
+#
+# Set LEVELUP_REPLICA_NAME to the path of a second SQLite file to answer the
+# list, retrieve and report requests from it. `python manage.py sync_replica`
+# copies the default database into it. See levelupapi/database.py.
+
+LEVELUP_REPLICA_NAME = os.environ.get('LEVELUP_REPLICA_NAME')
+
+# Always defined, and only read from when LEVELUP_READ_DATABASE names it.
+# The tests give it a database of its own, to check which one each query
+# runs on, so run them without LEVELUP_REPLICA_NAME set.
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': LEVELUP_REPLICA_NAME or BASE_DIR / 'replica.sqlite3',
+    'TEST': {'NAME': BASE_DIR / 'test_replica.sqlite3'},
+}
+
+DATABASE_ROUTERS = ['levelupapi.database.ReadReplicaRouter']
+
+# Alias reads are sent to, None reads everything from the default database
+LEVELUP_READ_DATABASE = 'replica' if LEVELUP_REPLICA_NAME else None
+
+# Seconds a client keeps reading from the default database after a write,
+# so it sees its own changes while the replica catches up
+LEVELUP_REPLICA_STICKY_SECONDS = 5
+
+# PRAGMA statements run on every new SQLite connection, merged over the
+# defaults in levelupapi/database.py. Set a pragma to None to keep SQLite's
+# default, or this whole setting to None to skip the tuning.
+LEVELUP_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+#
+# The levelup cache holds table versions and cached list responses (see
+# levelupapi/cache.py). Every worker process has to see the same versions,
+# or one process keeps serving responses another one's writes made stale,
+# so it is kept on the file system, in LEVELUP_CACHE_DIR if it is set.
+# Deployments spread over several hosts should use a cache server such as
+# memcached or Redis. A local memory cache is refused unless DEBUG is on.
+
+LEVELUP_CACHE_DIR = os.environ.get('LEVELUP_CACHE_DIR', str(BASE_DIR / 'cache'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'levelup': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': LEVELUP_CACHE_DIR,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+LEVELUP_CACHE_ALIAS = 'levelup'
+
+# Gives the tests a cache directory of their own
+TEST_RUNNER = 'levelup.test_runner.TestRunner'
+
+# Seconds a cached list response is kept
+LEVELUP_CACHE_TIMEOUT = 600
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -0,0 +1,35 @@
+"""Test runner that keeps the tests away from a running server's cache"""
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """Run the tests with the levelup cache in a temporary directory
+
+    The tests clear the levelup cache, which would otherwise wipe the cached
+    responses, table versions and profiling stats of a dev server using the
+    project's cache directory.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp(prefix='levelup-test-cache-')
+        alias = getattr(settings, 'LEVELUP_CACHE_ALIAS', 'default')
+        self.cache_settings = override_settings(CACHES={
+            **settings.CACHES,
+            alias: {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': self.cache_dir,
+                'OPTIONS': {'MAX_ENTRIES': 10000},
+            },
+        })
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
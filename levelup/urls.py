@@ -17,7 +17,9 @@ from django.conf.urls import include
 from django.contrib import admin
 from django.urls import path
 from levelupapi.views import (EventView, GamerView, GameTypeView, GameView,
-                              login_user, register_user)
+                              async_event_detail, async_event_leave, async_event_list,
+                              async_event_signup, cache_stats_view, login_user,
+                              register_user, request_stats_view)
 from rest_framework import routers
 
 """
@@ -41,6 +43,15 @@ urlpatterns = [
     path('register', register_user),
     # Requests to http://localhost:8000/login will be routed to the login_user function
     path('login', login_user),
+    # Hit and miss counters of the list response cache, for staff users only
+    path('stats/cache', cache_stats_view),
+    # Timings and query counts per route from ProfilingMiddleware, for staff users only
+    path('stats/requests', request_stats_view),
+    # Async versions of the busiest event requests, for ASGI deployments
+    path('async/events', async_event_list),
+    path('async/events/<int:pk>', async_event_detail),
+    path('async/events/<int:pk>/signup', async_event_signup),
+    path('async/events/<int:pk>/leave', async_event_leave),
     path('api-auth', include('rest_framework.urls', namespace='rest_framework')),
     path('admin/', admin.site.urls),
     path('', include(router.urls)),
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class LevelupapiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'levelupapi'
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel,unused-import
+        from levelupapi import checks, signals
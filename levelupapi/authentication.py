@@ -0,0 +1,189 @@
+"""Token authentication that remembers recently seen tokens"""
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+from rest_framework.authtoken.models import Token
+
+from levelupapi.models import Gamer
+
+DEFAULT_TOKEN_CACHE = {
+    # How many tokens each process keeps in memory
+    'MAX_SIZE': 1024,
+    # Seconds before a cached token is looked up again
+    'TTL': 300,
+    # Optional alias from CACHES shared by every process
+    'CACHE_ALIAS': None,
+}
+
+
+class TokenCache:
+    """A bounded, thread safe LRU mapping of token key to (user, token, gamer)
+
+    Entries expire after `ttl` seconds, and the least recently used entry is
+    dropped once `max_size` is reached. When `cache_alias` names one of the
+    CACHES, it is consulted on a local miss so processes share lookups. It
+    also holds a small marker per token, checked on every local hit, so a
+    token one process forgets is forgotten by all of them at once.
+    """
+    prefix = 'levelup:token:'
+    live_prefix = 'levelup:token-live:'
+
+    def __init__(self, max_size, ttl, cache_alias=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared = caches[cache_alias] if cache_alias else None
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        """Return the cached entry for a token key, or None"""
+        now = time.monotonic()
+
+        with self.lock:
+            item = self.entries.get(key)
+            if item is not None:
+                expires, entry = item
+                if expires > now:
+                    self.entries.move_to_end(key)
+                else:
+                    del self.entries[key]
+                    item = None
+
+        if item is not None:
+            if self.shared is None or self.shared.get(self.live_prefix + key) is not None:
+                return entry
+            # Another process forgot the token
+            with self.lock:
+                self.entries.pop(key, None)
+            return None
+
+        if self.shared is not None:
+            entry = self.shared.get(self.prefix + key)
+            if entry is not None:
+                self.remember(key, entry, now)
+            return entry
+
+        return None
+
+    def set(self, key, entry):
+        """Cache the entry for a token key"""
+        self.remember(key, entry, time.monotonic())
+        if self.shared is not None:
+            self.shared.set_many({self.prefix + key: entry, self.live_prefix + key: True},
+                                 self.ttl)
+
+    def remember(self, key, entry, now):
+        """Store an entry in the local LRU, evicting the oldest if it is full"""
+        with self.lock:
+            self.entries[key] = (now + self.ttl, entry)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, *keys):
+        """Forget the given token keys"""
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+        if self.shared is not None and keys:
+            self.shared.delete_many([prefix + key for key in keys
+                                     for prefix in (self.prefix, self.live_prefix)])
+
+    def clear(self):
+        """Forget every token this process has cached"""
+        with self.lock:
+            self.entries.clear()
+
+
+_token_cache = None
+
+
+def get_token_cache():
+    """Return the process wide TokenCache, built from LEVELUP_TOKEN_CACHE"""
+    global _token_cache  # pylint: disable=global-statement
+
+    if _token_cache is None:
+        options = {**DEFAULT_TOKEN_CACHE, **getattr(settings, 'LEVELUP_TOKEN_CACHE', {})}
+        _token_cache = TokenCache(
+            options['MAX_SIZE'], options['TTL'], options['CACHE_ALIAS'])
+
+    return _token_cache
+
+
+def forget_user_tokens(user_id):
+    """Drop the cached tokens of a user whose user or gamer row changed"""
+    keys = list(Token.objects.filter(user_id=user_id).values_list('key', flat=True))
+    get_token_cache().delete(*keys)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that caches the token, user and gamer of a key
+
+    A cache hit authenticates without touching the database. The gamer of
+    the user is attached to the request as `request.gamer`, so views don't
+    have to look it up again. levelupapi.signals forgets tokens when tokens,
+    users or gamers are saved or deleted. With a shared CACHE_ALIAS every
+    process sees that on its next request, otherwise other processes only
+    see it once their own entry expires.
+    """
+
+    def authenticate(self, request):
+        credentials = super().authenticate(request)
+        if credentials is not None:
+            request.gamer = self.gamer
+        return credentials
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        entry = cache.get(key)
+
+        if entry is None:
+            # Raises AuthenticationFailed for unknown keys and inactive users
+            user, token = super().authenticate_credentials(key)
+            gamer = Gamer.objects.filter(user=user).first()
+            entry = (user, token, gamer)
+            cache.set(key, entry)
+
+        user, token, self.gamer = entry
+        return (user, token)
+
+
+async def authenticate_async(request):
+    """Authenticate a request to an async view by its token
+
+    The same token cache as CachedTokenAuthentication is used, and a miss is
+    looked up with the async ORM.
+
+    Returns:
+        tuple: (user, token, gamer)
+
+    Raises:
+        NotAuthenticated: when the request has no token
+        AuthenticationFailed: when the token is unknown or the user is inactive
+    """
+    auth = get_authorization_header(request).split()
+    if len(auth) != 2 or auth[0].lower() != b'token':
+        raise NotAuthenticated()
+    key = auth[1].decode()
+
+    cache = get_token_cache()
+    entry = cache.get(key)
+
+    if entry is None:
+        try:
+            token = await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist as ex:
+            raise AuthenticationFailed('Invalid token.') from ex
+        if not token.user.is_active:
+            raise AuthenticationFailed('User inactive or deleted.')
+
+        gamer = await Gamer.objects.filter(user=token.user).afirst()
+        entry = (token.user, token, gamer)
+        cache.set(key, entry)
+
+    return entry
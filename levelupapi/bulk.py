@@ -0,0 +1,292 @@
+"""Set-based writes that change many rows with a handful of queries
+
+bulk_create, bulk_update and queryset updates don't send the per-row
+post_save and post_delete signals that keep denormalized data up to date.
+Bulk writes send one `bulk_changed` signal with every affected row instead,
+and receivers refresh what they maintain for all of those rows at once.
+"""
+from contextlib import contextmanager
+from threading import local
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.dispatch import Signal
+
+from levelupapi.models import Event, EventGamer, Gamer, WaitlistEntry
+from levelupapi.seats import fill_from_waitlist, game_seats
+
+# Sent with sender=<model class>, instances=<list of changed rows> and, for
+# updates, previous=<the same rows as they were before the update>
+bulk_changed = Signal()
+
+# The most rows a single bulk request may carry
+MAX_BULK_ITEMS = 1000
+BATCH_SIZE = 500
+
+_state = local()
+
+
+@contextmanager
+def bulk_write():
+    """Make the per-row signal handlers skip the rows of a bulk write
+
+    Deleting through the ORM still sends post_delete for every row. Inside
+    this block the handlers ignore them, and the bulk_changed signal sent
+    afterwards covers all the rows together.
+    """
+    _state.depth = getattr(_state, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _state.depth -= 1
+
+
+def in_bulk_write():
+    """Check whether per-row signal handlers should leave the work to bulk_changed"""
+    return getattr(_state, 'depth', 0) > 0
+
+
+def resolve_related(rows, errors, related):
+    """Check the foreign keys of many rows with one in_bulk per related model
+
+    Valid ids are moved from `field` to `field_id` in each row, and missing
+    ones are reported in that row's errors.
+
+    Args:
+        rows (list): validated data, one dictionary per row
+        errors (list): an error dictionary per row, updated in place
+        related (dict): the related model of each foreign key field
+    """
+    for field, model in related.items():
+        ids = {row[field] for row in rows if row.get(field) is not None}
+        found = model.objects.only('pk').in_bulk(ids)
+
+        for row, error in zip(rows, errors):
+            if field not in row:
+                continue
+            if row[field] in found:
+                row[f'{field}_id'] = row.pop(field)
+            else:
+                error[field] = [f'Invalid pk "{row[field]}" - object does not exist.']
+
+
+def create_rows(model, rows, related, **fields):
+    """Validate the foreign keys of many new rows and insert them together
+
+    New rows get their id from the database, so a row that carries one is
+    invalid. The `fields` are set on every row, and whatever a row says
+    about those fields, e.g. a foreign key given by id, is ignored.
+
+    Args:
+        model (class): the model to create
+        rows (list): validated data, one dictionary per row
+        related (dict): the related model of each foreign key field
+        fields: values of the fields the client doesn't choose
+
+    Returns:
+        tuple: (created instances, or None if any row is invalid, row errors)
+    """
+    errors = [{} for _ in rows]
+    forced = {name.removesuffix('_id') for name in fields}
+
+    for row, error in zip(rows, errors):
+        if 'id' in row:
+            error['id'] = ['New rows get their id from the database, leave it out.']
+        for name in forced:
+            row.pop(name, None)
+            row.pop(f'{name}_id', None)
+
+    resolve_related(rows, errors, related)
+    if any(errors):
+        return None, errors
+
+    instances = [model(**row, **fields) for row in rows]
+
+    with transaction.atomic():
+        model.objects.bulk_create(instances, batch_size=BATCH_SIZE)
+        bulk_changed.send(sender=model, instances=instances, previous=[])
+
+    return instances, errors
+
+
+def update_rows(model, rows, related):
+    """Validate many changed rows and save them with one bulk_update
+
+    Every row needs an `id`, and the rows are fetched with a single in_bulk.
+
+    Args:
+        model (class): the model to update
+        rows (list): validated data, one dictionary per row
+        related (dict): the related model of each foreign key field
+
+    Returns:
+        tuple: (updated instances, or None if any row is invalid, row errors)
+    """
+    errors = [{} for _ in rows]
+
+    with transaction.atomic():
+        existing = model.objects.select_for_update().in_bulk(
+            {row['id'] for row in rows if 'id' in row})
+
+        for row, error in zip(rows, errors):
+            if 'id' not in row:
+                error['id'] = ['This field is required.']
+            elif row['id'] not in existing:
+                error['id'] = [f'{model.__name__} {row["id"]} does not exist.']
+
+        resolve_related(rows, errors, related)
+        if any(errors):
+            return None, errors
+
+        previous, instances, fields = [], [], set()
+        for row in rows:
+            instance = existing[row.pop('id')]
+            previous.append(model(**{
+                field.attname: getattr(instance, field.attname) for field in model._meta.concrete_fields
+            }))
+            for field, value in row.items():
+                setattr(instance, field, value)
+            fields.update(row)
+            instances.append(instance)
+
+        model.objects.bulk_update(instances, fields, batch_size=BATCH_SIZE)
+        bulk_changed.send(sender=model, instances=instances, previous=previous)
+
+    return instances, errors
+
+
+def parse_attendance(items):
+    """Split requested (event, gamer) items into valid pairs and results
+
+    Returns:
+        tuple: (list of pairs or None per item, results list)
+    """
+    pairs, results = [], []
+
+    for item in items:
+        try:
+            pair = (int(item['event']), int(item['gamer']))
+        except (TypeError, KeyError, ValueError):
+            pairs.append(None)
+            results.append({'status': 'invalid',
+                            'message': 'event and gamer ids are required'})
+            continue
+
+        pairs.append(pair)
+        results.append({'event': pair[0], 'gamer': pair[1]})
+
+    return pairs, results
+
+
+def resolve_attendance(pairs, results):
+    """Check that every pair names an existing event and gamer
+
+    Returns:
+        dict: the primary key of each (event_id, gamer_id) pair that exists
+    """
+    requested = [pair for pair in pairs if pair is not None]
+    event_ids = {event_id for event_id, _ in requested}
+    gamer_ids = {gamer_id for _, gamer_id in requested}
+
+    events = set(Event.objects.filter(pk__in=event_ids).values_list('pk', flat=True))
+    gamers = set(Gamer.objects.filter(pk__in=gamer_ids).values_list('pk', flat=True))
+    existing = {
+        (event_id, gamer_id): pk
+        for pk, event_id, gamer_id in EventGamer.objects.filter(
+            event_id__in=events, gamer_id__in=gamers).values_list('pk', 'event_id', 'gamer_id')
+    }
+
+    for index, pair in enumerate(pairs):
+        if pair is None:
+            continue
+        if pair[0] not in events:
+            pairs[index] = None
+            results[index].update(status='invalid', message='Event does not exist')
+        elif pair[1] not in gamers:
+            pairs[index] = None
+            results[index].update(status='invalid', message='Gamer does not exist')
+
+    return existing
+
+
+def add_attendees(items):
+    """Sign many gamers up for many events in one transaction
+
+    Events only take as many gamers as their game has players, in the order
+    of the items, and the items past that get the status 'full'.
+
+    Args:
+        items (list): dictionaries with an event id and a gamer id
+
+    Returns:
+        list: a result dictionary for each item, in the same order
+    """
+    pairs, results = parse_attendance(items)
+
+    with transaction.atomic():
+        existing = resolve_attendance(pairs, results)
+        # Locked until the rows are written, where the database can lock rows
+        free_seats = dict(Event.objects.select_for_update().filter(
+            pk__in={pair[0] for pair in pairs if pair is not None}).values_list(
+                'pk', game_seats() - F('attendees_count')))
+        new_rows = {}
+
+        for pair, result in zip(pairs, results):
+            if pair is None:
+                continue
+            if pair in existing or pair in new_rows:
+                result['status'] = 'attending'
+            elif free_seats[pair[0]] <= 0:
+                result['status'] = 'full'
+            else:
+                result['status'] = 'added'
+                free_seats[pair[0]] -= 1
+                new_rows[pair] = EventGamer(event_id=pair[0], gamer_id=pair[1])
+
+        rows = list(new_rows.values())
+        EventGamer.objects.bulk_create(rows, ignore_conflicts=True)
+        if rows:
+            waiting = Q()
+            for event_id, gamer_id in new_rows:
+                waiting |= Q(event_id=event_id, gamer_id=gamer_id)
+            WaitlistEntry.objects.filter(waiting).delete()
+            bulk_changed.send(sender=EventGamer, instances=rows, previous=[])
+
+    return results
+
+
+def remove_attendees(items):
+    """Remove many gamers from many events in one transaction
+
+    Args:
+        items (list): dictionaries with an event id and a gamer id
+
+    Returns:
+        list: a result dictionary for each item, in the same order
+    """
+    pairs, results = parse_attendance(items)
+
+    with transaction.atomic():
+        existing = resolve_attendance(pairs, results)
+        removed = {}
+
+        for pair, result in zip(pairs, results):
+            if pair is None:
+                continue
+            if pair in existing:
+                result['status'] = 'removed'
+                removed[pair] = existing[pair]
+            else:
+                result['status'] = 'not attending'
+
+        if removed:
+            with bulk_write():
+                EventGamer.objects.filter(pk__in=removed.values()).delete()
+            bulk_changed.send(sender=EventGamer, instances=[
+                EventGamer(pk=pk, event_id=event_id, gamer_id=gamer_id)
+                for (event_id, gamer_id), pk in removed.items()
+            ], previous=[])
+            # The freed seats go to the gamers waiting for them
+            fill_from_waitlist({event_id for event_id, _ in removed})
+
+    return results
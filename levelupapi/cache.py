@@ -0,0 +1,132 @@
+"""Per-table version counters and response caching on top of Django's cache
+
+Every table the API reads has a version number in the cache that is bumped
+whenever one of its rows changes. Cached responses are keyed by the
+versions of the tables they were built from, so a change makes the old
+entries unreachable instead of having to find and delete them.
+
+The versions live in the cache named by LEVELUP_CACHE_ALIAS, which every
+worker process has to share: a process with its own copy never sees the
+bumps of another one's writes. The settings keep it on the file system, and
+levelupapi.checks refuses a local memory cache outside of DEBUG. Versions
+are stored per database, so a test run sharing the cache with a server
+never mistakes its tables for the server's.
+"""
+import time
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from levelupapi.database import read_alias
+
+VERSION_PREFIX = 'levelup:version:'
+RESPONSE_PREFIX = 'levelup:response:'
+STATS_PREFIX = 'levelup:stats:'
+
+
+def get_cache():
+    """Return the cache that holds versions and cached responses"""
+    return caches[getattr(settings, 'LEVELUP_CACHE_ALIAS', 'default')]
+
+
+def model_label(model):
+    """Return the name a model's version is stored under"""
+    return model._meta.label_lower
+
+
+def version_key(model):
+    """Return the cache key of a model's version in the default database"""
+    database = sha1(str(connections[DEFAULT_DB_ALIAS].settings_dict['NAME']).encode())
+    return f'{VERSION_PREFIX}{database.hexdigest()[:12]}:{model_label(model)}'
+
+
+def table_versions(*models):
+    """Return the current version of each model's table, in order"""
+    cache = get_cache()
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            # Start from the clock so an evicted counter never goes back to a
+            # version that cached responses were already stored under
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+
+    return [versions[key] for key in keys]
+
+
+def bump_table_version(model):
+    """Move a model's table to a new version
+
+    The version is bumped right away and again once the transaction commits.
+    A response cached in between could hold rows from before the commit, and
+    the second bump makes sure it is never served afterwards.
+    """
+    def bump():
+        cache = get_cache()
+        key = version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def count(stat):
+    """Add one to a cache statistic"""
+    cache = get_cache()
+    key = STATS_PREFIX + stat
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def cache_stats():
+    """Return the response cache hit and miss counters"""
+    stats = get_cache().get_many([STATS_PREFIX + 'hits', STATS_PREFIX + 'misses'])
+    hits = stats.get(STATS_PREFIX + 'hits', 0)
+    misses = stats.get(STATS_PREFIX + 'misses', 0)
+    lookups = hits + misses
+
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / lookups if lookups else None,
+    }
+
+
+def fingerprint(request, models, *extra):
+    """Hash a request's URL with the versions of the tables it reads"""
+    versions = ','.join(str(version) for version in table_versions(*models))
+    parts = [request.build_absolute_uri(), versions, *(str(part) for part in extra)]
+    return sha1('|'.join(parts).encode()).hexdigest()
+
+
+def response_key(request, models):
+    """Build the cache key of a response from its URL and table versions
+
+    Responses read from the replica are kept apart from those read from the
+    default database, so a client reading its own writes never gets a copy
+    built from a replica that hadn't caught up yet.
+    """
+    return RESPONSE_PREFIX + fingerprint(request, models, read_alias() or DEFAULT_DB_ALIAS)
+
+
+def get_cached_response(key):
+    """Return the cached data for a key, counting the hit or miss"""
+    data = get_cache().get(key)
+    count('misses' if data is None else 'hits')
+    return data
+
+
+def set_cached_response(key, data):
+    """Store the data of a response"""
+    timeout = getattr(settings, 'LEVELUP_CACHE_TIMEOUT', 600)
+    get_cache().set(key, data, timeout)
@@ -0,0 +1,31 @@
+"""System checks of the settings levelupapi relies on"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends that keep a separate copy of the cache in each process
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):  # pylint: disable=unused-argument
+    """Refuse a levelup cache the worker processes can't share, outside of DEBUG
+
+    Table versions kept per process would let one worker serve cached
+    responses and 304s for rows another worker has changed.
+    """
+    if settings.DEBUG:
+        return []
+
+    alias = getattr(settings, 'LEVELUP_CACHE_ALIAS', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+
+    return [Error(
+        f'The {alias!r} cache uses {backend}, which worker processes do not share.',
+        hint='Point LEVELUP_CACHE_ALIAS at a file based, memcached or Redis cache.',
+        id='levelupapi.E001',
+    )]
@@ -0,0 +1,114 @@
+"""Per-connection tuning of the SQLite database, and read replica routing
+
+Django opens SQLite with its defaults: a rollback journal, a full fsync on
+every commit and, once another connection holds the write lock, a short wait
+before giving up with "database is locked". configure_sqlite runs the PRAGMA
+statements from LEVELUP_SQLITE_PRAGMAS on every new connection instead.
+
+ReadReplicaRouter sends the reads of read only requests to the database
+named by LEVELUP_READ_DATABASE. levelupapi.middleware.ReadReplicaMiddleware
+decides which requests those are, and everything else, including every
+write, uses the default database.
+"""
+import re
+
+from asgiref.local import Local
+from django.conf import settings
+
+DEFAULT_SQLITE_PRAGMAS = {
+    # Readers no longer block the writer, and the writer no longer blocks them
+    'journal_mode': 'WAL',
+    # With WAL, only checkpoints fsync. A power loss can lose the last
+    # commits but never corrupts the database
+    'synchronous': 'NORMAL',
+    # Milliseconds to wait for the write lock before raising an error
+    'busy_timeout': 5000,
+    # Bytes of the database file read through memory mapping
+    'mmap_size': 256 * 1024 * 1024,
+    # Page cache of each connection, negative values are KiB
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+
+PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE = re.compile(r'^-?\w+$')
+
+
+def sqlite_pragmas():
+    """Return the pragmas to run on new connections, in order
+
+    LEVELUP_SQLITE_PRAGMAS is merged over the defaults. A pragma set to None
+    is left at SQLite's default, and setting LEVELUP_SQLITE_PRAGMAS itself
+    to None turns the tuning off.
+    """
+    overrides = getattr(settings, 'LEVELUP_SQLITE_PRAGMAS', {})
+    if overrides is None:
+        return {}
+
+    pragmas = {**DEFAULT_SQLITE_PRAGMAS, **overrides}
+    for name, value in pragmas.items():
+        if not PRAGMA_NAME.match(name) or (
+                value is not None and not PRAGMA_VALUE.match(str(value))):
+            raise ValueError(f'Invalid SQLite pragma {name} = {value!r}')
+
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+def configure_sqlite(connection):
+    """Apply the configured pragmas to a freshly opened SQLite connection"""
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+_routing = Local()
+
+
+def read_from_replica():
+    """Send this request's reads to the replica, until it writes"""
+    _routing.replica = True
+
+
+def reset_routing():
+    """Go back to reading from the default database"""
+    _routing.replica = False
+    _routing.written = False
+
+
+def has_written():
+    """Check whether this request has written to the database"""
+    return getattr(_routing, 'written', False)
+
+
+def read_alias():
+    """Return the database alias reads should use now
+
+    Returns:
+        str: LEVELUP_READ_DATABASE while routing reads to it, otherwise None
+    """
+    alias = getattr(settings, 'LEVELUP_READ_DATABASE', None)
+    if alias and getattr(_routing, 'replica', False) and not has_written():
+        return alias
+    return None
+
+
+class ReadReplicaRouter:
+    """Route the reads of read only requests to LEVELUP_READ_DATABASE
+
+    Once a request writes, its later reads go to the default database as
+    well, so it sees its own changes.
+    """
+
+    def db_for_read(self, model, **hints):  # pylint: disable=unused-argument
+        return read_alias()
+
+    def db_for_write(self, model, **hints):  # pylint: disable=unused-argument
+        _routing.written = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):  # pylint: disable=unused-argument
+        # The replica is a copy of the default database
+        return True
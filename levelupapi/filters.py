@@ -0,0 +1,94 @@
+"""Query param filters for the levelupapi list views"""
+import datetime
+
+from django.db.models import F
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from levelupapi.models import EventGamer
+from levelupapi.pagination import apply_ordering
+
+TRUE_VALUES = ('1', 'true', 'yes')
+FALSE_VALUES = ('0', 'false', 'no')
+
+
+def parse_param(params, name, parse, description):
+    """Read one query param, or None when it isn't given
+
+    Raises:
+        ValidationError: a 400 naming the param when it can't be parsed
+    """
+    value = params.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return parse(value)
+    except (TypeError, ValueError) as ex:
+        raise ValidationError({name: f'{description} is required.'}) from ex
+
+
+def parse_bool(value):
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(value)
+
+
+class EventFilter(BaseFilterBackend):
+    """Filter and order events by query params
+
+        game=<id>, organizer=<gamer id>, game_type=<id>, attendee=<gamer id>
+        date_after=YYYY-MM-DD, date_before=YYYY-MM-DD   inclusive
+        time_after=HH:MM, time_before=HH:MM             inclusive
+        open=true      only events with fewer attendees than the game's players
+        joined=true    only events the requesting gamer joined, false for the rest
+        ordering=date,-time   any of the view's ordering_fields
+
+    Each filter narrows an index range: game, organizer and dates use the
+    (game|organizer, date, time) and (date, time) indexes of Event, and
+    attendee and joined read the gamer's rows of eventgamer_gamer_event_idx.
+    open compares the stored attendees_count with the game row, so it only
+    narrows the rows the other filters found.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = getattr(request, 'query_params', request.GET)
+
+        for name, lookup in (('game', 'game_id'), ('organizer', 'organizer_id'),
+                             ('game_type', 'game__game_type_id')):
+            value = parse_param(params, name, int, 'A whole number')
+            if value is not None:
+                queryset = queryset.filter(**{lookup: value})
+
+        for name, lookup, parse, description in (
+                ('date_after', 'date__gte', datetime.date.fromisoformat, 'A YYYY-MM-DD date'),
+                ('date_before', 'date__lte', datetime.date.fromisoformat, 'A YYYY-MM-DD date'),
+                ('time_after', 'time__gte', datetime.time.fromisoformat, 'An HH:MM time'),
+                ('time_before', 'time__lte', datetime.time.fromisoformat, 'An HH:MM time')):
+            value = parse_param(params, name, parse, description)
+            if value is not None:
+                queryset = queryset.filter(**{lookup: value})
+
+        attendee = parse_param(params, 'attendee', int, 'A whole number')
+        if attendee is not None:
+            queryset = queryset.filter(pk__in=attended_by(attendee))
+
+        joined = parse_param(params, 'joined', parse_bool, 'A true or false value')
+        if joined is not None:
+            # The views import this module, so import from them only when used
+            from levelupapi.views.helpers import current_gamer  # pylint: disable=import-outside-toplevel
+            events = attended_by(current_gamer(request).pk)
+            queryset = queryset.filter(pk__in=events) if joined else queryset.exclude(
+                pk__in=events)
+
+        if parse_param(params, 'open', parse_bool, 'A true or false value'):
+            queryset = queryset.filter(attendees_count__lt=F('game__number_of_players'))
+
+        return apply_ordering(queryset, request, view)
+
+
+def attended_by(gamer_id):
+    """Return the ids of the events a gamer signed up for, as a subquery"""
+    return EventGamer.objects.filter(gamer_id=gamer_id).values('event_id')
@@ -0,0 +1,263 @@
+"""Management command that fills the database with generated gamers, games and events"""
+import datetime
+import random
+from contextlib import contextmanager
+from hashlib import sha1
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.authtoken.models import Token
+
+from levelupapi.cache import bump_table_version
+from levelupapi.models import Event, EventGamer, Game, Gamer, GameType
+from levelupapi.signals import VERSIONED_MODELS
+from levelupreports.refresh import rebuild_reports
+
+GAME_TYPES = ['Board game', 'Role-playing game', 'MMO game', 'Racing game', 'Card game',
+              'Strategy game', 'Party game', 'Puzzle game']
+
+TITLE_WORDS = [
+    ['Dragon', 'Shadow', 'Galactic', 'Ticket', 'Castle', 'Pandemic', 'Space', 'Mystic',
+     'Iron', 'Crimson', 'Lost', 'Elder', 'Cosmic', 'Wild', 'Frozen', 'Golden'],
+    ['Quest', 'Realms', 'Empire', 'Legends', 'Frontier', 'Tactics', 'Odyssey', 'Kingdoms',
+     'Rally', 'Heist', 'Dominion', 'Chronicles', 'Arena', 'Harbor', 'Siege', 'Voyage'],
+]
+MAKERS = ['Hasbro', 'Bethesda', 'Blizzard', 'Fantasy Flight', 'Days of Wonder', 'Z-Man',
+          'Stonemaier', 'Nintendo', 'Ubisoft', 'Asmodee', 'Wizards', 'Rio Grande']
+FIRST_NAMES = ['Carrie', 'Steve', 'Ada', 'Grace', 'Linus', 'Maya', 'Omar', 'Priya',
+               'Jonah', 'Keiko', 'Lena', 'Marco', 'Nia', 'Ravi', 'Sofia', 'Tariq']
+LAST_NAMES = ['Belk', 'Brownlee', 'Lovelace', 'Hopper', 'Okafor', 'Nguyen', 'Garcia',
+              'Kowalski', 'Haddad', 'Larsen', 'Moreau', 'Tanaka', 'Silva', 'Patel']
+BIOS = ['Love those gamez!!', 'Dice roller', 'Casual player', 'Here to win']
+DESCRIPTIONS = ['Game night', 'Casual session', 'Tournament round', 'Learn to play',
+                'Campaign session', 'Weekend marathon', 'League match', 'Beginners welcome']
+
+# How often each player count and skill level comes up for a game
+PLAYER_COUNTS = {1: 5, 2: 20, 3: 10, 4: 30, 5: 10, 6: 15, 8: 6, 10: 3, 20: 1}
+SKILL_LEVELS = {1: 10, 2: 25, 3: 35, 4: 20, 5: 10}
+# Events are mostly in the evening, on the quarter hour
+EVENT_HOURS = {10: 1, 12: 2, 14: 3, 16: 4, 18: 10, 19: 14, 20: 10, 21: 4}
+
+# Rows per insert of the generated event and attendee rows
+INSERT_BATCH_SIZE = 50000
+
+
+def zipf_weights(count, exponent=1.0):
+    """Cumulative weights that make the first items much more popular than the rest"""
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def weighted(rng, choices, count):
+    """Pick `count` keys of a {value: weight} dictionary"""
+    return rng.choices(list(choices), weights=list(choices.values()), k=count)
+
+
+def weighted_stream(rng, population, cum_weights, chunk_size=100000):
+    """Yield weighted random picks forever, drawn a chunk at a time"""
+    while True:
+        yield from rng.choices(population, cum_weights=cum_weights, k=chunk_size)
+
+
+@contextmanager
+def deferred_indexes(models):
+    """Drop the secondary indexes of some tables, and create them again afterwards
+
+    Building an index once over the loaded rows is much faster than updating
+    it for every insert. Only SQLite keeps the statements to rebuild them
+    with, so other databases keep their indexes. Unique constraints are part
+    of SQLite's CREATE TABLE and stay as well.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+
+    tables = [model._meta.db_table for model in models]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+            f"AND tbl_name IN ({', '.join(['%s'] * len(tables))})", tables)
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in indexes:
+                cursor.execute(sql)
+
+
+def last_pk(model):
+    """Return the highest primary key of a table, or 0 when it's empty"""
+    return model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def insert_rows(model, fields, rows):
+    """Insert tuples of column values, INSERT_BATCH_SIZE rows per executemany
+
+    Several times faster than bulk_create, which builds a model instance and
+    prepares every value of every row through its field. The values must
+    already be what the database stores, e.g. dates as strings on SQLite.
+    """
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(field).column) for field in fields)
+    sql = (f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+           f'VALUES ({", ".join(["%s"] * len(fields))})')
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            cursor.executemany(sql, rows[start:start + INSERT_BATCH_SIZE])
+
+
+class Command(BaseCommand):
+    help = ("Generate users with tokens, gamers, games, events and attendees at scale. "
+            "The same options and --seed always generate the same rows. Every user's "
+            "password is 'levelup' and the tokens follow from the seed, so never run "
+            "this against a production database")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=10000)
+        parser.add_argument('--gamers', type=int,
+                            help="Default: one gamer for every 20 events")
+        parser.add_argument('--games', type=int,
+                            help="Default: one game for every 10 events")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--start-date', type=datetime.date.fromisoformat,
+                            default=datetime.date(2022, 1, 1),
+                            help="Date of the earliest events (default: 2022-01-01)")
+        parser.add_argument('--days', type=int, default=540,
+                            help="Days the events are spread over")
+        parser.add_argument('--append', action='store_true',
+                            help="Add to a database that already has events")
+
+    def handle(self, *args, **options):
+        if Event.objects.exists() and not options['append']:
+            raise CommandError("The database already has events, pass --append to add more")
+
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        event_count = options['events']
+        gamer_count = options['gamers'] or max(10, event_count // 20)
+        game_count = options['games'] or max(10, event_count // 10)
+
+        # The foreign keys are all to rows generated here, or read back
+        # from the database, so checking every row on insert is wasted work
+        with connection.constraint_checks_disabled(), transaction.atomic(), \
+                deferred_indexes([User, Token, Gamer, Game, Event, EventGamer]):
+            gamers = self.create_gamers(gamer_count)
+            games = self.create_games(game_count, gamers)
+            attendee_count = self.create_events(event_count, games, gamers)
+        rebuild_reports()
+
+        for model in VERSIONED_MODELS:
+            bump_table_version(model)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {gamer_count} gamers, {game_count} games, {event_count} events "
+            f"and {attendee_count} attendees"))
+
+    def create_gamers(self, count):
+        """Create users with tokens and gamers, returning the gamer ids"""
+        rng, seed = self.rng, self.options['seed']
+        # Hashing a password takes a while, so every user shares one
+        password = make_password('levelup', salt=f'levelup{seed}')
+        user_offset = last_pk(User)
+        gamer_offset = last_pk(Gamer)
+        start = datetime.datetime.combine(
+            self.options['start_date'], datetime.time(), tzinfo=datetime.timezone.utc)
+        joined_field = User._meta.get_field('date_joined')
+        created = Token._meta.get_field('created').get_db_prep_save(start, connection)
+
+        users, tokens, gamers = [], [], []
+        for index in range(1, count + 1):
+            user_id = user_offset + index
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            joined = start - datetime.timedelta(minutes=rng.randrange(525600))
+            users.append((
+                user_id, f'{first.lower()}{user_id}', password, first, last,
+                f'{first.lower()}.{last.lower()}{user_id}@example.com', False, False, True,
+                joined_field.get_db_prep_save(joined, connection)))
+            # Derived from the seed, so a generated database is never for production
+            tokens.append((sha1(f'{seed}:{user_id}'.encode()).hexdigest(), user_id, created))
+            gamers.append((gamer_offset + index, user_id, rng.choice(BIOS)))
+
+        insert_rows(User, ['id', 'username', 'password', 'first_name', 'last_name', 'email',
+                           'is_superuser', 'is_staff', 'is_active', 'date_joined'], users)
+        insert_rows(Token, ['key', 'user', 'created'], tokens)
+        insert_rows(Gamer, ['id', 'user', 'bio'], gamers)
+        return [gamer[0] for gamer in gamers]
+
+    def create_games(self, count, gamers):
+        """Create games owned mostly by a few keen gamers
+
+        Returns:
+            list: (id, number_of_players) of every game
+        """
+        rng = self.rng
+        GameType.objects.bulk_create(
+            GameType(label=label) for label in GAME_TYPES
+            if not GameType.objects.filter(label=label).exists())
+        game_types = list(GameType.objects.values_list('pk', flat=True))
+
+        offset = last_pk(Game)
+        owners = rng.choices(gamers, cum_weights=zipf_weights(len(gamers)), k=count)
+        players = weighted(rng, PLAYER_COUNTS, count)
+        skills = weighted(rng, SKILL_LEVELS, count)
+        games = [
+            (game_id, rng.choice(game_types), owner,
+             f'{rng.choice(TITLE_WORDS[0])} {rng.choice(TITLE_WORDS[1])} {game_id}',
+             rng.choice(MAKERS), number_of_players, skill_level)
+            for game_id, owner, number_of_players, skill_level
+            in zip(range(offset + 1, offset + count + 1), owners, players, skills)]
+
+        insert_rows(Game, ['id', 'game_type', 'gamer', 'title', 'maker', 'number_of_players',
+                           'skill_level'], games)
+        return [(game[0], game[5]) for game in games]
+
+    def create_events(self, count, games, gamers):
+        """Create events of mostly popular games, with up to a full table of attendees
+
+        Returns:
+            int: the number of attendees
+        """
+        rng = self.rng
+        offset = last_pk(Event)
+
+        # Dates and times in database form, since insert_rows skips the fields
+        date_field, time_field = Event._meta.get_field('date'), Event._meta.get_field('time')
+        dates = [date_field.get_db_prep_save(
+            self.options['start_date'] + datetime.timedelta(days=day), connection)
+            for day in range(self.options['days'])]
+        times = [time_field.get_db_prep_save(datetime.time(hour, minute), connection)
+                 for hour in EVENT_HOURS for minute in (0, 15, 30, 45)]
+        time_weights = [weight for weight in EVENT_HOURS.values() for _ in range(4)]
+
+        event_games = rng.choices(games, cum_weights=zipf_weights(len(games), 0.8), k=count)
+        organizers = rng.choices(gamers, cum_weights=zipf_weights(len(gamers), 0.6), k=count)
+        event_dates = rng.choices(dates, k=count)
+        event_times = rng.choices(times, weights=time_weights, k=count)
+        descriptions = rng.choices(DESCRIPTIONS, k=count)
+        picks = weighted_stream(rng, gamers, zipf_weights(len(gamers), 0.4))
+
+        events, attendees = [], []
+        for event_id, (game_id, players), organizer, date, time, description in zip(
+                range(offset + 1, offset + count + 1), event_games, organizers,
+                event_dates, event_times, descriptions):
+            # Anywhere from empty to full, and organizers play too
+            seats = min(int(rng.random() * (players + 1)), len(gamers))
+            joined = set()
+            if seats:
+                joined.add(organizer)
+                while len(joined) < seats:
+                    joined.add(next(picks))
+                attendees.extend([(event_id, gamer_id) for gamer_id in sorted(joined)])
+
+            events.append((event_id, game_id, organizer, description, date, time, len(joined)))
+
+        insert_rows(Event, ['id', 'game', 'organizer', 'description', 'date', 'time',
+                            'attendees_count'], events)
+        insert_rows(EventGamer, ['event', 'gamer'], attendees)
+        return len(attendees)
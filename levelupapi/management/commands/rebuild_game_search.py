@@ -0,0 +1,24 @@
+"""Management command that refills the full-text search table of games"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from levelupapi.search import SEARCH_TABLE, rebuild_search_index, search_available
+
+
+class Command(BaseCommand):
+    help = f"Rebuild {SEARCH_TABLE}, the FTS5 table behind /games/search, from the games"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default',
+                            help="Alias of the database to rebuild (default: default)")
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not search_available(connections[using]):
+            raise CommandError("Only SQLite databases have a search table, "
+                               "other databases search the games table directly")
+
+        with transaction.atomic(using=using):
+            count = rebuild_search_index(using)
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} games for search"))
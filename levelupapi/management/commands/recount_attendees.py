@@ -0,0 +1,26 @@
+"""Management command that repairs the stored attendee counts on events"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from levelupapi.cache import bump_table_version
+from levelupapi.models import Event
+
+
+class Command(BaseCommand):
+    help = "Recount Event.attendees_count from the EventGamer rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'event_ids', nargs='*', type=int,
+            help="Only recount these events (default: every event)")
+
+    def handle(self, *args, **options):
+        events = Event.objects.all()
+        if options['event_ids']:
+            events = events.filter(pk__in=options['event_ids'])
+
+        with transaction.atomic():
+            updated = events.refresh_attendees_count()
+            bump_table_version(Event)
+
+        self.stdout.write(self.style.SUCCESS(f"Recounted attendees for {updated} events"))
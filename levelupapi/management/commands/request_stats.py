@@ -0,0 +1,38 @@
+"""Management command that prints the request profiling statistics"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from levelupapi.profiling import reset_stats, stats_summary
+
+
+class Command(BaseCommand):
+    help = ("Print the per route timings of requests sampled by ProfilingMiddleware. "
+            "Only processes sharing LEVELUP_CACHE_ALIAS with this one are seen")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true',
+                            help="Print the full summary as JSON")
+        parser.add_argument('--reset', action='store_true',
+                            help="Drop the statistics after printing them")
+
+    def handle(self, *args, **options):
+        summary = stats_summary()
+
+        if options['json']:
+            self.stdout.write(json.dumps(summary, indent=2))
+        elif not summary:
+            self.stdout.write("No profiled requests, is LEVELUP_PROFILING['SAMPLE_RATE'] set?")
+        else:
+            self.stdout.write(f"{'route':32} {'requests':>8} {'p50 ms':>8} {'p99 ms':>8} "
+                              f"{'queries':>8} {'db ms':>8} {'ser ms':>8}")
+            for route, stats in summary.items():
+                self.stdout.write(
+                    f"{route:32} {stats['wall_ms']['count']:>8} "
+                    f"{stats['wall_ms']['p50']:>8.2f} {stats['wall_ms']['p99']:>8.2f} "
+                    f"{stats['queries']['mean']:>8.1f} {stats['db_ms']['mean']:>8.2f} "
+                    f"{stats['serialize_ms']['mean']:>8.2f}")
+
+        if options['reset']:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS("Reset the request statistics"))
@@ -0,0 +1,27 @@
+"""Management command that copies the default database into the read replica"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = "Copy the default SQLite database into LEVELUP_READ_DATABASE"
+
+    def handle(self, *args, **options):
+        alias = getattr(settings, 'LEVELUP_READ_DATABASE', None)
+        if not alias:
+            raise CommandError("No read replica is configured, set LEVELUP_REPLICA_NAME")
+
+        source, target = connections['default'], connections[alias]
+        if source.vendor != 'sqlite' or target.vendor != 'sqlite':
+            raise CommandError("Only SQLite databases can be copied, "
+                               "use the database's own replication instead")
+
+        source.ensure_connection()
+        target.ensure_connection()
+        # SQLite's online backup copies a consistent snapshot, even while
+        # the default database is being written to
+        source.connection.backup(target.connection)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Copied {source.settings_dict['NAME']} to {target.settings_dict['NAME']}"))
@@ -0,0 +1,139 @@
+"""Middleware for the levelup project"""
+import random
+import time
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+from levelupapi.cache import get_cache
+from levelupapi.database import has_written, read_from_replica, reset_routing
+from levelupapi.profiling import (profiling_settings, query_timer, registry, start_profile,
+                                  stop_profile)
+
+# ViewSet actions that only read
+READ_ONLY_ACTIONS = {'list', 'retrieve'}
+
+STICKY_PREFIX = 'levelup:sticky:'
+
+
+def client_key(request):
+    """Identify the client of a request by its token or session
+
+    Returns:
+        str: a cache key, or None for anonymous clients without a session
+    """
+    credentials = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME)
+    if not credentials:
+        return None
+    return STICKY_PREFIX + sha1(credentials.encode()).hexdigest()
+
+
+def reads_only(request, view_func):
+    """Check whether a view may answer a request from the replica
+
+    ViewSet views qualify for their list and retrieve actions, and other
+    views when they, or their class, set `use_read_replica = True`.
+    """
+    if request.method not in SAFE_METHODS:
+        return False
+
+    actions = getattr(view_func, 'actions', None)
+    if actions is not None:
+        return actions.get(request.method.lower()) in READ_ONLY_ACTIONS
+
+    view_class = getattr(view_func, 'view_class', view_func)
+    return getattr(view_class, 'use_read_replica', False)
+
+
+class ReadReplicaMiddleware(MiddlewareMixin):
+    """Send the reads of read only requests to LEVELUP_READ_DATABASE
+
+    A request that writes marks its client, by token or session, as sticky
+    for LEVELUP_REPLICA_STICKY_SECONDS. That client's requests read from the
+    default database until the replica has caught up with the write.
+    """
+
+    def process_request(self, request):  # pylint: disable=unused-argument
+        reset_routing()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):  # pylint: disable=unused-argument
+        if not getattr(settings, 'LEVELUP_READ_DATABASE', None):
+            return
+        if reads_only(request, view_func) and not self.is_sticky(request):
+            read_from_replica()
+
+    def process_response(self, request, response):
+        if has_written() or request.method not in SAFE_METHODS:
+            self.stick(request)
+        reset_routing()
+        return response
+
+    @staticmethod
+    def stick(request):
+        """Keep the client of a request on the default database for a while"""
+        key = client_key(request)
+        if key is not None and getattr(settings, 'LEVELUP_READ_DATABASE', None):
+            get_cache().set(key, True, getattr(settings, 'LEVELUP_REPLICA_STICKY_SECONDS', 5))
+
+    @staticmethod
+    def is_sticky(request):
+        """Check whether the client of a request wrote recently"""
+        key = client_key(request)
+        return key is not None and get_cache().get(key) is not None
+
+
+def route_name(request):
+    """Name the route that answered a request, e.g. event-list
+
+    Routes without a name go by their pattern, e.g. async/events/<int:pk>.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.route
+
+
+class ProfilingMiddleware(MiddlewareMixin):
+    """Record the timings and queries of sampled requests per route
+
+    A LEVELUP_PROFILING['SAMPLE_RATE'] fraction of requests is profiled, see
+    levelupapi.profiling. With a rate of 0 Django leaves the middleware out
+    altogether. Put it first in MIDDLEWARE so the wall time covers the rest.
+    The body of a streamed response is built after the middleware is done,
+    so it isn't counted.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.sample_rate = profiling_settings()['SAMPLE_RATE']
+        if not self.sample_rate:
+            raise MiddlewareNotUsed
+
+    def process_request(self, request):
+        stop_profile()
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+
+        request.levelup_profile = start_profile()
+        request.levelup_profile['start'] = time.perf_counter()
+        for connection in connections.all():
+            connection.execute_wrappers.append(query_timer)
+
+    def process_response(self, request, response):
+        profile = getattr(request, 'levelup_profile', None)
+        if profile is None:
+            return response
+
+        profile['wall_ms'] = (time.perf_counter() - profile['start']) * 1000
+        stop_profile()
+        for connection in connections.all():
+            if query_timer in connection.execute_wrappers:
+                connection.execute_wrappers.remove(query_timer)
+
+        registry.record(route_name(request), profile)
+        return response
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_attendees(apps, schema_editor):
+    Event = apps.get_model('levelupapi', 'Event')
+    EventGamer = apps.get_model('levelupapi', 'EventGamer')
+
+    attendees = EventGamer.objects.filter(event=OuterRef('pk')).order_by(
+        ).values('event').annotate(count=Count('id')).values('count')
+    Event.objects.update(attendees_count=Coalesce(
+        Subquery(attendees), 0, output_field=models.PositiveIntegerField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0003_remove_event_timestamp_event_date_event_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='attendees_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='game',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='levelupapi.game'),
+        ),
+        migrations.AlterField(
+            model_name='eventgamer',
+            name='gamer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendees', to='levelupapi.gamer'),
+        ),
+        migrations.AddIndex(
+            model_name='eventgamer',
+            index=models.Index(fields=['gamer', 'event'], name='eventgamer_gamer_event_idx'),
+        ),
+        migrations.RunPython(count_attendees, migrations.RunPython.noop),
+    ]
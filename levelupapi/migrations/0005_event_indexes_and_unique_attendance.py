@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_signups(apps, schema_editor):
+    """Keep the first EventGamer row of every (event, gamer) pair"""
+    Event = apps.get_model('levelupapi', 'Event')
+    EventGamer = apps.get_model('levelupapi', 'EventGamer')
+
+    duplicates = EventGamer.objects.values('event', 'gamer').order_by().annotate(
+        first_id=Min('id'), rows=Count('id')).filter(rows__gt=1)
+
+    event_ids = set()
+    for pair in duplicates:
+        EventGamer.objects.filter(event_id=pair['event'], gamer_id=pair['gamer']).exclude(
+            id=pair['first_id']).delete()
+        event_ids.add(pair['event'])
+
+    attendees = EventGamer.objects.filter(event=OuterRef('pk')).order_by(
+        ).values('event').annotate(count=Count('id')).values('count')
+    Event.objects.filter(pk__in=event_ids).update(attendees_count=Coalesce(
+        Subquery(attendees), 0, output_field=models.PositiveIntegerField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0004_event_attendees_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_signups, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='event',
+            name='game',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='levelupapi.game'),
+        ),
+        migrations.AlterField(
+            model_name='eventgamer',
+            name='event',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='levelupapi.event'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['game', 'date', 'time'], name='event_game_date_time_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='eventgamer',
+            constraint=models.UniqueConstraint(fields=('event', 'gamer'), name='unique_event_gamer'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0005_event_indexes_and_unique_attendance'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='organizer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='organizing', to='levelupapi.gamer'),
+        ),
+        migrations.AlterField(
+            model_name='eventgamer',
+            name='gamer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='attendees', to='levelupapi.gamer'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['date', 'time'], name='event_date_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['organizer', 'date', 'time'], name='event_organizer_date_time_idx'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+from django.db import migrations
+
+CREATE_SEARCH = [
+    # rowid is the game's id. prefix= adds indexes of the first 2 and 3
+    # letters of every token, for the prefix queries of levelupapi.search
+    """
+    CREATE VIRTUAL TABLE levelupapi_game_fts USING fts5(
+        title, maker, game_type,
+        prefix = '2 3',
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    # ORDER BY rank weighs title matches over maker and game type ones
+    """
+    INSERT INTO levelupapi_game_fts (levelupapi_game_fts, rank)
+    VALUES ('rank', 'bm25(10.0, 4.0, 1.0)')
+    """,
+    """
+    CREATE TRIGGER levelupapi_game_fts_insert AFTER INSERT ON levelupapi_game BEGIN
+        INSERT INTO levelupapi_game_fts (rowid, title, maker, game_type)
+        VALUES (new.id, new.title, new.maker,
+                (SELECT label FROM levelupapi_gametype WHERE id = new.game_type_id));
+    END
+    """,
+    """
+    CREATE TRIGGER levelupapi_game_fts_update
+    AFTER UPDATE OF id, title, maker, game_type_id ON levelupapi_game BEGIN
+        DELETE FROM levelupapi_game_fts WHERE rowid = old.id;
+        INSERT INTO levelupapi_game_fts (rowid, title, maker, game_type)
+        VALUES (new.id, new.title, new.maker,
+                (SELECT label FROM levelupapi_gametype WHERE id = new.game_type_id));
+    END
+    """,
+    """
+    CREATE TRIGGER levelupapi_game_fts_delete AFTER DELETE ON levelupapi_game BEGIN
+        DELETE FROM levelupapi_game_fts WHERE rowid = old.id;
+    END
+    """,
+    # Fixtures may load games before their game type, which fills in the label
+    """
+    CREATE TRIGGER levelupapi_gametype_fts_insert AFTER INSERT ON levelupapi_gametype BEGIN
+        UPDATE levelupapi_game_fts SET game_type = new.label
+        WHERE rowid IN (SELECT id FROM levelupapi_game WHERE game_type_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER levelupapi_gametype_fts_update
+    AFTER UPDATE OF label ON levelupapi_gametype BEGIN
+        UPDATE levelupapi_game_fts SET game_type = new.label
+        WHERE rowid IN (SELECT id FROM levelupapi_game WHERE game_type_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO levelupapi_game_fts (rowid, title, maker, game_type)
+    SELECT g.id, g.title, g.maker, gt.label FROM levelupapi_game g
+    LEFT JOIN levelupapi_gametype gt ON gt.id = g.game_type_id
+    """,
+]
+
+DROP_SEARCH = [
+    'DROP TRIGGER IF EXISTS levelupapi_gametype_fts_update',
+    'DROP TRIGGER IF EXISTS levelupapi_gametype_fts_insert',
+    'DROP TRIGGER IF EXISTS levelupapi_game_fts_delete',
+    'DROP TRIGGER IF EXISTS levelupapi_game_fts_update',
+    'DROP TRIGGER IF EXISTS levelupapi_game_fts_insert',
+    'DROP TABLE IF EXISTS levelupapi_game_fts',
+]
+
+
+def run_on_sqlite(statements):
+    """FTS5 is SQLite's, other databases search without the table"""
+    def run(apps, schema_editor):  # pylint: disable=unused-argument
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0006_event_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_SEARCH), run_on_sqlite(DROP_SEARCH)),
+    ]
@@ -1,4 +1,28 @@
 from django.db import models
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Cast, Coalesce
+
+
+class EventQuerySet(models.QuerySet):
+    def with_joined(self, gamer):
+        """Annotate each event with 1 if the gamer is attending it, else 0"""
+        attending = self.model.attendees.through.objects.filter(
+            event=OuterRef('pk'), gamer=gamer)
+
+        return self.annotate(
+            joined=Cast(Exists(attending), output_field=models.IntegerField()))
+
+    def refresh_attendees_count(self):
+        """Recount the stored attendees_count of every event in the queryset
+
+        Returns:
+            int: the number of events updated
+        """
+        attendees = self.model.attendees.through.objects.filter(event=OuterRef('pk')).order_by(
+            ).values('event').annotate(count=Count('id')).values('count')
+
+        return self.update(attendees_count=Coalesce(
+            Subquery(attendees), 0, output_field=models.PositiveIntegerField()))
 
 
 class Event(models.Model):
@@ -10,11 +34,29 @@ class Event(models.Model):
     def joined(self, value):
         self.__joined = value
 
-    game = models.ForeignKey("Game", on_delete=models.CASCADE, related_name="events")
+    # Indexed by event_game_date_time_idx below
+    game = models.ForeignKey("Game", on_delete=models.CASCADE, related_name="events",
+                             db_index=False)
     description = models.TextField()
     date = models.DateField()
     time = models.TimeField()
+    # Indexed by event_organizer_date_time_idx below
     organizer = models.ForeignKey(
-        "Gamer", on_delete=models.CASCADE, related_name="organizing")
+        "Gamer", on_delete=models.CASCADE, related_name="organizing", db_index=False)
     attendees = models.ManyToManyField(
         "Gamer", through="EventGamer", related_name="attending")
+    # Kept in step with the EventGamer rows by levelupapi.signals
+    attendees_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Events of a game in date order, e.g. /events?game=1
+            models.Index(fields=['game', 'date', 'time'], name='event_game_date_time_idx'),
+            # Date ranges and date order, e.g. /events?date_after=2022-06-01
+            models.Index(fields=['date', 'time'], name='event_date_time_idx'),
+            # Events of an organizer in date order, e.g. /events?organizer=1
+            models.Index(fields=['organizer', 'date', 'time'],
+                         name='event_organizer_date_time_idx'),
+        ]
@@ -5,5 +5,19 @@ from django.db import models
 
 
 class EventGamer(models.Model):
-    gamer = models.ForeignKey("Gamer", on_delete=models.CASCADE, related_name="attendees")
-    event = models.ForeignKey("Event", on_delete=models.CASCADE)
+    # Indexed by eventgamer_gamer_event_idx below
+    gamer = models.ForeignKey("Gamer", on_delete=models.CASCADE, related_name="attendees",
+                              db_index=False)
+    # Indexed by unique_event_gamer below
+    event = models.ForeignKey("Event", on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        constraints = [
+            # A gamer can only sign up for an event once
+            models.UniqueConstraint(fields=['event', 'gamer'], name='unique_event_gamer'),
+        ]
+        indexes = [
+            # Answers "has this gamer joined this event" and "which events
+            # did this gamer join" without a scan
+            models.Index(fields=['gamer', 'event'], name='eventgamer_gamer_event_idx'),
+        ]
@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class WaitlistEntry(models.Model):
+    """A gamer waiting for a seat at a full event, seated in id order"""
+    # Indexed by unique_waitlist_event_gamer below
+    event = models.ForeignKey("Event", on_delete=models.CASCADE, related_name="waitlist",
+                              db_index=False)
+    gamer = models.ForeignKey("Gamer", on_delete=models.CASCADE, related_name="waiting_for")
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # A gamer waits for an event once. The index also finds an
+            # event's waitlist, which is short enough to sort by id
+            models.UniqueConstraint(fields=['event', 'gamer'],
+                                    name='unique_waitlist_event_gamer'),
+        ]
@@ -0,0 +1,196 @@
+"""Keyset (cursor) pagination for the levelupapi list views"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Paginate a queryset by seeking past the last row instead of using OFFSET
+
+    The view's `ordering_fields` lists the model fields a client may order by
+    with `?ordering=date,-time`. The primary key is appended as the final
+    sort key, ascending unless the client ordered by it, so every row has a
+    unique position. A cursor stores the
+    sort key values of the row at the edge of a page, and the next page is
+    fetched with a WHERE clause that starts right after it, so every page
+    costs the same no matter how deep into the results it is.
+
+    Pagination is used when the request has `?page_size=` or `?cursor=`, or
+    when `PAGE_SIZE` is set in the REST_FRAMEWORK settings.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return one page of the queryset, or None when pagination is off"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if self.page_size is None:
+            return None
+
+        self.ordering = self.get_ordering(request, view)
+        self.base_url = request.build_absolute_uri()
+        reverse, position = self.decode_cursor(request)
+
+        queryset = queryset.order_by(
+            *self.order_by(self.ordering, reverse))
+        if position is not None:
+            queryset = queryset.filter(
+                self.seek(self.ordering, position, reverse))
+
+        # Fetch one extra row to find out whether there is another page
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+    def get_page_size(self, request):
+        """Read the page size from the query string or the settings"""
+        page_size = request.query_params.get(self.page_size_query_param)
+
+        if page_size is None:
+            if self.cursor_query_param not in request.query_params:
+                return api_settings.PAGE_SIZE
+            page_size = api_settings.PAGE_SIZE or self.max_page_size
+
+        try:
+            page_size = int(page_size)
+        except (TypeError, ValueError) as ex:
+            raise ValidationError(
+                {self.page_size_query_param: 'A whole number is required.'}) from ex
+
+        if page_size < 1:
+            raise ValidationError(
+                {self.page_size_query_param: 'Must be greater than zero.'})
+
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request, view):
+        """Return the requested sort keys as (field, descending) pairs"""
+        allowed = getattr(view, 'ordering_fields', ())
+        params = getattr(request, 'query_params', request.GET)
+        param = params.get(self.ordering_query_param, '')
+        ordering = []
+
+        for term in filter(None, (term.strip() for term in param.split(','))):
+            field = term.lstrip('-')
+            if field not in allowed:
+                raise ValidationError(
+                    {self.ordering_query_param: f'Cannot order by "{field}".'})
+            if field in ('id', 'pk'):
+                # The id is unique, so nothing after it changes the order
+                ordering.append(('id', term.startswith('-')))
+                return ordering
+            ordering.append((field, term.startswith('-')))
+
+        ordering.append(('id', False))
+        return ordering
+
+    @staticmethod
+    def order_by(ordering, reverse):
+        """Build the ORDER BY terms, flipped when paging backwards"""
+        return [
+            f'-{field}' if descending != reverse else field
+            for field, descending in ordering
+        ]
+
+    @staticmethod
+    def seek(ordering, position, reverse):
+        """Build the WHERE clause for rows after the cursor position
+
+        For keys (a, b, id) this is
+        a > x OR (a = x AND b > y) OR (a = x AND b = y AND id > z)
+        """
+        condition = Q()
+        equal = {}
+
+        for (field, descending), value in zip(ordering, position):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+
+        return condition
+
+    def decode_cursor(self, request):
+        """Return (reverse, position) from the cursor query param"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return False, None
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            reverse = bool(cursor['r'])
+            position = cursor['p']
+        except (BinasciiError, UnicodeError, ValueError, TypeError, KeyError) as ex:
+            raise NotFound('Invalid cursor') from ex
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound('Invalid cursor')
+
+        return reverse, position
+
+    def encode_cursor(self, row, reverse):
+        """Return the cursor that points at the given row"""
+        position = [getattr(row, field) for field, _ in self.ordering]
+        cursor = json.dumps({'r': int(reverse), 'p': position},
+                            cls=DjangoJSONEncoder, separators=(',', ':'))
+        encoded = urlsafe_b64encode(cursor.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+
+def apply_ordering(queryset, request, view):
+    """Order a queryset by ?ordering=, the way KeysetPagination pages it
+
+    Lists that aren't paginated, streamed ones and those built from values
+    rows come back in the same order as the pages would.
+
+    Raises:
+        ValidationError: a 400 when a field isn't in the view's ordering_fields
+    """
+    params = getattr(request, 'query_params', request.GET)
+    if not params.get(KeysetPagination.ordering_query_param):
+        return queryset
+    pagination = KeysetPagination()
+    return queryset.order_by(*pagination.order_by(
+        pagination.get_ordering(request, view), reverse=False))
@@ -0,0 +1,275 @@
+"""Per route timing and query statistics of sampled requests
+
+levelupapi.middleware.ProfilingMiddleware profiles a LEVELUP_PROFILING
+['SAMPLE_RATE'] fraction of the requests. For each one it records, under
+the name of the route that answered it, e.g. event-list:
+
+    wall_ms       time from the middleware to the response
+    queries       database queries, on every database
+    db_ms         time spent running those queries
+    serialize_ms  time spent in the serializers using SparseFieldsMixin,
+                  the values fast path and FastJSONRenderer
+
+Each statistic goes into a Histogram with fixed buckets, so recording is a
+bisect and an increment, and histograms from several processes add up.
+Every FLUSH_SECONDS a process writes its histograms to the cache named by
+LEVELUP_CACHE_ALIAS, where the stats endpoint and the request_stats command
+read the histograms of every process from. As with the response cache,
+that needs a cache shared between processes to see more than one of them.
+"""
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from asgiref.local import Local
+from django.conf import settings
+
+from levelupapi.cache import get_cache
+
+PROFILE_PREFIX = 'levelup:profile:'
+PROCESSES_KEY = PROFILE_PREFIX + 'processes'
+
+# Upper bounds of the buckets, the last bucket takes everything above
+MS_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+METRICS = {
+    'wall_ms': MS_BUCKETS,
+    'queries': COUNT_BUCKETS,
+    'db_ms': MS_BUCKETS,
+    'serialize_ms': MS_BUCKETS,
+}
+
+DEFAULT_PROFILING = {
+    'SAMPLE_RATE': 0.0,
+    'FLUSH_SECONDS': 10,
+}
+
+
+def profiling_settings():
+    """Return LEVELUP_PROFILING merged over the defaults"""
+    return {**DEFAULT_PROFILING, **getattr(settings, 'LEVELUP_PROFILING', {})}
+
+
+class Histogram:
+    """Counts of values in fixed buckets, with their total and maximum"""
+
+    def __init__(self, bounds, counts=None, total=0.0, maximum=0.0):
+        self.bounds = bounds
+        self.counts = list(counts) if counts is not None else [0] * (len(bounds) + 1)
+        self.total = total
+        self.maximum = maximum
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def record(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    def merge(self, other):
+        """Add the values of a histogram with the same buckets"""
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    def percentile(self, fraction):
+        """Return the upper bound of the bucket holding the given fraction of values
+
+        The last bucket has no upper bound, so the maximum stands in for it.
+        """
+        count = self.count
+        if not count:
+            return None
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= fraction * count:
+                return self.bounds[index] if index < len(self.bounds) else self.maximum
+        return self.maximum
+
+    def to_dict(self):
+        return {'counts': self.counts, 'total': self.total, 'max': self.maximum}
+
+    @classmethod
+    def from_dict(cls, bounds, data):
+        return cls(bounds, data['counts'], data['total'], data['max'])
+
+    def summary(self):
+        """Return the count, mean, p50, p95, p99 and maximum"""
+        count = self.count
+        return {
+            'count': count,
+            'mean': self.total / count if count else None,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'max': self.maximum,
+        }
+
+
+class RouteStats:
+    """The histogram of every metric for one route"""
+
+    def __init__(self, histograms=None):
+        self.histograms = histograms or {
+            metric: Histogram(bounds) for metric, bounds in METRICS.items()}
+
+    def record(self, profile):
+        for metric, histogram in self.histograms.items():
+            histogram.record(profile[metric])
+
+    def merge(self, other):
+        for metric, histogram in self.histograms.items():
+            histogram.merge(other.histograms[metric])
+
+    def to_dict(self):
+        return {metric: histogram.to_dict() for metric, histogram in self.histograms.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({metric: Histogram.from_dict(bounds, data[metric])
+                    for metric, bounds in METRICS.items()})
+
+
+class Registry:
+    """The RouteStats of this process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.flushed_at = time.monotonic()
+        # Names this process's histograms in the cache
+        self.key = f'{PROFILE_PREFIX}{socket.gethostname()}:{os.getpid()}'
+
+    def record(self, route, profile):
+        with self.lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = self.routes[route] = RouteStats()
+            stats.record(profile)
+
+        if time.monotonic() - self.flushed_at >= profiling_settings()['FLUSH_SECONDS']:
+            self.flush()
+
+    def flush(self):
+        """Write this process's histograms to the cache"""
+        with self.lock:
+            data = {route: stats.to_dict() for route, stats in self.routes.items()}
+            self.flushed_at = time.monotonic()
+
+        cache = get_cache()
+        cache.set(self.key, data, None)
+        # Rewritten on every flush, so a process lost in a race adds itself back
+        processes = cache.get(PROCESSES_KEY, [])
+        if self.key not in processes:
+            cache.set(PROCESSES_KEY, [*processes, self.key], None)
+
+    def reset(self):
+        with self.lock:
+            self.routes = {}
+
+
+registry = Registry()
+
+
+def collect():
+    """Merge the histograms every process flushed to the cache
+
+    Returns:
+        dict: RouteStats by route name
+    """
+    registry.flush()
+    cache = get_cache()
+    routes = {}
+    for data in cache.get_many(cache.get(PROCESSES_KEY, [])).values():
+        for route, stats in data.items():
+            stats = RouteStats.from_dict(stats)
+            if route in routes:
+                routes[route].merge(stats)
+            else:
+                routes[route] = stats
+    return routes
+
+
+def stats_summary():
+    """Summarize the histograms of every route, slowest total time first
+
+    Returns:
+        dict: {route: {metric: {count, mean, p50, p95, p99, max}}}
+    """
+    routes = collect()
+    ordered = sorted(routes.items(), key=lambda item: -item[1].histograms['wall_ms'].total)
+    return {route: {metric: histogram.summary() for metric, histogram in stats.histograms.items()}
+            for route, stats in ordered}
+
+
+def reset_stats():
+    """Drop the histograms of this process and of every process in the cache"""
+    registry.reset()
+    cache = get_cache()
+    cache.delete_many([*cache.get(PROCESSES_KEY, []), PROCESSES_KEY])
+
+
+_profiling = Local()
+
+
+def start_profile():
+    """Start profiling the current request
+
+    Returns:
+        dict: the profile, filled in as the request runs
+    """
+    profile = {'queries': 0, 'db_ms': 0.0, 'serialize_ms': 0.0, 'serialize_depth': 0}
+    _profiling.current = profile
+    return profile
+
+
+def stop_profile():
+    _profiling.current = None
+
+
+def current_profile():
+    """Return the profile of the current request, or None when it isn't sampled"""
+    return getattr(_profiling, 'current', None)
+
+
+def query_timer(execute, sql, params, many, context):
+    """Database execute wrapper that counts and times the queries of a profile"""
+    profile = current_profile()
+    if profile is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile['queries'] += 1
+        profile['db_ms'] += (time.perf_counter() - start) * 1000
+
+
+@contextmanager
+def serializing():
+    """Add the time spent in the block to the current profile's serialize_ms
+
+    Nested blocks are only counted once, by the outermost one.
+    """
+    profile = current_profile()
+    if profile is None:
+        yield
+        return
+
+    profile['serialize_depth'] += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile['serialize_depth'] -= 1
+        if not profile['serialize_depth']:
+            profile['serialize_ms'] += (time.perf_counter() - start) * 1000
@@ -0,0 +1,103 @@
+"""JSON renderer that hands the encoding to a faster library when one is installed
+
+FastJSONRenderer renders the same bytes as DRF's JSONRenderer. The encoder
+is the callable named by the LEVELUP_JSON_ENCODER setting, orjson_dumps by
+default, which turns data into JSON bytes. Without orjson installed, with
+the setting set to None, or for data the encoder can't handle, the
+renderer falls back to JSONRenderer and the standard library json module.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from levelupapi.profiling import serializing
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+DEFAULT_ENCODER = 'levelupapi.renderers.orjson_dumps'
+
+# Valid JSON but not valid JavaScript, so JSONRenderer escapes them
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+# Converts what the encoder can't, the same way as JSONRenderer
+drf_encoder = JSONEncoder()
+
+
+def orjson_dumps(data):
+    """Encode data with orjson
+
+    Dates, times and datetimes are passed to DRF's encoder rather than
+    orjson's own formatting, so times keep the millisecond precision and
+    the Z suffix DRF gives them. DRF's encoder also converts Decimals,
+    UUIDs, lazy translations and querysets.
+
+    Returns:
+        bytes: compact UTF-8 JSON
+    """
+    return orjson.dumps(data, default=drf_encoder.default,
+                        option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+@lru_cache(maxsize=None)
+def load_encoder(path):
+    """Import the encoder named by LEVELUP_JSON_ENCODER
+
+    Returns:
+        callable: the encoder, or None when its library isn't installed
+    """
+    if path is None:
+        return None
+    if path == DEFAULT_ENCODER and orjson is None:
+        return None
+    return import_string(path)
+
+
+def get_encoder():
+    """Return the configured encoder, or None to use the standard library"""
+    return load_encoder(getattr(settings, 'LEVELUP_JSON_ENCODER', DEFAULT_ENCODER))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with LEVELUP_JSON_ENCODER when it can
+
+    Indented responses, e.g. for an Accept header with indent=4, and the
+    ASCII only or non compact output of the UNICODE_JSON and COMPACT_JSON
+    settings are left to JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with serializing():
+            return self.encode(data, accepted_media_type, renderer_context)
+
+    def encode(self, data, accepted_media_type, renderer_context):
+        """Render data, see JSONRenderer.render"""
+        encode = get_encoder()
+        if (encode is None or data is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            rendered = encode(data)
+        except TypeError:
+            # e.g. orjson's JSONEncodeError for non string keys or huge ints
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if b'\xe2\x80' in rendered:
+            for character, escaped in LINE_SEPARATORS:
+                rendered = rendered.replace(character, escaped)
+        return rendered
+
+
+def json_renderer():
+    """Return the JSON renderer the views are configured with"""
+    for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES:
+        if issubclass(renderer_class, JSONRenderer):
+            return renderer_class()
+    return JSONRenderer()
@@ -0,0 +1,128 @@
+"""Signups that never seat more gamers than an event's game has players
+
+An event's free seats are its game's number_of_players less its stored
+attendees_count. take_seat claims one with a single conditional UPDATE:
+
+    UPDATE levelupapi_event SET attendees_count = attendees_count + 1
+    WHERE id = %s AND attendees_count < (SELECT number_of_players ...)
+
+The database checks and counts the seat in the same statement, so two
+signups for the last seat can't both see it free, whichever database or
+isolation level runs them. The signup that changes no row finds the event
+full, and either gives up or joins the event's waitlist.
+
+The EventGamer row of a claimed seat is saved with `seat_counted` set, so
+the signal handler that counts new attendees leaves it alone. Leaving an
+event uncounts the seat as before, and fill_from_waitlist then seats the
+gamers who have waited longest.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Subquery
+
+from levelupapi.cache import bump_table_version
+from levelupapi.models import Event, EventGamer, Game, WaitlistEntry
+
+# Outcomes of take_seat
+ADDED = 'added'
+ATTENDING = 'attending'
+WAITLISTED = 'waitlisted'
+FULL = 'full'
+
+
+def game_seats():
+    """Return the number_of_players of an event's game, as an expression on Event"""
+    return Subquery(Game.objects.filter(pk=OuterRef('game_id')).values('number_of_players')[:1])
+
+
+def claim_seat(event_id):
+    """Count one more attendee if the event has a free seat
+
+    Returns:
+        bool: whether a seat was free
+    """
+    return bool(Event.objects.filter(pk=event_id, attendees_count__lt=game_seats()).update(
+        attendees_count=F('attendees_count') + 1))
+
+
+def seat(event_id, gamer_id):
+    """Save the attendance of a claimed seat, and take the gamer off the waitlist"""
+    attendance = EventGamer(event_id=event_id, gamer_id=gamer_id)
+    # claim_seat already counted it
+    attendance.seat_counted = True
+    attendance.save()
+    WaitlistEntry.objects.filter(event_id=event_id, gamer_id=gamer_id).delete()
+
+
+def take_seat(event_id, gamer_id, waitlist=False):
+    """Sign a gamer up for an event if it has a free seat
+
+    Args:
+        waitlist (bool): put the gamer on the waitlist when the event is full
+
+    Returns:
+        tuple: (ADDED, ATTENDING, WAITLISTED or FULL, the waitlist position or None)
+
+    Raises:
+        Event.DoesNotExist: there is no such event
+    """
+    try:
+        with transaction.atomic():
+            if claim_seat(event_id):
+                # Raises IntegrityError if the gamer already attends, which
+                # rolls the claim back
+                seat(event_id, gamer_id)
+                bump_table_version(Event)
+                return ADDED, None
+
+            if EventGamer.objects.filter(event_id=event_id, gamer_id=gamer_id).exists():
+                return ATTENDING, None
+            if not Event.objects.filter(pk=event_id).exists():
+                raise Event.DoesNotExist('Event matching query does not exist.')
+            if not waitlist:
+                return FULL, None
+
+            entry, _ = WaitlistEntry.objects.get_or_create(event_id=event_id, gamer_id=gamer_id)
+            position = WaitlistEntry.objects.filter(event_id=event_id, pk__lte=entry.pk).count()
+            return WAITLISTED, position
+    except IntegrityError:
+        return ATTENDING, None
+
+
+def fill_from_waitlist(event_ids):
+    """Seat waitlisted gamers, first come first served, while the events have free seats
+
+    Returns:
+        list: the (event_id, gamer_id) of every gamer seated
+    """
+    seated, full = [], set()
+
+    with transaction.atomic():
+        for entry in WaitlistEntry.objects.filter(event_id__in=event_ids).order_by('pk'):
+            if entry.event_id in full:
+                continue
+            if claim_seat(entry.event_id):
+                seat(entry.event_id, entry.gamer_id)
+                seated.append((entry.event_id, entry.gamer_id))
+            else:
+                full.add(entry.event_id)
+
+        if seated:
+            bump_table_version(Event)
+
+    return seated
+
+
+def leave_event(event_id, gamer_id):
+    """Take a gamer out of an event or its waitlist, and give the seat to the next in line
+
+    Returns:
+        bool: whether the gamer was attending
+    """
+    with transaction.atomic():
+        # post_delete uncounts the seat
+        removed, _ = EventGamer.objects.filter(event_id=event_id, gamer_id=gamer_id).delete()
+        WaitlistEntry.objects.filter(event_id=event_id, gamer_id=gamer_id).delete()
+        if removed:
+            fill_from_waitlist([event_id])
+
+    return bool(removed)
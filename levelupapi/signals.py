@@ -0,0 +1,120 @@
+"""Signal handlers that keep denormalized levelupapi data up to date"""
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from levelupapi.authentication import forget_user_tokens, get_token_cache
+from levelupapi.bulk import bulk_changed, in_bulk_write
+from levelupapi.cache import bump_table_version
+from levelupapi.database import configure_sqlite
+from levelupapi.models import Event, EventGamer, Game, Gamer, GameType
+
+# Models whose table versions key the cached responses
+VERSIONED_MODELS = (User, Gamer, GameType, Game, Event, EventGamer)
+
+
+def change_attendees_count(event_ids, amount):
+    """Add amount to the stored attendees_count of the given events"""
+    Event.objects.filter(pk__in=event_ids).update(
+        attendees_count=F('attendees_count') + amount)
+    bump_table_version(Event)
+
+
+@receiver(post_save, sender=EventGamer)
+def count_saved_attendee(sender, instance, created, raw, **kwargs):
+    """Count a gamer who was added to an event by saving an EventGamer"""
+    if in_bulk_write() or getattr(instance, 'seat_counted', False):
+        # Counted by the bulk write, or by levelupapi.seats.claim_seat
+        return
+    if raw:
+        # Fixtures may be loaded in any order, so count from scratch
+        Event.objects.filter(pk=instance.event_id).refresh_attendees_count()
+        bump_table_version(Event)
+    elif created:
+        change_attendees_count([instance.event_id], 1)
+
+
+@receiver(post_delete, sender=EventGamer)
+def count_deleted_attendee(sender, instance, **kwargs):
+    """Uncount a gamer who left an event, however the row was deleted"""
+    if in_bulk_write():
+        return
+    change_attendees_count([instance.event_id], -1)
+
+
+@receiver(m2m_changed, sender=EventGamer)
+def count_added_attendees(sender, instance, action, reverse, pk_set, **kwargs):
+    """Count gamers added with event.attendees.add()
+
+    Adding through the related manager uses bulk_create, which doesn't send
+    post_save. Removing and clearing delete the rows one by one through the
+    ORM, so post_delete already covers them.
+    """
+    if action != 'post_add' or not pk_set or in_bulk_write():
+        return
+
+    if reverse:
+        # gamer.attending.add(*events): one new row for each event
+        change_attendees_count(pk_set, 1)
+    else:
+        change_attendees_count([instance.pk], len(pk_set))
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def forget_token(sender, instance, **kwargs):
+    """Stop authenticating with a cached copy of a changed or deleted token"""
+    get_token_cache().delete(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_tokens_of_user(sender, instance, **kwargs):
+    """Reload the user of cached tokens, e.g. after they were deactivated"""
+    forget_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=Gamer)
+@receiver(post_delete, sender=Gamer)
+def forget_tokens_of_gamer(sender, instance, **kwargs):
+    """Reload the gamer attached to requests made with cached tokens"""
+    forget_user_tokens(instance.user_id)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_version_of_saved_row(sender, **kwargs):
+    """Invalidate cached responses built from a table whose row changed"""
+    if sender in VERSIONED_MODELS and not in_bulk_write():
+        bump_table_version(sender)
+
+
+@receiver(m2m_changed, sender=EventGamer)
+def bump_version_of_attendees(sender, action, **kwargs):
+    """Invalidate cached responses when event.attendees.add() adds rows"""
+    if action == 'post_add':
+        bump_table_version(EventGamer)
+
+
+@receiver(bulk_changed, sender=EventGamer)
+def count_bulk_attendees(sender, instances, **kwargs):
+    """Recount the events whose attendees changed in a bulk write"""
+    event_ids = {row.event_id for row in instances}
+    Event.objects.filter(pk__in=event_ids).refresh_attendees_count()
+    bump_table_version(Event)
+
+
+@receiver(bulk_changed)
+def bump_version_of_bulk_rows(sender, **kwargs):
+    """Invalidate cached responses built from a table changed in bulk"""
+    if sender in VERSIONED_MODELS:
+        bump_table_version(sender)
+
+
+@receiver(connection_created)
+def tune_connection(sender, connection, **kwargs):
+    """Apply LEVELUP_SQLITE_PRAGMAS to every new database connection"""
+    configure_sqlite(connection)
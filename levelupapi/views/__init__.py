@@ -2,4 +2,7 @@ from .auth import login_user, register_user
 from .game_type import GameTypeView
 from .game import GameView
 from .event import EventView
+from .async_event import (async_event_detail, async_event_leave, async_event_list,
+                          async_event_signup)
 from .gamer import GamerView
+from .stats import cache_stats_view, request_stats_view
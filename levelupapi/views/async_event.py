@@ -0,0 +1,114 @@
+"""Async views for the event requests that mostly wait on the database
+
+They answer the same requests as EventView's list, retrieve, signup and
+leave, through Django's async ORM. Under ASGI a request waiting on the
+database then doesn't hold a worker thread. They are routed under
+/async/events, next to the DRF views.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from levelupapi.authentication import authenticate_async
+from levelupapi.filters import EventFilter, parse_bool, parse_param
+from levelupapi.models import Event
+from levelupapi.renderers import json_renderer
+from levelupapi.seats import leave_event, take_seat
+from levelupapi.views.event import EventSerializer, EventView, event_queryset, signup_response
+from levelupapi.views.helpers import plan_queryset, sparse_options
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    """Render data with the same renderer as the sync views"""
+    return HttpResponse(json_renderer().render(data), status=status_code,
+                        content_type='application/json')
+
+
+def async_api_view(*methods):
+    """Make an async view accept only some methods and a token, like a DRF view
+
+    The user, token and gamer are attached to the request as `request.user`,
+    `request.auth` and `request.gamer`. A missing event is a 404, and DRF's
+    API exceptions get their usual status and body.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return json_response({'detail': f'Method "{request.method}" not allowed.'},
+                                     status.HTTP_405_METHOD_NOT_ALLOWED)
+            try:
+                request.user, request.auth, request.gamer = await authenticate_async(request)
+            except APIException as ex:
+                return json_response({'detail': ex.detail}, ex.status_code)
+
+            try:
+                return await view(request, *args, **kwargs)
+            except Event.DoesNotExist as ex:
+                return json_response({'message': ex.args[0]}, status.HTTP_404_NOT_FOUND)
+            except APIException as ex:
+                # e.g. a ValidationError for a bad filter param
+                return json_response(ex.detail, ex.status_code)
+
+        # Authenticated by token like the DRF views, which skip CSRF checks too
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+@async_api_view('GET', 'HEAD')
+async def async_event_list(request):
+    """Handles the GET requests for all events, filtered as EventFilter describes
+
+    Returns:
+        HttpResponse: JSON serialized events
+    """
+    options = sparse_options(request)
+    events = EventFilter().filter_queryset(request, event_queryset(request.gamer, options),
+                                           EventView)
+
+    # The joins and prefetches are all done while the rows are fetched, so
+    # serializing them afterwards doesn't touch the database
+    events = plan_queryset(events, EventSerializer, **options)
+    serializer = EventSerializer([event async for event in events], many=True, **options)
+    return json_response(serializer.data)
+
+
+@async_api_view('GET', 'HEAD')
+async def async_event_detail(request, pk):
+    """Handles the GET requests for a single event
+
+    Returns:
+        HttpResponse: JSON serialized event
+    """
+    options = sparse_options(request)
+    events = plan_queryset(event_queryset(request.gamer, options), EventSerializer, **options)
+    event = await events.aget(pk=pk)
+    return json_response(EventSerializer(event, **options).data)
+
+
+@async_api_view('POST')
+async def async_event_signup(request, pk):
+    """Post request for a user to sign up for an event, as EventView.signup"""
+    waitlist = parse_param(request.GET, 'waitlist', parse_bool, 'A true or false value')
+    # Transactions are sync only, so the seat is taken on a worker thread
+    outcome, position = await sync_to_async(take_seat)(pk, request.gamer.pk,
+                                                       waitlist=bool(waitlist))
+    return json_response(*signup_response(outcome, position))
+
+
+@async_api_view('DELETE')
+async def async_event_leave(request, pk):
+    """Delete request for a user to be removed from an event, as EventView.leave"""
+    if not await Event.objects.filter(pk=pk).aexists():
+        raise Event.DoesNotExist('Event matching query does not exist.')
+    await sync_to_async(leave_event)(pk, request.gamer.pk)
+    return json_response({'message': 'Gamer removed from event'})
+
+
+# Answered from the read replica, see levelupapi.middleware
+async_event_list.use_read_replica = True
+async_event_detail.use_read_replica = True
@@ -1,38 +1,84 @@
 """View module for handling requests about game types"""
 from django.forms import ValidationError
 from django.http import HttpResponseServerError
-from django.db.models import Count, Q
 from rest_framework import serializers, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
-from levelupapi.models import Event, Game, Gamer
+from levelupapi.bulk import (add_attendees, create_rows, parse_attendance, remove_attendees,
+                             update_rows)
+from levelupapi.filters import EventFilter, parse_bool, parse_param
+from levelupapi.models import Event, EventGamer, Game, Gamer
+from levelupapi.pagination import KeysetPagination
+from levelupapi.seats import ATTENDING, FULL, WAITLISTED, leave_event, take_seat
+from levelupapi.views.fastpath import serialize_values
+from levelupapi.views.helpers import (SparseFieldsMixin, check_bulk_items, conditional,
+                                     current_gamer, plan_queryset, sparse_options, stream_json,
+                                     validate_bulk, wants_field, wants_stream)
+
+
+def event_queryset(gamer, options):
+    """Return the events, flagged with whether the gamer joined each one
+
+    The joined subquery is skipped when ?fields= leaves it out.
+    """
+    if wants_field(options, 'joined'):
+        return Event.objects.with_joined(gamer)
+    return Event.objects.all()
+
+
+def may_change_attendance(request, items):
+    """Check that a gamer may sign others up for the events of some bulk items
+
+    Staff can change the attendance of any event, and other gamers only that
+    of the events they organize. Items without valid ids are left to the
+    per-item results.
+    """
+    if request.user.is_staff:
+        return True
+    pairs, _ = parse_attendance(items)
+    event_ids = {pair[0] for pair in pairs if pair is not None}
+    return not Event.objects.filter(pk__in=event_ids).exclude(
+        organizer=current_gamer(request)).exists()
+
+
+def signup_response(outcome, position):
+    """Return the body and status code answering a take_seat outcome"""
+    if outcome == WAITLISTED:
+        return ({'message': 'Event is full, gamer added to the waitlist', 'position': position},
+                status.HTTP_202_ACCEPTED)
+    if outcome == FULL:
+        return {'message': 'Event is full'}, status.HTTP_409_CONFLICT
+    if outcome == ATTENDING:
+        return {'message': 'Gamer is already attending'}, status.HTTP_200_OK
+    return {'message': 'Gamer added to event'}, status.HTTP_201_CREATED
 
 
 class EventView(ViewSet):
     """Level Up Events view"""
+    ordering_fields = ('id', 'date', 'time')
 
+    @conditional(Event, EventGamer, Game, Gamer, per_gamer=True)
     def retrieve(self, request, pk):
         """Handles the GET requests for a single event
 
         Returns:
             Response: JSON serialized event
         """
-        gamer = Gamer.objects.get(user=request.auth.user)
+        gamer = current_gamer(request)
+        options = sparse_options(request)
 
         try:
-            event = Event.objects.annotate(
-                attendees_count=Count('attendees'), joined=Count(
-                    'attendees',
-                    filter=Q(attendees=gamer)
-                )).get(pk=pk)
-            serializer = EventSerializer(event)
+            events = event_queryset(gamer, options)
+            event = plan_queryset(events, EventSerializer, **options).get(pk=pk)
+            serializer = EventSerializer(event, **options)
             return Response(serializer.data)
         except Event.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
 
+    @conditional(Event, EventGamer, Game, Gamer, per_gamer=True)
     def list(self, request):
-        """Handles the GET requests for all events
+        """Handles the GET requests for all events, filtered as EventFilter describes
 
         Returns:
             Response: JSON serialized event
@@ -40,24 +86,26 @@ class EventView(ViewSet):
         # events = Event.objects.all()
         # events = Event.objects.annotate(attendees_count=Count('attendees'))
 
-        gamer = Gamer.objects.get(user=request.auth.user)
+        gamer = current_gamer(request)
+        options = sparse_options(request)
 
-        events = Event.objects.annotate(
-            attendees_count=Count('attendees'),
-            joined=Count(
-                'attendees',
-                filter=Q(attendees=gamer)
-            )
-        )
+        events = EventFilter().filter_queryset(request, event_queryset(gamer, options), self)
 
-        game_param = request.query_params.get('game', None)
+        events = plan_queryset(events, EventSerializer, **options)
+        if wants_stream(request):
+            return stream_json(events, EventSerializer, **options)
 
-        if game_param is not None:
-            events = events.filter(game_id=game_param)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(events, request, view=self)
+        if page is not None:
+            serializer = EventSerializer(page, many=True, **options)
+            return paginator.get_paginated_response(serializer.data)
 
-        serializer = EventSerializer(events, many=True)
-
-        return Response(serializer.data)
+        # Built straight from the rows when the fast path supports the fields
+        data = serialize_values(events, EventSerializer, **options)
+        if data is None:
+            data = EventSerializer(events, many=True, **options).data
+        return Response(data)
 
     def create(self, request):
         """Handle POST operations
@@ -65,7 +113,7 @@ class EventView(ViewSet):
         Returns:
             Response -- JSON serialized event instance
         """
-        organizer = Gamer.objects.get(user=request.auth.user)
+        organizer = current_gamer(request)
 
         serializer = CreateEventSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -109,14 +157,22 @@ class EventView(ViewSet):
     # * In this case, the action will accept POST methods, and because detail=True the url will include the pk
     @action(methods=['post'], detail=True)
     def signup(self, request, pk):
-        """Post request for a user to sign up for an event"""
-        # Need to get the current gamer and the event they want to sign up for
-        gamer = Gamer.objects.get(user=request.auth.user)
-        event = Event.objects.get(pk=pk)
-        # Now we need to append the gamer to the attendees list on the event
-        event.attendees.add(gamer)
-        # Finally return the 201 status code
-        return Response({'message': 'Gamer added to event'}, status=status.HTTP_201_CREATED)
+        """Post request for a user to sign up for an event
+
+        Only as many gamers as the game has players get a seat. When the
+        event is full the response is a 409, or with ?waitlist=true a 202
+        with the gamer's place on the waitlist. A gamer who already attends
+        gets a 200.
+        """
+        gamer = current_gamer(request)
+        waitlist = parse_param(request.query_params, 'waitlist', parse_bool,
+                               'A true or false value')
+        try:
+            outcome, position = take_seat(pk, gamer.pk, waitlist=bool(waitlist))
+        except Event.DoesNotExist as ex:
+            return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
+        data, status_code = signup_response(outcome, position)
+        return Response(data, status=status_code)
 
     # Write a new method named leave
     # It should have the action decorator
@@ -124,18 +180,77 @@ class EventView(ViewSet):
     # It should be a detail route
     @action(methods=['delete'], detail=True)
     def leave(self, request, pk):
-        """Delete request for a user to be removed from an event"""
-        # Get the gamer and the event objects
-        gamer = Gamer.objects.get(user=request.auth.user)
-        event = Event.objects.get(pk=pk)
-    # Use the remove method on the ManyToManyField to delete the gamer from the join table
-        event.attendees.remove(gamer)
-    # Return a 204 Response
+        """Delete request for a user to be removed from an event or its waitlist
+
+        The seat goes to the gamer who has waited longest, if any.
+        """
+        gamer = current_gamer(request)
+        if not Event.objects.filter(pk=pk).exists():
+            return Response({'message': 'Event matching query does not exist.'},
+                            status=status.HTTP_404_NOT_FOUND)
+        leave_event(pk, gamer.pk)
         return Response({'message': 'Gamer removed from event'})
     # Test in Postman by sending a DELETE request to http://localhost:8000/events/12/leave
 
+    @action(methods=['post', 'delete'], detail=False)
+    def attendance(self, request):
+        """Sign many gamers up for events, or remove them, in one request
+
+        The body is a list of {"event": id, "gamer": id} items, at most
+        MAX_BULK_ITEMS of them. POST signs the gamers up and DELETE
+        removes them, all in one transaction. Only staff and the organizer
+        of every event in the items may do this.
 
-class EventSerializer(serializers.ModelSerializer):
+        Returns:
+            Response -- a result for each item, in the same order, or 403
+        """
+        error = check_bulk_items(request.data)
+        if error is not None:
+            return error
+        if not may_change_attendance(request, request.data):
+            return Response(
+                {'message': 'Only staff and event organizers can change attendance'},
+                status=status.HTTP_403_FORBIDDEN)
+
+        if request.method == 'POST':
+            results = add_attendees(request.data)
+        else:
+            results = remove_attendees(request.data)
+        return Response(results)
+
+    @action(methods=['post', 'put'], detail=False)
+    def bulk(self, request):
+        """Create (POST) or update (PUT) many events in one request
+
+        The body is a list of events. Foreign keys are checked with one query
+        per related model and the rows are written with bulk_create or
+        bulk_update in one transaction. If any row is invalid nothing is
+        written, and the response lists the errors of each row. Created
+        events are organized by the requesting gamer, as with create.
+
+        Returns:
+            Response -- the created events, or an empty body for updates
+        """
+        rows, error = validate_bulk(request, BulkEventSerializer)
+        if error is not None:
+            return error
+
+        related = {'game': Game, 'organizer': Gamer}
+        if request.method == 'POST':
+            events, errors = create_rows(
+                Event, rows, related, organizer_id=current_gamer(request).pk)
+        else:
+            events, errors = update_rows(Event, rows, related)
+
+        if events is None:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        if request.method == 'POST':
+            serializer = CreateEventSerializer(events, many=True)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(None, status=status.HTTP_204_NO_CONTENT)
+
+
+class EventSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """JSON serializer for events"""
     attendees_count = serializers.IntegerField(default=None)
 
@@ -152,3 +267,17 @@ class CreateEventSerializer(serializers.ModelSerializer):
         # ? Does it matter if 'fields' is an array or a tuple?
         fields = ['id', 'game', 'description',
                   'date', 'time', 'organizer']
+
+
+class BulkEventSerializer(serializers.ModelSerializer):
+    """JSON serializer for validating the rows of a bulk request
+
+    Foreign keys are plain ids here, so validating a row runs no queries.
+    """
+    id = serializers.IntegerField(required=False)
+    game = serializers.IntegerField()
+    organizer = serializers.IntegerField(required=False)
+
+    class Meta:
+        model = Event
+        fields = ['id', 'game', 'description', 'date', 'time', 'organizer']
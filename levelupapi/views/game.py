@@ -2,45 +2,117 @@
 from email.policy import default
 from django.forms import ValidationError
 from django.http import HttpResponseServerError
-from django.db.models import Count
+from django.contrib.auth.models import User
+from django.db.models import Case, Count, When
+from rest_framework.decorators import action
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers, status
-from levelupapi.models import Game, Gamer, GameType
+from rest_framework.exceptions import ValidationError as APIValidationError
+from levelupapi.bulk import create_rows, update_rows
+from levelupapi.filters import parse_param
+from levelupapi.models import Event, Game, Gamer, GameType
+from levelupapi.pagination import KeysetPagination, apply_ordering
+from levelupapi.search import search_game_ids
+from levelupapi.views.fastpath import serialize_values
+from levelupapi.views.helpers import (SparseFieldsMixin, cache_response, conditional,
+                                     current_gamer, plan_queryset, sparse_options, stream_json,
+                                     validate_bulk, wants_field, wants_stream)
+
+
+# Games returned by a search without ?limit=, and the most it may ask for
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
 
 
 class GameView(ViewSet):
     """Level Up game views"""
+    ordering_fields = ('id', 'title', 'maker', 'skill_level', 'number_of_players')
 
+    @conditional(Game, GameType, Gamer, User)
     def retrieve(self, request, pk):
         """Handles the GET requests for a single game
 
         Returns:
             Response: JSON serialized event
         """
+        options = sparse_options(request)
         try:
-            game = Game.objects.get(pk=pk)
-            serializer = GameSerializer(game)
+            game = plan_queryset(Game.objects, GameSerializer, **options).get(pk=pk)
+            serializer = GameSerializer(game, **options)
             return Response(serializer.data)
         except Game.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
 
+    @conditional(Game, GameType, Gamer, User, Event)
+    @cache_response(Game, GameType, Gamer, User, Event)
     def list(self, request):
         """Handles the GET requests for all games
 
         Returns:
             Response: JSON serialized event
         """
-        # games = Game.objects.all()
-        games = Game.objects.annotate(event_count=Count('events'))
+        options = sparse_options(request)
+
+        games = Game.objects.all()
+        if wants_field(options, 'event_count'):
+            games = games.annotate(event_count=Count('events'))
 
-        game_type = request.query_params.get('type', None)
+        game_type = parse_param(request.query_params, 'type', int, 'A whole number')
 
         if game_type is not None:
             games = games.filter(game_type_id=game_type)
+        games = apply_ordering(games, request, self)
+
+        games = plan_queryset(games, GameSerializer, **options)
+        if wants_stream(request):
+            return stream_json(games, GameSerializer, **options)
+
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(games, request, view=self)
+        if page is not None:
+            serializer = GameSerializer(page, many=True, **options)
+            return paginator.get_paginated_response(serializer.data)
+
+        # Built straight from the rows when the fast path supports the fields
+        data = serialize_values(games, GameSerializer, **options)
+        if data is None:
+            data = GameSerializer(games, many=True, **options).data
+        return Response(data)
+
+    @action(methods=['get'], detail=False)
+    @conditional(Game, GameType, Gamer, User)
+    @cache_response(Game, GameType, Gamer, User)
+    def search(self, request):
+        """Handles GET requests searching games by title, maker and game type
+
+        ?q= is free text, every word of which matches the start of a word of
+        the game, best matches first. ?limit= caps the number of games,
+        SEARCH_LIMIT by default and at most MAX_SEARCH_LIMIT.
 
-        serializer = GameSerializer(games, many=True)
-        return Response(serializer.data)
+        Returns:
+            Response: JSON serialized games, in rank order
+        """
+        query = request.query_params.get('q', '')
+        if not query.strip():
+            raise APIValidationError({'q': 'Text to search for is required.'})
+        limit = parse_param(request.query_params, 'limit', int, 'A whole number')
+        if limit is None:
+            limit = SEARCH_LIMIT
+        limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+
+        options = sparse_options(request)
+        ids = search_game_ids(query, limit)
+        if not ids:
+            return Response([])
+
+        # A game deleted since the search is left out
+        games = plan_queryset(Game.objects.filter(pk__in=ids), GameSerializer, **options).order_by(
+            Case(*(When(pk=pk, then=rank) for rank, pk in enumerate(ids))))
+        data = serialize_values(games, GameSerializer, **options)
+        if data is None:
+            data = GameSerializer(games, many=True, **options).data
+        return Response(data)
 
     def create(self, request):
         """Handle POST operations
@@ -48,7 +120,7 @@ class GameView(ViewSet):
         Returns:
             Response -- JSON serialized game instance
         """
-        gamer = Gamer.objects.get(user=request.auth.user)
+        gamer = current_gamer(request)
         try:
             serializer = CreateGameSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
@@ -90,8 +162,37 @@ class GameView(ViewSet):
         game.delete()
         return Response(None, status=status.HTTP_204_NO_CONTENT)
 
+    @action(methods=['post', 'put'], detail=False)
+    def bulk(self, request):
+        """Create (POST) or update (PUT) many games in one request
+
+        The body is a list of games. Game types are checked with one query
+        and the rows are written with bulk_create or bulk_update in one
+        transaction. If any row is invalid nothing is written, and the
+        response lists the errors of each row.
+
+        Returns:
+            Response -- the created games, or an empty body for updates
+        """
+        rows, error = validate_bulk(request, BulkGameSerializer)
+        if error is not None:
+            return error
+
+        related = {'game_type': GameType}
+        if request.method == 'POST':
+            games, errors = create_rows(Game, rows, related, gamer=current_gamer(request))
+        else:
+            games, errors = update_rows(Game, rows, related)
+
+        if games is None:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        if request.method == 'POST':
+            serializer = CreateGameSerializer(games, many=True)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(None, status=status.HTTP_204_NO_CONTENT)
+
 
-class GameSerializer(serializers.ModelSerializer):
+class GameSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """JSON serializer for retrieveing games"""
     event_count = serializers.IntegerField(default=None)
     class Meta:
@@ -106,3 +207,17 @@ class CreateGameSerializer(serializers.ModelSerializer):
         model = Game
         fields = ['id', 'title', 'maker',
                   'number_of_players', 'skill_level', 'game_type']
+
+
+class BulkGameSerializer(serializers.ModelSerializer):
+    """JSON serializer for validating the rows of a bulk request
+
+    Foreign keys are plain ids here, so validating a row runs no queries.
+    """
+    id = serializers.IntegerField(required=False)
+    game_type = serializers.IntegerField()
+
+    class Meta:
+        model = Game
+        fields = ['id', 'title', 'maker',
+                  'number_of_players', 'skill_level', 'game_type']
@@ -4,11 +4,13 @@ from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers, status
 from levelupapi.models import GameType
+from levelupapi.views.helpers import cache_response, conditional
 
 
 class GameTypeView(ViewSet):
     """Level up game types view"""
 
+    @conditional(GameType)
     def retrieve(self, request, pk):
         """Handle GET requests for single game type
 
@@ -22,6 +24,8 @@ class GameTypeView(ViewSet):
         except GameType.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
 
+    @conditional(GameType)
+    @cache_response(GameType)
     def list(self, request):
         """Handle GET requests to get all game types
 
@@ -1,29 +1,45 @@
 """View module for handling requests about game types"""
 from django.http import HttpResponseServerError
+from django.contrib.auth.models import User
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers, status
 from levelupapi.models import Gamer
+from levelupapi.pagination import KeysetPagination, apply_ordering
+from levelupapi.views.helpers import (SparseFieldsMixin, conditional, plan_queryset,
+                                     sparse_options)
 
 
 class GamerView(ViewSet):
     """Level Up gamer view"""
+    ordering_fields = ('id',)
 
+    @conditional(Gamer, User)
     def retrieve(self, request, pk):
+        options = sparse_options(request)
         try:
-            gamer = Gamer.objects.get(pk=pk)
-            serializer = GamerSerializer(gamer)
+            gamer = plan_queryset(Gamer.objects, GamerSerializer, **options).get(pk=pk)
+            serializer = GamerSerializer(gamer, **options)
             return Response(serializer.data)
         except Gamer.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
 
+    @conditional(Gamer, User)
     def list(self, request):
-        gamers = Gamer.objects.all()
-        serializer = GamerSerializer(gamers, many=True)
+        options = sparse_options(request)
+        gamers = apply_ordering(Gamer.objects.all(), request, self)
+        gamers = plan_queryset(gamers, GamerSerializer, **options)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(gamers, request, view=self)
+        if page is not None:
+            serializer = GamerSerializer(page, many=True, **options)
+            return paginator.get_paginated_response(serializer.data)
+
+        serializer = GamerSerializer(gamers, many=True, **options)
         return Response(serializer.data)
 
 
-class GamerSerializer(serializers.ModelSerializer):
+class GamerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Gamer
         fields = "__all__"
@@ -0,0 +1,357 @@
+"""Helpers shared by the levelupapi views"""
+from functools import wraps
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from django.utils.http import parse_etags
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+from levelupapi.bulk import MAX_BULK_ITEMS
+from levelupapi.cache import (fingerprint, get_cached_response, response_key,
+                              set_cached_response)
+from levelupapi.models import Gamer
+from levelupapi.profiling import current_profile, serializing
+from levelupapi.renderers import json_renderer
+
+STREAM_CHUNK_SIZE = 500
+
+
+def current_gamer(request):
+    """Return the gamer making the request
+
+    CachedTokenAuthentication attaches it as request.gamer, and it is only
+    looked up here for requests authenticated some other way.
+    """
+    gamer = getattr(request, 'gamer', None)
+    if gamer is None:
+        gamer = Gamer.objects.get(user=request.auth.user)
+    return gamer
+
+
+def check_bulk_items(items):
+    """Return a 400 response unless a bulk request body is a list of a usable size"""
+    if not isinstance(items, list):
+        return Response({'message': 'Expected a list of items'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > MAX_BULK_ITEMS:
+        return Response({'message': f'At most {MAX_BULK_ITEMS} items per request'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    return None
+
+
+def row_errors(errors, count):
+    """Turn the errors of a many=True serializer into one dictionary per row
+
+    Depending on the DRF version they are a list with a dictionary per row,
+    or a dictionary of the invalid rows keyed by their index.
+    """
+    if isinstance(errors, dict):
+        return [errors.get(index, {}) for index in range(count)]
+    return list(errors)
+
+
+def validate_bulk(request, serializer_class):
+    """Validate every row of a bulk request body without touching the database
+
+    The errors have the same shape as those of create_rows and update_rows,
+    a list with an error dictionary for each row, empty for valid rows.
+
+    Returns:
+        tuple: (list of validated rows, None) or (None, 400 response with
+        the errors of each row)
+    """
+    error = check_bulk_items(request.data)
+    if error is not None:
+        return None, error
+
+    serializer = serializer_class(data=request.data, many=True)
+    if not serializer.is_valid():
+        return None, Response(row_errors(serializer.errors, len(request.data)),
+                              status=status.HTTP_400_BAD_REQUEST)
+
+    return [dict(row) for row in serializer.validated_data], None
+
+
+def parse_expand(paths):
+    """Turn dotted relation paths into a tree, e.g. gamer.user into {'gamer': {'user': {}}}"""
+    tree = {}
+    for path in paths:
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def sparse_options(request):
+    """Read ?fields= and ?expand= into keyword arguments for a SparseFieldsMixin
+
+    Both take comma separated lists. Without them the serializer keeps all of
+    its fields and nests every relation it normally does.
+
+    Returns:
+        dict: fields and expand arguments, only for the params that were given
+    """
+    params = getattr(request, 'query_params', request.GET)
+    options = {}
+
+    if 'fields' in params:
+        options['fields'] = [name for name in params['fields'].split(',') if name]
+    if 'expand' in params:
+        options['expand'] = parse_expand(path for path in params['expand'].split(',') if path)
+
+    return options
+
+
+def wants_field(options, name):
+    """Check whether a serializer built with sparse options will render a field"""
+    return 'fields' not in options or name in options['fields']
+
+
+class SparseFieldsMixin:
+    """Let the client pick the fields and nested relations of a ModelSerializer
+
+    Accepts two extra keyword arguments:
+
+        fields: names of the fields to render, or None for all of them
+        expand: tree of the relations to nest, from parse_expand. Relations
+            left out are rendered as primary keys, so they need no join.
+            None nests every relation down to Meta.depth, and nothing is
+            ever nested deeper than that
+
+    Because plan_queryset builds its joins from the serializer's fields, the
+    queryset only joins and prefetches what the client asked for.
+
+    A field name the serializer doesn't have, or an expand path that isn't a
+    relation it can nest, is a ValidationError listing them.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, expand_prefix='', **kwargs):
+        self.requested_fields = fields
+        self.expand = expand
+        # Dotted path of a nested serializer, to name its bad expand paths
+        self.expand_prefix = expand_prefix
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        errors = {}
+
+        if self.expand:
+            unknown = [self.expand_prefix + name for name in self.expand
+                       if not isinstance(fields.get(name), serializers.BaseSerializer)]
+            if unknown:
+                errors['expand'] = f'Not relations that can be expanded: {", ".join(unknown)}'
+
+        if self.requested_fields is not None:
+            unknown = [name for name in self.requested_fields if name not in fields]
+            if unknown:
+                errors['fields'] = f'Unknown fields: {", ".join(unknown)}'
+            for name in set(fields) - set(self.requested_fields):
+                del fields[name]
+
+        if errors:
+            raise serializers.ValidationError(errors)
+        return fields
+
+    def to_representation(self, instance):
+        if current_profile() is None:
+            return super().to_representation(instance)
+        with serializing():
+            return super().to_representation(instance)
+
+    def build_nested_field(self, field_name, relation_info, nested_depth):
+        if self.expand is None:
+            return super().build_nested_field(field_name, relation_info, nested_depth)
+        if field_name not in self.expand:
+            return self.build_relational_field(field_name, relation_info)
+
+        nested_class, field_kwargs = super().build_nested_field(
+            field_name, relation_info, nested_depth)
+
+        class NestedSerializer(SparseFieldsMixin, nested_class):  # pylint: disable=missing-class-docstring
+            pass
+
+        field_kwargs['expand'] = self.expand[field_name]
+        field_kwargs['expand_prefix'] = f'{self.expand_prefix}{field_name}.'
+        return NestedSerializer, field_kwargs
+
+
+def related_paths(serializer, prefix=''):
+    """Walk a serializer's nested fields and collect the relations it will read
+
+    Args:
+        serializer (Serializer): an unbound serializer instance (many=False)
+        prefix (str): lookup path of the serializer relative to the queryset
+
+    Returns:
+        tuple: (select_related paths, prefetch_related paths)
+    """
+    select, prefetch = [], []
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+
+        path = prefix + field.source.replace('.', '__')
+
+        if isinstance(field, serializers.ListSerializer):
+            # A to-many relation can't be joined, so everything below it is
+            # fetched through the prefetch as well
+            prefetch.append(path)
+            child_select, child_prefetch = related_paths(field.child, path + '__')
+            prefetch.extend(child_select + child_prefetch)
+        elif isinstance(field, serializers.BaseSerializer):
+            select.append(path)
+            child_select, child_prefetch = related_paths(field, path + '__')
+            select.extend(child_select)
+            prefetch.extend(child_prefetch)
+        elif isinstance(field, serializers.ManyRelatedField):
+            prefetch.append(path)
+
+    return select, prefetch
+
+
+def plan_queryset(queryset, serializer_class, **kwargs):
+    """Add the joins and prefetches a serializer needs to a queryset
+
+    Serializing a page of results then costs a fixed number of queries
+    instead of one or more per row.
+
+    Args:
+        queryset (QuerySet): the rows that will be serialized
+        serializer_class (class): the serializer that will render them
+        kwargs: extra arguments passed to the serializer, e.g. context
+
+    Returns:
+        QuerySet: the planned queryset
+    """
+    select, prefetch = related_paths(serializer_class(**kwargs))
+
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+
+    return queryset
+
+
+def wants_stream(request):
+    """Check whether the client asked for a streamed list with ?stream=true"""
+    return request.query_params.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def stream_json(queryset, serializer_class, chunk_size=STREAM_CHUNK_SIZE, **kwargs):
+    """Stream a queryset as a JSON array without holding all of it in memory
+
+    Rows are read from the database `chunk_size` at a time, and each element
+    is rendered with the same renderer DRF uses, so the body is byte for byte
+    what `Response(serializer_class(queryset, many=True).data)` would send.
+
+    Args:
+        queryset (QuerySet): the rows to serialize, already planned
+        serializer_class (class): the serializer for a single row
+        chunk_size (int): how many rows to fetch and serialize at a time
+        kwargs: extra arguments passed to the serializer, e.g. context
+
+    Returns:
+        StreamingHttpResponse: the JSON array
+    """
+    renderer = json_renderer()
+    # The rows are read after the middleware has finished with the request,
+    # so pin the database the routers chose for it
+    queryset = queryset.using(queryset.db)
+
+    def render():
+        rows = queryset.iterator(chunk_size=chunk_size)
+        separator = b'['
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            for data in serializer_class(chunk, many=True, **kwargs).data:
+                yield separator + renderer.render(data)
+                separator = b','
+        yield b']' if separator == b',' else b'[]'
+
+    return StreamingHttpResponse(render(), content_type=renderer.media_type)
+
+
+def cache_response(*models):
+    """Serve a view's responses from the cache until one of the models changes
+
+    The key is the full URL, so query params like ?type= get their own
+    entries, plus the table version of each model the response is built
+    from. Streamed responses are never cached.
+
+    Args:
+        models: every model whose rows appear in the response
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if wants_stream(request):
+                return method(self, request, *args, **kwargs)
+
+            key = response_key(request, models)
+            data = get_cached_response(key)
+            if data is not None:
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            response = method(self, request, *args, **kwargs)
+            if isinstance(response, Response) and response.status_code == status.HTTP_200_OK:
+                set_cached_response(key, response.data)
+                response['X-Cache'] = 'MISS'
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def etag_matches(etag, if_none_match):
+    """Check an If-None-Match header against an ETag
+
+    The header is a comma separated list of ETags, or *. Each one is
+    compared in full, and weakly as RFC 9110 has it for If-None-Match, so
+    W/"abc" matches "abc".
+    """
+    if if_none_match.strip() == '*':
+        return True
+    return any(tag.removeprefix('W/') == etag for tag in parse_etags(if_none_match))
+
+
+def conditional(*models, per_gamer=False):
+    """Answer GET requests with an ETag and 304 Not Modified when it matches
+
+    The ETag is derived from the URL and the version of each model's table,
+    so checking it costs a cache lookup and the view, its queries and its
+    serializer only run when something may have changed.
+
+    Args:
+        models: every model whose rows appear in the response
+        per_gamer (bool): whether the response depends on the requesting gamer
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            extra = [request.accepted_media_type]
+            if per_gamer:
+                extra.append(current_gamer(request).pk)
+            etag = f'"{fingerprint(request, models, *extra)}"'
+
+            if etag_matches(etag, request.headers.get('If-None-Match', '')):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = method(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+
+            response['ETag'] = etag
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,29 @@
+"""View module for reporting cache and performance statistics"""
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from levelupapi.cache import cache_stats
+from levelupapi.profiling import stats_summary
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats_view(request):
+    '''Reports how often cached list responses were served
+
+    Method arguments:
+      request -- The full HTTP request object
+    '''
+    return Response(cache_stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def request_stats_view(request):
+    '''Reports the timings and queries of profiled requests per route
+
+    Method arguments:
+      request -- The full HTTP request object
+    '''
+    return Response(stats_summary())
@@ -0,0 +1,12 @@
+"""Management command that rebuilds the precomputed report tables"""
+from django.core.management.base import BaseCommand
+
+from levelupreports.refresh import rebuild_reports
+
+
+class Command(BaseCommand):
+    help = "Rebuild every levelupreports summary table from the levelupapi tables"
+
+    def handle(self, *args, **options):
+        rebuild_reports()
+        self.stdout.write(self.style.SUCCESS("Rebuilt the report tables"))
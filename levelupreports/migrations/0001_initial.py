@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:03
+
+from django.db import migrations, models
+
+
+FILL_REPORTS = [
+    """
+    INSERT INTO levelupreports_usergamereport
+        (game_id, gamer_id, full_name, game_title, game_maker)
+    SELECT g.id, g.gamer_id, au.first_name || ' ' || au.last_name, g.title, g.maker
+    FROM levelupapi_game g
+    JOIN levelupapi_gamer gmr ON g.gamer_id = gmr.id
+    JOIN auth_user au ON gmr.user_id = au.id
+    """,
+    """
+    INSERT INTO levelupreports_gameeventreport (game_id, game_title, event_count)
+    SELECT g.id, g.title, COUNT(e.id)
+    FROM levelupapi_game g
+    LEFT JOIN levelupapi_event e ON e.game_id = g.id
+    GROUP BY g.id, g.title
+    """,
+    """
+    INSERT INTO levelupreports_gamerattendancereport (gamer_id, full_name, events_attended)
+    SELECT gmr.id, au.first_name || ' ' || au.last_name, COUNT(eg.id)
+    FROM levelupapi_gamer gmr
+    JOIN auth_user au ON gmr.user_id = au.id
+    LEFT JOIN levelupapi_eventgamer eg ON eg.gamer_id = gmr.id
+    GROUP BY gmr.id, au.first_name, au.last_name
+    """,
+]
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('levelupapi', '0004_event_attendees_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameEventReport',
+            fields=[
+                ('game_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('game_title', models.CharField(max_length=50)),
+                ('event_count', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GamerAttendanceReport',
+            fields=[
+                ('gamer_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('full_name', models.CharField(max_length=301)),
+                ('events_attended', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserGameReport',
+            fields=[
+                ('game_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('gamer_id', models.BigIntegerField()),
+                ('full_name', models.CharField(max_length=301)),
+                ('game_title', models.CharField(max_length=50)),
+                ('game_maker', models.CharField(max_length=40)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['gamer_id', 'game_id'], name='usergamereport_gamer_game_idx')],
+            },
+        ),
+        migrations.RunSQL(FILL_REPORTS, migrations.RunSQL.noop),
+    ]
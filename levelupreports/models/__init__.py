@@ -0,0 +1,3 @@
+from .user_game_report import UserGameReport
+from .game_event_report import GameEventReport
+from .gamer_attendance_report import GamerAttendanceReport
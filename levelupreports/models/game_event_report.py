@@ -0,0 +1,8 @@
+from django.db import models
+
+
+class GameEventReport(models.Model):
+    """One row per game with the number of events scheduled for it"""
+    game_id = models.BigIntegerField(primary_key=True)
+    game_title = models.CharField(max_length=50)
+    event_count = models.PositiveIntegerField()
@@ -0,0 +1,8 @@
+from django.db import models
+
+
+class GamerAttendanceReport(models.Model):
+    """One row per gamer with the number of events they are attending"""
+    gamer_id = models.BigIntegerField(primary_key=True)
+    full_name = models.CharField(max_length=301)
+    events_attended = models.PositiveIntegerField()
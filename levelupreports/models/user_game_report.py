@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class UserGameReport(models.Model):
+    """One row per game with the name of the gamer who added it"""
+    game_id = models.BigIntegerField(primary_key=True)
+    gamer_id = models.BigIntegerField()
+    full_name = models.CharField(max_length=301)
+    game_title = models.CharField(max_length=50)
+    game_maker = models.CharField(max_length=40)
+
+    class Meta:
+        indexes = [
+            # The report reads the rows grouped by gamer
+            models.Index(fields=['gamer_id', 'game_id'], name='usergamereport_gamer_game_idx'),
+        ]
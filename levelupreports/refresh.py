@@ -0,0 +1,117 @@
+"""Functions that rebuild the rows of the precomputed report tables
+
+Each function recomputes the report rows for the given ids from the
+levelupapi tables, or the whole report when no ids are given. They are
+idempotent, so calling one more often than needed is always safe.
+change_gamer_attendance is the exception: it adjusts a stored count in
+place for the one row a signup or a leave changes.
+"""
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Concat
+
+from levelupapi.models import Game, Gamer
+from levelupreports.models import GameEventReport, GamerAttendanceReport, UserGameReport
+
+
+def user_full_name(user_path):
+    """Build "first last" from the user found at the given lookup path"""
+    return Concat(
+        F(f'{user_path}__first_name'), Value(' '), F(f'{user_path}__last_name'))
+
+
+def insert_from(model, fields, queryset):
+    """Insert the rows of a values_list queryset with one INSERT ... SELECT
+
+    Unlike bulk_create, the rows never leave the database, which makes a
+    full rebuild of a report over millions of rows take seconds.
+
+    Args:
+        model (class): the report model to insert into
+        fields (list): the model fields, in the order of the values_list
+        queryset (QuerySet): a values_list of the report rows
+    """
+    alias = router.db_for_write(model)
+    connection = connections[alias]
+    sql, params = queryset.using(alias).query.get_compiler(alias).as_sql()
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(field).column) for field in fields)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {quote(model._meta.db_table)} ({columns}) {sql}', params)
+
+
+def refresh_user_games(game_ids=None, gamer_ids=None):
+    """Recompute the games by user rows for some games or gamers"""
+    games = Game.objects.all()
+    rows = UserGameReport.objects.all()
+
+    if game_ids is not None:
+        games = games.filter(pk__in=game_ids)
+        rows = rows.filter(game_id__in=game_ids)
+    if gamer_ids is not None:
+        games = games.filter(gamer_id__in=gamer_ids)
+        rows = rows.filter(gamer_id__in=gamer_ids)
+
+    games = games.annotate(
+        full_name=user_full_name('gamer__user')
+    ).values_list('id', 'gamer_id', 'full_name', 'title', 'maker')
+
+    with transaction.atomic():
+        rows.delete()
+        insert_from(UserGameReport,
+                    ['game_id', 'gamer_id', 'full_name', 'game_title', 'game_maker'], games)
+
+
+def refresh_game_events(game_ids=None):
+    """Recompute the event counts for some games"""
+    games = Game.objects.all()
+    rows = GameEventReport.objects.all()
+
+    if game_ids is not None:
+        games = games.filter(pk__in=game_ids)
+        rows = rows.filter(game_id__in=game_ids)
+
+    games = games.annotate(
+        event_count=Count('events')
+    ).values_list('id', 'title', 'event_count')
+
+    with transaction.atomic():
+        rows.delete()
+        insert_from(GameEventReport, ['game_id', 'game_title', 'event_count'], games)
+
+
+def refresh_gamer_attendance(gamer_ids=None):
+    """Recompute the number of events some gamers are attending"""
+    gamers = Gamer.objects.all()
+    rows = GamerAttendanceReport.objects.all()
+
+    if gamer_ids is not None:
+        gamers = gamers.filter(pk__in=gamer_ids)
+        rows = rows.filter(gamer_id__in=gamer_ids)
+
+    gamers = gamers.annotate(
+        full_name=user_full_name('user'),
+        events_attended=Count('attending')
+    ).values_list('id', 'full_name', 'events_attended')
+
+    with transaction.atomic():
+        rows.delete()
+        insert_from(GamerAttendanceReport, ['gamer_id', 'full_name', 'events_attended'], gamers)
+
+
+def change_gamer_attendance(gamer_id, amount):
+    """Add amount to the events a gamer is attending, or recompute their row if it's missing"""
+    updated = GamerAttendanceReport.objects.filter(gamer_id=gamer_id).update(
+        events_attended=F('events_attended') + amount)
+    if not updated:
+        refresh_gamer_attendance(gamer_ids=[gamer_id])
+
+
+def rebuild_reports():
+    """Recompute every report table from scratch"""
+    with transaction.atomic():
+        refresh_user_games()
+        refresh_game_events()
+        refresh_gamer_attendance()
+
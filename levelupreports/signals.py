@@ -0,0 +1,113 @@
+"""Signal handlers that keep the precomputed report tables up to date"""
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from levelupapi.bulk import bulk_changed, in_bulk_write
+from levelupapi.models import Event, EventGamer, Game, Gamer
+from levelupreports.refresh import (change_gamer_attendance, refresh_game_events,
+                                    refresh_gamer_attendance, refresh_user_games)
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+def game_changed(sender, instance, **kwargs):
+    """Update the rows of a game that was added, edited or deleted"""
+    refresh_user_games(game_ids=[instance.pk])
+    refresh_game_events(game_ids=[instance.pk])
+
+
+@receiver(bulk_changed, sender=Game)
+def games_changed_in_bulk(sender, instances, **kwargs):
+    """Update the rows of games created or edited in bulk"""
+    game_ids = {game.pk for game in instances}
+    refresh_user_games(game_ids=game_ids)
+    refresh_game_events(game_ids=game_ids)
+
+
+@receiver(pre_save, sender=Event)
+def remember_event_game(sender, instance, raw, **kwargs):
+    """Note the game an event was for before it is saved, in case it moves"""
+    if instance.pk and not raw:
+        instance.previous_game_id = Event.objects.filter(
+            pk=instance.pk).values_list('game_id', flat=True).first()
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def event_changed(sender, instance, **kwargs):
+    """Update the event count of the game, and the old game if it moved"""
+    game_ids = {instance.game_id, getattr(instance, 'previous_game_id', None)}
+    game_ids.discard(None)
+    refresh_game_events(game_ids=game_ids)
+
+
+@receiver(bulk_changed, sender=Event)
+def events_changed_in_bulk(sender, instances, previous, **kwargs):
+    """Update the event counts of the games of events created or edited in bulk"""
+    refresh_game_events(game_ids={event.game_id for event in [*instances, *previous]})
+
+
+@receiver(post_save, sender=EventGamer)
+def attendance_added(sender, instance, created, raw, **kwargs):
+    """Count the event of a gamer who joined one"""
+    if in_bulk_write():
+        return
+    if created and not raw:
+        # A signup holds the write lock while this runs, so keep it to one UPDATE
+        change_gamer_attendance(instance.gamer_id, 1)
+    else:
+        refresh_gamer_attendance(gamer_ids=[instance.gamer_id])
+
+
+@receiver(post_delete, sender=EventGamer)
+def attendance_removed(sender, instance, **kwargs):
+    """Uncount the event of a gamer who left one"""
+    if in_bulk_write():
+        return
+    change_gamer_attendance(instance.gamer_id, -1)
+
+
+@receiver(m2m_changed, sender=EventGamer)
+def attendees_added(sender, instance, action, reverse, pk_set, **kwargs):
+    """Update attendance for event.attendees.add(), which skips post_save"""
+    if action != 'post_add' or not pk_set or in_bulk_write():
+        return
+
+    # pk_set only holds the rows add() inserted, so they can be counted as-is
+    if reverse:
+        change_gamer_attendance(instance.pk, len(pk_set))
+    else:
+        for gamer_id in pk_set:
+            change_gamer_attendance(gamer_id, 1)
+
+
+@receiver(bulk_changed, sender=EventGamer)
+def bulk_attendance_changed(sender, instances, **kwargs):
+    """Update the attendance of every gamer in a bulk signup or leave"""
+    refresh_gamer_attendance(gamer_ids={row.gamer_id for row in instances})
+
+
+@receiver(post_save, sender=Gamer)
+def gamer_changed(sender, instance, **kwargs):
+    """Add new gamers to the attendance report"""
+    refresh_gamer_attendance(gamer_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=Gamer)
+def gamer_deleted(sender, instance, **kwargs):
+    """Drop the rows of a gamer who was deleted"""
+    refresh_user_games(gamer_ids=[instance.pk])
+    refresh_gamer_attendance(gamer_ids=[instance.pk])
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, **kwargs):
+    """Update the full name shown for a gamer whose user was renamed"""
+    if created:
+        return
+
+    gamer_ids = list(Gamer.objects.filter(user=instance).values_list('pk', flat=True))
+    if gamer_ids:
+        refresh_user_games(gamer_ids=gamer_ids)
+        refresh_gamer_attendance(gamer_ids=gamer_ids)
@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import UserGameList
+from .views import GameEventList, GamerAttendanceList, UserGameList
 
 urlpatterns = [
     path('reports/usergames', UserGameList.as_view()),
-]
\ No newline at end of file
+    path('reports/gameevents', GameEventList.as_view()),
+    path('reports/gamerattendance', GamerAttendanceList.as_view()),
+]
@@ -1 +1,3 @@
-from .users.games_by_user import UserGameList
\ No newline at end of file
+from .users.games_by_user import UserGameList
+from .games.events_by_game import GameEventList
+from .gamers.attendance_by_gamer import GamerAttendanceList
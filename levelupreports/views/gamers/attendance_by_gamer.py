@@ -0,0 +1,35 @@
+"""Module for generating attendance by gamer report"""
+from django.shortcuts import render
+from django.views import View
+
+from levelupreports.models import GamerAttendanceReport
+from levelupreports.views.helpers import fetch_rows, report_connection
+
+
+class GamerAttendanceList(View):
+    # Answered from the read replica, see levelupapi.middleware
+    use_read_replica = True
+
+    def get(self, request):
+        with report_connection(GamerAttendanceReport).cursor() as db_cursor:
+
+            # Read the precomputed attendance from levelupreports_gamerattendancereport
+            db_cursor.execute("""
+                SELECT
+                gamer_id,
+                full_name,
+                events_attended
+                FROM
+                levelupreports_gamerattendancereport
+                ORDER BY events_attended DESC, gamer_id
+            """)
+            attendance = [row._asdict() for row in fetch_rows(db_cursor)]
+
+        # The template string must match the file name of the html template
+        template = 'gamers/list_with_attendance.html'
+
+        context = {
+            "attendance_list": attendance
+        }
+
+        return render(request, template, context)
@@ -0,0 +1,35 @@
+"""Module for generating events by game report"""
+from django.shortcuts import render
+from django.views import View
+
+from levelupreports.models import GameEventReport
+from levelupreports.views.helpers import fetch_rows, report_connection
+
+
+class GameEventList(View):
+    # Answered from the read replica, see levelupapi.middleware
+    use_read_replica = True
+
+    def get(self, request):
+        with report_connection(GameEventReport).cursor() as db_cursor:
+
+            # Read the precomputed event counts from levelupreports_gameeventreport
+            db_cursor.execute("""
+                SELECT
+                game_id,
+                game_title,
+                event_count
+                FROM
+                levelupreports_gameeventreport
+                ORDER BY event_count DESC, game_id
+            """)
+            game_events = [row._asdict() for row in fetch_rows(db_cursor)]
+
+        # The template string must match the file name of the html template
+        template = 'games/list_with_event_counts.html'
+
+        context = {
+            "gameevent_list": game_events
+        }
+
+        return render(request, template, context)
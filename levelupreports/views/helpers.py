@@ -1,3 +1,20 @@
+import csv
+from collections import namedtuple
+
+from django.db import connections, router
+
+FETCH_BATCH_SIZE = 2000
+
+
+def report_connection(model):
+    """Return the connection to read a report table from
+
+    Raw SQL bypasses the database routers, so ask them which database the
+    model's rows should be read from, e.g. the read replica.
+    """
+    return connections[router.db_for_read(model)]
+
+
 def dict_fetch_all(cursor):
     """Return all rows from a cursor as a list of dictionaries"""
     columns = [col[0] for col in cursor.description]
@@ -5,3 +22,70 @@ def dict_fetch_all(cursor):
         dict(zip(columns, row))
         for row in cursor.fetchall()
     ]
+
+
+def fetch_rows(cursor, batch_size=FETCH_BATCH_SIZE):
+    """Yield the rows of a cursor as namedtuples, fetching a batch at a time
+
+    Unlike dict_fetch_all, only one batch of rows is held in memory, and every
+    row shares the column names of its namedtuple class instead of carrying
+    its own dictionary keys.
+    """
+    Row = namedtuple('Row', [col[0] for col in cursor.description])
+
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            break
+        for row in batch:
+            yield Row._make(row)
+
+
+class Echo:
+    """A file-like object that hands back what is written to it
+
+    Lets csv.writer format one row at a time for a StreamingHttpResponse.
+    """
+    def write(self, value):  # pylint: disable=missing-function-docstring
+        return value
+
+
+def csv_lines(rows, header):
+    """Yield each row, after a header line, as a line of CSV text"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def group_rows(rows, key, parent, child, children='children'):
+    """Nest flat rows into a list of parents that each hold a list of children
+
+    Every row is visited once and its parent is found through a dictionary,
+    so grouping n rows takes O(n) time. Parents keep the order in which they
+    first appear in the rows.
+
+    Args:
+        rows (iterable): the flat rows, e.g. from dict_fetch_all
+        key (function): returns the value that identifies a row's parent
+        parent (function): builds the parent dictionary from its first row
+        child (function): builds a child dictionary from a row
+        children (str): the parent key that holds the list of children
+
+    Returns:
+        list: the parent dictionaries
+    """
+    parents = {}
+
+    for row in rows:
+        parent_key = key(row)
+        group = parents.get(parent_key)
+
+        if group is None:
+            group = parent(row)
+            group[children] = []
+            parents[parent_key] = group
+
+        group[children].append(child(row))
+
+    return list(parents.values())
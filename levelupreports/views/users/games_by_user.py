@@ -1,33 +1,56 @@
 """Module for generating games by user report"""
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
-from django.db import connection
 from django.views import View
 
-from levelupreports.views.helpers import dict_fetch_all
+from levelupreports.models import UserGameReport
+from levelupreports.views.helpers import csv_lines, fetch_rows, group_rows, report_connection
+
+# The rows are precomputed in the levelupreports_usergamereport table,
+# which levelupreports.signals keeps in step with the games and gamers
+GAMES_BY_USER_SQL = """
+                SELECT
+                gamer_id,
+                full_name,
+                game_id,
+                game_title,
+                game_maker
+                FROM
+                levelupreports_usergamereport
+                ORDER BY gamer_id, game_id
+"""
+
+
+def stream_games_by_user(db_connection):
+    """Yield the flat report rows while keeping the cursor open"""
+    with db_connection.cursor() as db_cursor:
+        db_cursor.execute(GAMES_BY_USER_SQL)
+        yield from fetch_rows(db_cursor)
 
 
 class UserGameList(View):
+    # Answered from the read replica, see levelupapi.middleware
+    use_read_replica = True
+
     def get(self, request):
-        with connection.cursor() as db_cursor:
+        # Pick the database now, since the CSV is only read after the
+        # middleware has finished with the request
+        db_connection = report_connection(UserGameReport)
 
-            # TODO: Write a query to get all games along with the gamer first name, last name, and id
-            db_cursor.execute("""
-                SELECT
-                gmr.id as gamer_id,
-                au.first_name || " " || au.last_name as full_name,
-                g.id as game_id,
-                g.title as game_title,
-                g.maker as game_maker
-                FROM
-                levelupapi_game as g
-                JOIN 
-                levelupapi_gamer as gmr,
-                auth_user as au
-                ON g.gamer_id = gmr.id
-                AND gmr.user_id = au.id
-            """)
-            # Pass the db_cursor to the dict_fetch_all function to turn the fetch_all() response into a dictionary
-            dataset = dict_fetch_all(db_cursor)
+        # ?format=csv streams the flat rows, so the report can be any size
+        if request.GET.get('format') == 'csv':
+            lines = csv_lines(
+                stream_games_by_user(db_connection),
+                header=['gamer_id', 'full_name', 'game_id', 'game_title', 'game_maker'])
+            response = StreamingHttpResponse(lines, content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="games_by_user.csv"'
+            return response
+
+        with db_connection.cursor() as db_cursor:
+
+            db_cursor.execute(GAMES_BY_USER_SQL)
+            # Read the rows in batches as namedtuples instead of a list of dictionaries
+            dataset = fetch_rows(db_cursor)
 
             # Take the flat data from the dataset, and build the
             # following data structure for each gamer.
@@ -58,44 +81,21 @@ class UserGameList(View):
             #   },
             # ]
 
-            games_by_user = []
-
-            for row in dataset:
-                # TODO: Create a dictionary called game that includes
-                # the name, description, number_of_players, maker,
-                # game_type_id, and skill_level from the row dictionary
-                game = {
-                    "id": row['game_id'],
-                    "title": row['game_title'],
-                    "maker": row['game_maker']
-                }
-
-                # This is using a generator comprehension to find the user_dict in the games_by_user list
-                # The next function grabs the dictionary at the beginning of the generator, if the generator is empty it returns None
-                # This code is equivalent to:
-                # user_dict = None
-                # for user_game in games_by_user:
-                #     if user_game['gamer_id'] == row['gamer_id']:
-                #         user_dict = user_game
-
-                user_dict = next(
-                    (
-                        user_game for user_game in games_by_user
-                        if user_game['gamer_id'] == row['gamer_id']
-                    ),
-                    None
-                )
-
-                if user_dict:
-                    # If the user_dict is already in the games_by_user list, append the game to the games list
-                    user_dict['games'].append(game)
-                else:
-                    # If the user is not on the games_by_user list, create and add the user to the list
-                    games_by_user.append({
-                        "gamer_id": row['gamer_id'],
-                        "full_name": row['full_name'],
-                        "games": [game]
-                    })
+            # Group the games under their gamer in a single pass over the rows
+            games_by_user = group_rows(
+                dataset,
+                key=lambda row: row.gamer_id,
+                parent=lambda row: {
+                    "gamer_id": row.gamer_id,
+                    "full_name": row.full_name
+                },
+                child=lambda row: {
+                    "id": row.game_id,
+                    "title": row.game_title,
+                    "maker": row.game_maker
+                },
+                children="games"
+            )
 
         # The template string must match the file name of the html template
         template = 'users/list_with_games.html'
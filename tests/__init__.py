@@ -1 +1,9 @@
-from .game_tests import GameTests
\ No newline at end of file
+from .game_tests import GameTests
+from .gametype_tests import GameTypeTests
+from .event_tests import EventTests, SignupRaceTests
+from .report_tests import ReportTests
+from .auth_tests import AuthTests
+from .database_tests import DatabaseTests
+from .replica_tests import ReplicaTests
+from .renderer_tests import RendererTests
+from .profiling_tests import ProfilingTests
@@ -0,0 +1,83 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+
+from levelupapi.authentication import TokenCache, get_token_cache
+
+
+class AuthTests(APITestCase):
+    def setUp(self):
+        """
+        Register a Gamer and authenticate the client with their token
+        """
+        gamer = {
+            "username": "steve",
+            "password": "Admin8*",
+            "first_name": "Steve",
+            "last_name": "Brownlee",
+            "bio": "Love those gamez!!"
+        }
+        response = self.client.post('/register', gamer, format='json')
+        self.token = Token.objects.get(pk=response.data['token'])
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def tearDown(self):
+        get_token_cache().clear()
+
+    def test_cached_token(self):
+        """
+        Ensure a token is only looked up in the database on the first request
+        """
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get('/gamers')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as second:
+            response = self.client.get('/gamers')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # The token, user and gamer lookups are skipped the second time
+        self.assertEqual(len(first.captured_queries) - len(second.captured_queries), 2)
+
+    def test_deleted_token(self):
+        """
+        Ensure a deleted token stops working even after it was cached
+        """
+        response = self.client.get('/gamers')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.token.delete()
+
+        response = self.client.get('/gamers')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user(self):
+        """
+        Ensure a deactivated user is refused even after their token was cached
+        """
+        response = self.client.get('/gamers')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.token.user.is_active = False
+        self.token.user.save()
+
+        response = self.client.get('/gamers')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_shared_token_cache(self):
+        """
+        Ensure a token one process forgets is forgotten by the others sharing a cache
+        """
+        first, second = TokenCache(10, 300, 'default'), TokenCache(10, 300, 'default')
+        entry = ('user', 'token', 'gamer')
+
+        first.set('key', entry)
+        # Read through the shared cache, and then from the local one
+        self.assertEqual(second.get('key'), entry)
+        self.assertEqual(second.get('key'), entry)
+
+        first.delete('key')
+        self.assertIsNone(second.get('key'))
+        self.assertIsNone(first.get('key'))
@@ -0,0 +1,35 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from levelupapi.database import sqlite_pragmas
+
+
+class DatabaseTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_pragmas(self):
+        """
+        Ensure new connections get the pragmas from LEVELUP_SQLITE_PRAGMAS
+        """
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('cache_size'), -20000)
+
+    @override_settings(LEVELUP_SQLITE_PRAGMAS={'synchronous': None, 'busy_timeout': 100})
+    def test_pragma_overrides(self):
+        """
+        Ensure settings can change or leave out single pragmas, or all of them
+        """
+        pragmas = sqlite_pragmas()
+        self.assertEqual(pragmas['busy_timeout'], 100)
+        self.assertNotIn('synchronous', pragmas)
+
+        with self.settings(LEVELUP_SQLITE_PRAGMAS=None):
+            self.assertEqual(sqlite_pragmas(), {})
+
+        with self.settings(LEVELUP_SQLITE_PRAGMAS={'journal_mode': 'WAL; DROP TABLE x'}):
+            with self.assertRaises(ValueError):
+                sqlite_pragmas()
@@ -0,0 +1,534 @@
+import datetime
+import threading
+from io import StringIO
+
+from django.contrib.auth.models import Group, User
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import Count, F
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+
+from levelupapi.models import Event, EventGamer, Game, Gamer, GameType, WaitlistEntry
+from levelupapi.seats import ADDED, ATTENDING, FULL, WAITLISTED, leave_event, take_seat
+from levelupapi.views.event import EventSerializer, event_queryset
+from levelupapi.views.fastpath import serialize_values
+from levelupapi.views.game import GameSerializer
+from levelupreports.models import GameEventReport
+
+
+class EventTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new Gamer, collect the auth Token, and seed a Game to host events
+        """
+
+        # Register a Gamer and authenticate the client with their token
+        gamer = {
+            "username": "steve",
+            "password": "Admin8*",
+            "first_name": "Steve",
+            "last_name": "Brownlee",
+            "bio": "Love those gamez!!"
+        }
+        response = self.client.post('/register', gamer, format='json')
+        self.token = Token.objects.get(pk=response.data['token'])
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.gamer = Gamer.objects.get(user=self.token.user)
+
+        # SEED THE DATABASE WITH A GAMETYPE AND A GAME
+        game_type = GameType.objects.create(label="Board game")
+        self.game = Game.objects.create(
+            game_type=game_type,
+            gamer=self.gamer,
+            title="Clue",
+            maker="Milton Bradley",
+            skill_level=5,
+            number_of_players=6
+        )
+
+    def create_events(self, count):
+        """Create a number of events organized and attended by the gamer"""
+        for index in range(count):
+            event = Event.objects.create(
+                game=self.game,
+                organizer=self.gamer,
+                description=f"Game night {index}",
+                date=datetime.date(2022, 2, 1),
+                time=datetime.time(19, 30)
+            )
+            event.attendees.add(self.gamer)
+
+    def count_list_queries(self):
+        """Return the number of queries a GET /events request runs"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/events')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_list_events_query_count(self):
+        """
+        Ensure listing events costs the same number of queries for any number of events
+        """
+        # Warm up the token cache so both requests authenticate the same way
+        self.count_list_queries()
+
+        self.create_events(2)
+        few = self.count_list_queries()
+
+        self.create_events(20)
+        many = self.count_list_queries()
+
+        self.assertEqual(few, many)
+
+    def test_list_events(self):
+        """
+        Ensure the nested game, organizer and attendees are still serialized
+        """
+        self.create_events(1)
+
+        response = self.client.get('/events')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        event = response.data[0]
+        self.assertEqual(event["game"]["id"], self.game.id)
+        self.assertEqual(event["game"]["title"], self.game.title)
+        self.assertEqual(event["organizer"]["id"], self.gamer.id)
+        self.assertEqual(event["attendees"][0]["id"], self.gamer.id)
+        self.assertEqual(event["attendees_count"], 1)
+        self.assertEqual(event["joined"], 1)
+
+    def test_sparse_event_fields(self):
+        """
+        Ensure events can be trimmed to some fields with relations as ids
+        """
+        self.create_events(1)
+
+        response = self.client.get('/events?fields=id,game,attendees,joined&expand=game')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        event = response.data[0]
+        self.assertEqual(set(event), {"id", "game", "attendees", "joined"})
+        self.assertEqual(event["game"]["title"], self.game.title)
+        self.assertEqual(event["attendees"], [self.gamer.id])
+        self.assertEqual(event["joined"], 1)
+
+        # Names the serializer doesn't have are reported, by the async view too
+        for url in ('/events?fields=bogus', '/async/events?fields=id,bogus'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.json(), {"fields": "Unknown fields: bogus"})
+
+    def test_fast_serialization(self):
+        """
+        Ensure events and games built from values rows match their serializers
+        """
+        self.create_events(3)
+        user = User.objects.create(username="carol")
+        user.groups.add(Group.objects.create(name="Organizers"))
+        other = Gamer.objects.create(user=user, bio="Meeples")
+        Event.objects.first().attendees.add(other)
+        self.game.gamer = other
+        self.game.save()
+
+        for options in ({}, {"fields": ["id", "attendees", "joined"]},
+                        {"expand": {"game": {}}}):
+            events = event_queryset(self.gamer, options).order_by('pk')
+            self.assertEqual(serialize_values(events, EventSerializer, **options),
+                             EventSerializer(events, many=True, **options).data)
+
+        games = Game.objects.annotate(event_count=Count('events')).order_by('pk')
+        self.assertEqual(serialize_values(games, GameSerializer),
+                         GameSerializer(games, many=True).data)
+
+        # Without the annotation the serializer is left to fail as usual
+        self.assertIsNone(serialize_values(Game.objects.all(), GameSerializer))
+
+    def test_stream_events(self):
+        """
+        Ensure a streamed event list is byte for byte the same as the regular one
+        """
+        self.create_events(3)
+
+        response = self.client.get('/events')
+        streamed = self.client.get('/events?stream=true')
+
+        self.assertEqual(streamed.status_code, status.HTTP_200_OK)
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(b''.join(streamed.streaming_content), response.content)
+
+    def test_attendees_count(self):
+        """
+        Ensure the stored attendee count follows signups, leaves and deletes
+        """
+        self.create_events(1)
+        event = Event.objects.get()
+        self.assertEqual(event.attendees_count, 1)
+
+        # Leave and sign up again through the API
+        response = self.client.delete(f'/events/{event.id}/leave')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        event.refresh_from_db()
+        self.assertEqual(event.attendees_count, 0)
+
+        response = self.client.post(f'/events/{event.id}/signup')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.get(f'/events/{event.id}')
+        self.assertEqual(response.data["attendees_count"], 1)
+        self.assertEqual(response.data["joined"], 1)
+
+        # Deleting the join row directly is counted too
+        EventGamer.objects.filter(event=event).delete()
+        event.refresh_from_db()
+        self.assertEqual(event.attendees_count, 0)
+
+        # The recount command repairs a count that drifted
+        Event.objects.update(attendees_count=7)
+        call_command('recount_attendees', stdout=StringIO())
+        event.refresh_from_db()
+        self.assertEqual(event.attendees_count, 0)
+
+    def test_filter_events(self):
+        """
+        Ensure events can be filtered by dates, times, people and seats, and ordered
+        """
+        user = User.objects.create(username="carol")
+        other = Gamer.objects.create(user=user, bio="Meeples")
+        card_game = Game.objects.create(
+            game_type=GameType.objects.create(label="Card game"), gamer=other,
+            title="Uno", maker="Mattel", skill_level=1, number_of_players=1)
+
+        dates = [(datetime.date(2022, 3, 1), datetime.time(18, 0), self.game, self.gamer),
+                 (datetime.date(2022, 3, 5), datetime.time(20, 0), self.game, other),
+                 (datetime.date(2022, 3, 9), datetime.time(19, 0), card_game, other)]
+        events = [Event.objects.create(game=game, organizer=organizer, description="Night",
+                                       date=date, time=time)
+                  for date, time, game, organizer in dates]
+        events[0].attendees.add(self.gamer)
+        events[2].attendees.add(other)
+
+        def ids(query):
+            response = self.client.get(f'/events?{query}')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [event["id"] for event in response.data]
+
+        first, second, third = (event.id for event in events)
+        self.assertEqual(ids('date_after=2022-03-02&date_before=2022-03-09'), [second, third])
+        self.assertEqual(ids('time_after=18:30&time_before=20:00'), [second, third])
+        self.assertEqual(ids(f'organizer={other.id}'), [second, third])
+        self.assertEqual(ids(f'game_type={card_game.game_type_id}'), [third])
+        self.assertEqual(ids(f'attendee={other.id}'), [third])
+        self.assertEqual(ids('joined=true'), [first])
+        self.assertEqual(ids('joined=false'), [second, third])
+        self.assertEqual(ids('open=true'), [first, second])
+        self.assertEqual(ids('ordering=-date'), [third, second, first])
+        self.assertEqual(ids(f'game={self.game.id}&ordering=-time'), [second, first])
+        self.assertEqual(self.client.get('/async/events?ordering=time&open=1').json()[0]["id"],
+                         first)
+
+        response = self.client.get('/events?date_after=March')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('date_after', response.data)
+        response = self.client.get('/async/events?joined=maybe')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_generate_data(self):
+        """
+        Ensure generated data is consistent, and the same for the same seed
+        """
+        def generate():
+            with transaction.atomic():
+                call_command('generate_data', '--events', '300', '--seed', '3',
+                             stdout=StringIO())
+                events = list(Event.objects.values_list(
+                    'game__title', 'organizer__user__username', 'date', 'time', 'attendees_count'))
+                attendees = list(EventGamer.objects.values_list('event_id', 'gamer_id'))
+                over_capacity = Event.objects.filter(
+                    attendees_count__gt=F('game__number_of_players')).count()
+                miscounted = Event.objects.annotate(attending=Count('attendees')).exclude(
+                    attendees_count=F('attending')).count()
+                reported = GameEventReport.objects.count()
+                transaction.set_rollback(True)
+            return events, attendees, over_capacity, miscounted, reported
+
+        events, attendees, over_capacity, miscounted, reported = generate()
+        self.assertEqual(len(events), 300)
+        self.assertGreater(len(attendees), 300)
+        self.assertEqual(over_capacity, 0)
+        self.assertEqual(miscounted, 0)
+        self.assertEqual(reported, Game.objects.count() + 30)
+        self.assertEqual(generate()[:2], (events, attendees))
+
+        self.create_events(1)
+        with self.assertRaises(CommandError):
+            call_command('generate_data', '--events', '10', stdout=StringIO())
+
+    def test_async_events(self):
+        """
+        Ensure the async views answer like the DRF ones and keep the count in step
+        """
+        self.create_events(2)
+        event = Event.objects.first()
+
+        for path in ('/events', f'/events/{event.id}', f'/events?game={self.game.id}'):
+            response = self.client.get(path)
+            async_response = self.client.get('/async' + path)
+            self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+            self.assertEqual(async_response.json(), response.json())
+
+        response = self.client.delete(f'/async/events/{event.id}/leave')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        event.refresh_from_db()
+        self.assertEqual(event.attendees_count, 0)
+
+        response = self.client.post(f'/async/events/{event.id}/signup')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        event.refresh_from_db()
+        self.assertEqual(event.attendees_count, 1)
+
+        response = self.client.get('/async/events/999')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.credentials()
+        response = self.client.get('/async/events')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_list_events_not_modified(self):
+        """
+        Ensure an unchanged event list is answered with 304 and no queries
+        """
+        self.create_events(2)
+
+        response = self.client.get('/events')
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/events', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(len(context.captured_queries), 0)
+
+        # Leaving an event changes the list, so the old ETag no longer matches
+        event = Event.objects.first()
+        self.client.delete(f'/events/{event.id}/leave')
+
+        response = self.client.get('/events', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_none_match_list(self):
+        """
+        Ensure each ETag of If-None-Match is compared in full, weak ones included
+        """
+        self.create_events(1)
+        etag = self.client.get('/events')['ETag']
+
+        matching = [f'"other", {etag}', f'W/{etag}', '*']
+        for header in matching:
+            response = self.client.get('/events', HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, header)
+
+        # Only a whole ETag matches, not one containing it
+        for header in [f'"x{etag[1:-1]}x"', f'"{etag}"', etag[1:-1]]:
+            response = self.client.get('/events', HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, header)
+
+    def test_bulk_attendance(self):
+        """
+        Ensure many signups and leaves can be sent in one request
+        """
+        self.create_events(2)
+        first, second = Event.objects.order_by('id')
+        EventGamer.objects.filter(event=second).delete()
+
+        items = [
+            {"event": first.id, "gamer": self.gamer.id},
+            {"event": second.id, "gamer": self.gamer.id},
+            {"event": 999, "gamer": self.gamer.id},
+            {"event": first.id},
+        ]
+
+        response = self.client.post('/events/attendance', items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result["status"] for result in response.data],
+            ["attending", "added", "invalid", "invalid"])
+
+        second.refresh_from_db()
+        self.assertEqual(second.attendees_count, 1)
+
+        response = self.client.delete('/events/attendance', items[:2], format='json')
+        self.assertEqual(
+            [result["status"] for result in response.data], ["removed", "removed"])
+        self.assertFalse(EventGamer.objects.exists())
+        self.assertEqual(
+            list(Event.objects.values_list('attendees_count', flat=True)), [0, 0])
+
+        # Another gamer can't sign people up for events they don't organize
+        other = User.objects.create_user(username='other', password='Admin8*')
+        Gamer.objects.create(user=other, bio='Other')
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=other).key)
+        for method in (self.client.post, self.client.delete):
+            response = method('/events/attendance', items[:2], format='json')
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(EventGamer.objects.exists())
+
+        # Staff can
+        other.is_staff = True
+        other.save()
+        response = self.client.post('/events/attendance', items[:2], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_signup_capacity(self):
+        """
+        Ensure signups stop at the game's number of players, and the waitlist fills freed seats
+        """
+        self.game.number_of_players = 2
+        self.game.save()
+        event = Event.objects.create(
+            game=self.game, organizer=self.gamer, description="Game night",
+            date=datetime.date(2022, 2, 1), time=datetime.time(19, 30))
+        others = [Gamer.objects.create(user=User.objects.create(username=f"gamer{index}"))
+                  for index in range(3)]
+
+        # Signing up again doesn't claim another seat
+        response = self.client.post(f'/events/{event.id}/signup')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(f'/events/{event.id}/signup')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["message"], "Gamer is already attending")
+        response = self.client.post(f'/async/events/{event.id}/signup')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.delete(f'/events/{event.id}/leave')
+
+        self.assertEqual(take_seat(event.id, others[0].id), (ADDED, None))
+        self.assertEqual(take_seat(event.id, others[1].id), (ADDED, None))
+        self.assertEqual(take_seat(event.id, others[1].id), (ATTENDING, None))
+
+        # Full, unless the gamer asks to wait for a seat
+        response = self.client.post(f'/events/{event.id}/signup')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        response = self.client.post(f'/events/{event.id}/signup?waitlist=true')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["position"], 1)
+        self.assertEqual(take_seat(event.id, others[2].id, waitlist=True), (WAITLISTED, 2))
+        response = self.client.post(f'/async/events/{event.id}/signup?waitlist=true')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.json()["position"], 1)
+
+        # Bulk signups are held to the seats too
+        response = self.client.post(
+            '/events/attendance', [{"event": event.id, "gamer": self.gamer.id}], format='json')
+        self.assertEqual(response.data[0]["status"], "full")
+
+        # A leave gives the seat to the gamer who has waited longest
+        self.assertTrue(leave_event(event.id, others[0].id))
+        self.assertEqual(
+            set(event.attendees.values_list('id', flat=True)), {others[1].id, self.gamer.id})
+        response = self.client.delete(f'/events/{event.id}/leave')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(event.attendees.values_list('id', flat=True)), {others[1].id, others[2].id})
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+        event.refresh_from_db()
+        self.assertEqual(event.attendees_count, 2)
+
+        response = self.client.post('/events/999/signup')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bulk_create_events(self):
+        """
+        Ensure many events can be created in one request, organized by the gamer
+        """
+        events = [
+            {"game": self.game.id, "description": f"Game night {index}",
+             "date": "2022-02-01", "time": "19:30:00"}
+            for index in range(3)
+        ]
+
+        response = self.client.post('/events/bulk', events, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(
+            set(Event.objects.values_list('organizer_id', flat=True)), {self.gamer.id})
+
+    def test_bulk_create_events_errors(self):
+        """
+        Ensure bulk created events can't name their id or another organizer
+        """
+        other = Gamer.objects.create(
+            user=User.objects.create_user(username='other', password='Admin8*'), bio='Other')
+        event = {"game": self.game.id, "description": "Game night",
+                 "date": "2022-02-01", "time": "19:30:00"}
+        created = self.client.post('/events/bulk', [event], format='json').data[0]
+
+        # An id on a new row is reported per row, and nothing is written
+        response = self.client.post(
+            '/events/bulk', [{**event, "id": created["id"]}, event], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("id", response.data[0])
+        self.assertEqual(response.data[1], {})
+        self.assertEqual(Event.objects.count(), 1)
+
+        # Serializer errors come back in the same shape
+        response = self.client.post(
+            '/events/bulk', [event, {**event, "date": "soon"}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("date", response.data[1])
+
+        # The requesting gamer organizes every event, whatever the rows say
+        response = self.client.post(
+            '/events/bulk', [{**event, "organizer": other.id}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data[0]["organizer"], self.gamer.id)
+        self.assertFalse(Event.objects.filter(organizer=other).exists())
+
+
+class SignupRaceTests(TransactionTestCase):
+    def test_concurrent_signups_respect_seats(self):
+        """
+        Ensure gamers signing up from many threads at once never take more seats than the game has
+        """
+        users = User.objects.bulk_create(User(username=f"gamer{index}") for index in range(24))
+        gamers = [Gamer.objects.create(user=user, bio="Gamez") for user in users]
+        game = Game.objects.create(
+            game_type=GameType.objects.create(label="Board game"), gamer=gamers[0],
+            title="Clue", maker="Milton Bradley", skill_level=5, number_of_players=5)
+        event = Event.objects.create(
+            game=game, organizer=gamers[0], description="Game night",
+            date=datetime.date(2022, 2, 1), time=datetime.time(19, 30))
+
+        outcomes, errors, start = [], [], threading.Barrier(8)
+
+        def sign_up(share):
+            start.wait()
+            try:
+                for gamer in share:
+                    outcomes.append(take_seat(event.id, gamer.id)[0])
+            except OperationalError as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=sign_up, args=(gamers[index::8],))
+                   for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        event.refresh_from_db()
+        self.assertLessEqual(event.attendees_count, game.number_of_players)
+        self.assertEqual(event.attendees_count, event.attendees.count())
+        self.assertEqual(outcomes.count(ADDED), game.number_of_players)
+        self.assertEqual(outcomes.count(FULL), len(gamers) - game.number_of_players)
@@ -1,3 +1,7 @@
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
@@ -199,3 +203,239 @@ class GameTests(APITestCase):
 
         # Assert that the response status code is 404 (NOT FOUND)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_games_paginated(self):
+        """
+        Ensure games can be paged through with next and previous cursors.
+        """
+
+        # Create five games with titles that sort differently than their ids
+        titles = ["Sorry", "Clue", "Risk", "Monopoly", "Trouble"]
+        for title in titles:
+            Game.objects.create(
+                gamer_id=1, game_type_id=1, title=title,
+                maker="Milton Bradley", skill_level=3, number_of_players=4)
+
+        # Follow the next links until the last page
+        url = '/games?page_size=2&ordering=-title'
+        pages = []
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([game['title'] for game in response.data['results']])
+            url = response.data['next']
+
+        # Assert that every game was returned once, in order
+        self.assertEqual(
+            pages, [["Trouble", "Sorry"], ["Risk", "Monopoly"], ["Clue"]])
+
+        # Follow the previous link back from the last page
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(
+            [game['title'] for game in response.data['results']], ["Risk", "Monopoly"])
+
+        # Assert that the type filter still applies to paginated lists
+        response = self.client.get('/games?page_size=2&type=2')
+        self.assertEqual(response.data['results'], [])
+        self.assertIsNone(response.data['next'])
+
+        # A game type that isn't an id is a 400 naming the param
+        response = self.client.get('/games?type=abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('type', response.data)
+
+    def test_list_games_ordered(self):
+        """
+        Ensure ?ordering= applies to every kind of game list, ids included.
+        """
+        for title in ["Sorry", "Clue", "Risk"]:
+            Game.objects.create(
+                gamer_id=1, game_type_id=1, title=title,
+                maker="Milton Bradley", skill_level=3, number_of_players=4)
+
+        def titles(url):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            if response.streaming:
+                data = json.loads(b''.join(response.streaming_content))
+            else:
+                data = response.data
+            if isinstance(data, dict):
+                data = data['results']
+            return [game['title'] for game in data]
+
+        self.assertEqual(titles('/games?ordering=title'), ["Clue", "Risk", "Sorry"])
+        self.assertEqual(titles('/games?ordering=title&fields=title'), ["Clue", "Risk", "Sorry"])
+        self.assertEqual(titles('/games?ordering=-title&stream=true'), ["Sorry", "Risk", "Clue"])
+        self.assertEqual(titles('/games?ordering=-id'), ["Risk", "Clue", "Sorry"])
+        self.assertEqual(titles('/games?ordering=-id&page_size=2'), ["Risk", "Clue"])
+
+        response = self.client.get('/games?ordering=bogus')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get('/gamers?ordering=-id')
+        ids = [gamer['id'] for gamer in response.data]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        response = self.client.get('/gamers?ordering=bogus')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sparse_fields(self):
+        """
+        Ensure ?fields= and ?expand= trim the game and the queries behind it.
+        """
+        Game.objects.create(
+            gamer_id=1, game_type_id=1, title="Clue",
+            maker="Milton Bradley", skill_level=3, number_of_players=4)
+
+        # Only the requested fields, with relations left as ids
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/games?fields=id,title,game_type&expand=')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{"id": 1, "title": "Clue", "game_type": 1}])
+        game_queries = [query['sql'] for query in context.captured_queries
+                        if 'FROM "levelupapi_game"' in query['sql']]
+        self.assertEqual(len(game_queries), 1)
+        self.assertNotIn('JOIN', game_queries[0])
+
+        # Expanded relations are nested, down to the serializer's depth
+        response = self.client.get('/games/1?expand=gamer.user&fields=id,gamer,game_type')
+        self.assertEqual(response.data["game_type"], 1)
+        self.assertEqual(response.data["gamer"]["user"]["username"], "steve")
+
+        response = self.client.get('/games/1?expand=gamer')
+        self.assertEqual(response.data["gamer"]["user"], 1)
+        self.assertEqual(len(response.data), 8)
+
+        # Without the params the full nested game is returned
+        response = self.client.get('/games/1')
+        self.assertEqual(response.data["game_type"]["label"], "Board game")
+        self.assertEqual(response.data["gamer"]["user"]["username"], "steve")
+
+        # Unknown names are a 400 listing them, not silently dropped
+        response = self.client.get('/games?fields=id,bogus')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("bogus", response.data["fields"])
+
+        response = self.client.get('/games/1?expand=title,gamer.bogus,gamer.user')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["expand"],
+                         "Not relations that can be expanded: title")
+        response = self.client.get('/games/1?expand=gamer.bogus')
+        self.assertEqual(response.data["expand"],
+                         "Not relations that can be expanded: gamer.bogus")
+
+    def test_bulk_games(self):
+        """
+        Ensure many games can be created and updated in one request.
+        """
+
+        games = [
+            {"title": "Clue", "maker": "Milton Bradley", "skill_level": 5,
+             "number_of_players": 6, "game_type": 1},
+            {"title": "Risk", "maker": "Hasbro", "skill_level": 3,
+             "number_of_players": 5, "game_type": 1},
+        ]
+
+        # Initiate POST request and capture the response
+        response = self.client.post('/games/bulk', games, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([game["title"] for game in response.data], ["Clue", "Risk"])
+        self.assertEqual(Game.objects.count(), 2)
+
+        # Update both games, one of them with a game type that doesn't exist
+        changes = [
+            {**games[0], "id": response.data[0]["id"], "maker": "Hasbro"},
+            {**games[1], "id": response.data[1]["id"], "game_type": 99},
+        ]
+        response = self.client.put('/games/bulk', changes, format='json')
+
+        # Assert that the errors are reported per row and nothing was saved
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("game_type", response.data[1])
+        self.assertFalse(Game.objects.filter(maker="Hasbro", title="Clue").exists())
+
+        # Fix the game type and update again
+        changes[1]["game_type"] = 1
+        response = self.client.put('/games/bulk', changes, format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(Game.objects.get(title="Clue").maker, "Hasbro")
+
+    def test_bulk_games_errors(self):
+        """
+        Ensure bulk requests report their errors as a list aligned with the rows.
+        """
+        game = {"title": "Clue", "maker": "Milton Bradley", "skill_level": 5,
+                "number_of_players": 6, "game_type": 1}
+        created = self.client.post('/games/bulk', [game], format='json').data[0]
+
+        # An id on a new row, even an existing one, is an error and not a 500
+        response = self.client.post(
+            '/games/bulk', [game, {**game, "id": created["id"]}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("id", response.data[1])
+        self.assertEqual(Game.objects.count(), 1)
+
+        # A row the serializer rejects is reported in the same shape
+        response = self.client.post(
+            '/games/bulk', [game, {**game, "title": ""}, game], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("title", response.data[1])
+        self.assertEqual(response.data[2], {})
+
+    def test_search_games(self):
+        """
+        Ensure /games/search finds games by the start of their words, best match first.
+        """
+        Game.objects.create(
+            gamer_id=1, game_type_id=1, title="Clue",
+            maker="Milton Bradley", skill_level=3, number_of_players=4)
+        Game.objects.create(
+            gamer_id=1, game_type_id=1, title="Dragon Quest",
+            maker="Square Enix", skill_level=2, number_of_players=1)
+        dragonwood = Game.objects.create(
+            gamer_id=1, game_type_id=1, title="Dragonwood",
+            maker="Gamewright", skill_level=1, number_of_players=4)
+        Game.objects.create(
+            gamer_id=1, game_type_id=1, title="Catan",
+            maker="Dragon Games", skill_level=2, number_of_players=4)
+
+        # Every word matches as a prefix, in the title, maker or game type
+        response = self.client.get('/games/search?q=drag que&fields=title')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{"title": "Dragon Quest"}])
+
+        # A single letter only matches a whole word
+        response = self.client.get('/games/search?q=d&fields=title')
+        self.assertEqual(response.data, [])
+        response = self.client.get('/games/search?q=dr&fields=title')
+        self.assertEqual(len(response.data), 3)
+
+        # Title matches rank above maker matches
+        response = self.client.get('/games/search?q=dragon&fields=title')
+        self.assertEqual([game["title"] for game in response.data][-1], "Catan")
+        self.assertEqual(len(response.data), 3)
+
+        response = self.client.get('/games/search?q=board&limit=2')
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(response.data[0]["game_type"]["label"], "Board game")
+
+        # Changes reach the search table through its triggers
+        dragonwood.title = "Forest"
+        dragonwood.save()
+        GameType.objects.filter(pk=1).update(label="Tabletop game")
+        response = self.client.get('/games/search?q=table fore&fields=title')
+        self.assertEqual(response.data, [{"title": "Forest"}])
+        Game.objects.filter(title="Clue").delete()
+        response = self.client.get('/games/search?q=clue')
+        self.assertEqual(response.data, [])
+
+        # FTS5 syntax is only text here, and a query needs some
+        response = self.client.get('/games/search?q="dragon" OR (*')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get('/games/search?q=')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("q", response.data)
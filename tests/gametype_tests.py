@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+
+from levelupapi.cache import get_cache, version_key
+from levelupapi.checks import check_shared_cache
+from levelupapi.models import GameType
+
+
+class GameTypeTests(APITestCase):
+    def setUp(self):
+        """
+        Register a Gamer, authenticate with their token and start with an empty cache
+        """
+        gamer = {
+            "username": "steve",
+            "password": "Admin8*",
+            "first_name": "Steve",
+            "last_name": "Brownlee",
+            "bio": "Love those gamez!!"
+        }
+        response = self.client.post('/register', gamer, format='json')
+        self.token = Token.objects.get(pk=response.data['token'])
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+        get_cache().clear()
+        GameType.objects.create(label="Board game")
+
+    def test_list_game_types_cached(self):
+        """
+        Ensure game types are served from the cache until one changes
+        """
+        response = self.client.get('/gametypes')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+        response = self.client.get('/gametypes')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual([game_type['label'] for game_type in response.data], ["Board game"])
+
+        # A new game type makes the cached list stale
+        GameType.objects.create(label="Card game")
+
+        response = self.client.get('/gametypes')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(
+            [game_type['label'] for game_type in response.data], ["Board game", "Card game"])
+
+    def test_cache_stats(self):
+        """
+        Ensure only staff users can read the cache hit and miss counters
+        """
+        self.client.get('/gametypes')
+        self.client.get('/gametypes')
+
+        response = self.client.get('/stats/cache')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        # Saving the user also drops their cached token
+        self.token.user.is_staff = True
+        self.token.user.save()
+
+        response = self.client.get('/stats/cache')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['hits'], 1)
+        self.assertEqual(response.data['misses'], 1)
+
+    def test_versions_shared_between_processes(self):
+        """
+        Ensure a table version bumped by one process is seen by the others
+        """
+        self.client.get('/gametypes')
+        key = version_key(GameType)
+        # A cache on the same directory, like the one of another worker process
+        other = FileBasedCache(settings.CACHES['levelup']['LOCATION'], {})
+        before = other.get(key)
+
+        GameType.objects.create(label="Card game")
+        self.assertGreater(other.get(key), before)
+
+    def test_process_local_cache_refused(self):
+        """
+        Ensure the system checks refuse a cache the processes can't share, outside of DEBUG
+        """
+        self.assertEqual(check_shared_cache(None), [])
+
+        local = {**settings.CACHES, 'levelup': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=local, DEBUG=False):
+            self.assertEqual([error.id for error in check_shared_cache(None)],
+                             ['levelupapi.E001'])
+        with override_settings(CACHES=local, DEBUG=True):
+            self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from levelupapi.models import Game, Gamer, GameType
+from levelupapi.profiling import MS_BUCKETS, Histogram, stats_summary
+
+
+@override_settings(LEVELUP_PROFILING={'SAMPLE_RATE': 1, 'FLUSH_SECONDS': 0})
+class ProfilingTests(APITestCase):
+    def setUp(self):
+        """
+        Register a Gamer, authenticate with their token and start with no statistics
+        """
+        gamer = {
+            "username": "steve",
+            "password": "Admin8*",
+            "first_name": "Steve",
+            "last_name": "Brownlee",
+            "bio": "Love those gamez!!"
+        }
+        response = self.client.post('/register', gamer, format='json')
+        self.token = Token.objects.get(pk=response.data['token'])
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+        call_command('request_stats', '--reset', stdout=StringIO())
+        game_type = GameType.objects.create(label="Board game")
+        Game.objects.create(
+            gamer=Gamer.objects.get(user=self.token.user), game_type=game_type,
+            title="Clue", maker="Milton Bradley", skill_level=3, number_of_players=4)
+
+    def test_request_stats(self):
+        """
+        Ensure sampled requests are recorded per route, for staff users to read
+        """
+        self.client.get('/games')
+        self.client.get('/games')
+        self.client.get('/games/1')
+
+        stats = stats_summary()
+        self.assertEqual(stats['game-list']['wall_ms']['count'], 2)
+        self.assertEqual(stats['game-detail']['wall_ms']['count'], 1)
+        self.assertGreaterEqual(stats['game-list']['queries']['mean'], 1)
+        self.assertGreater(stats['game-list']['db_ms']['max'], 0)
+        self.assertGreater(stats['game-list']['serialize_ms']['max'], 0)
+
+        response = self.client.get('/stats/requests')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.token.user.is_staff = True
+        self.token.user.save()
+        response = self.client.get('/stats/requests')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['game-list']['wall_ms']['count'], 2)
+
+        output = StringIO()
+        call_command('request_stats', '--reset', stdout=output)
+        self.assertIn('game-detail', output.getvalue())
+        self.assertEqual(stats_summary(), {})
+
+    def test_sampling_off(self):
+        """
+        Ensure nothing is recorded with a sample rate of 0
+        """
+        with self.settings(LEVELUP_PROFILING={'SAMPLE_RATE': 0}):
+            self.client_class().get('/games')
+        self.assertEqual(stats_summary(), {})
+
+    def test_histogram(self):
+        """
+        Ensure histograms estimate percentiles and merge bucket by bucket
+        """
+        histogram = Histogram(MS_BUCKETS)
+        for value in (0.1, 3, 4, 40, 8000):
+            histogram.record(value)
+        self.assertEqual(histogram.percentile(0.5), 5)
+        self.assertEqual(histogram.percentile(1), 8000)
+
+        other = Histogram.from_dict(MS_BUCKETS, histogram.to_dict())
+        other.merge(histogram)
+        self.assertEqual(other.count, 10)
+        self.assertEqual(other.summary()['mean'], histogram.total / 5)
@@ -0,0 +1,72 @@
+import datetime
+import uuid
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.test import SimpleTestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from levelupapi import renderers
+from levelupapi.renderers import FastJSONRenderer, get_encoder, load_encoder
+
+
+class RendererTests(SimpleTestCase):
+    data = [{
+        "id": 1,
+        "description": "Game night \u2028 été",
+        "date": datetime.date(2022, 6, 1),
+        "time": datetime.time(19, 0, 30, 123456),
+        "created": datetime.datetime(2022, 6, 1, 19, 0, tzinfo=datetime.timezone.utc),
+        "price": Decimal("12.50"),
+        "key": uuid.UUID(int=1),
+        "joined": True,
+        "game": None,
+        "attendees": [1, 2],
+    }]
+
+    @skipUnless(renderers.orjson, 'orjson is an optional dependency')
+    def test_orjson_encoder(self):
+        """
+        Ensure orjson encodes the responses when it is installed
+        """
+        self.assertIs(get_encoder(), renderers.orjson_dumps)
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_matches_json_renderer(self):
+        """
+        Ensure the fast renderer gives the same bytes as DRF's JSONRenderer, with or without orjson
+        """
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+        # Indented output is left to JSONRenderer
+        indented = FastJSONRenderer().render(
+            self.data, 'application/json; indent=2', {})
+        self.assertEqual(indented, JSONRenderer().render(self.data, 'application/json; indent=2', {}))
+
+    def test_fallback(self):
+        """
+        Ensure the json module is used without an encoder, or for data it can't encode
+        """
+        with override_settings(LEVELUP_JSON_ENCODER=None):
+            self.assertIsNone(get_encoder())
+            self.assertEqual(FastJSONRenderer().render(self.data),
+                             JSONRenderer().render(self.data))
+
+        # orjson only takes string keys
+        data = {1: "one"}
+        self.assertEqual(FastJSONRenderer().render(data), b'{"1":"one"}')
+
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_without_orjson(self):
+        """
+        Ensure the default encoder falls back to the json module when orjson isn't installed
+        """
+        load_encoder.cache_clear()
+        try:
+            with mock.patch.object(renderers, 'orjson', None):
+                self.assertIsNone(get_encoder())
+                self.assertEqual(FastJSONRenderer().render(self.data),
+                                 JSONRenderer().render(self.data))
+        finally:
+            load_encoder.cache_clear()
@@ -0,0 +1,111 @@
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from levelupapi.authentication import get_token_cache
+from levelupapi.cache import get_cache
+from levelupapi.models import Gamer, GameType
+
+
+# The replica is a test database of its own, which only gets the rows
+# copied to it, so what a response holds and which connection ran its
+# queries both tell where the reads went
+@override_settings(LEVELUP_READ_DATABASE='replica')
+class ReplicaTests(APITestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        """
+        Register two gamers, authenticate a client with each token and copy them to the replica
+        """
+        get_cache().clear()
+        get_token_cache().clear()
+
+        self.clients = []
+        for username in ("steve", "joe"):
+            gamer = {
+                "username": username,
+                "password": "Admin8*",
+                "first_name": username.title(),
+                "last_name": "Brownlee",
+                "bio": "Love those gamez!!"
+            }
+            response = APIClient().post('/register', gamer, format='json')
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION='Token ' + response.data['token'])
+            self.clients.append(client)
+
+        self.game_type = GameType.objects.create(label="Board game")
+
+        # What sync_replica would have copied so far
+        for model in (User, Token, Gamer, GameType):
+            model.objects.using('replica').bulk_create(model.objects.all())
+
+    def tearDown(self):
+        get_cache().clear()
+        get_token_cache().clear()
+
+    def queries(self, request, *args, **kwargs):
+        """Make a request and return the number of queries each database ran"""
+        with CaptureQueriesContext(connections['default']) as default, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = request(*args, **kwargs)
+        return response, {'default': len(default), 'replica': len(replica)}
+
+    def test_reads_use_replica(self):
+        """
+        Ensure list, retrieve and report requests read from the replica only
+        """
+        client = self.clients[0]
+        # A game type only the replica has
+        GameType.objects.using('replica').create(label="Card game")
+
+        response, queries = self.queries(client.get, '/gametypes')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([game_type['label'] for game_type in response.data],
+                         ["Board game", "Card game"])
+        self.assertEqual(queries['default'], 0)
+        self.assertGreater(queries['replica'], 0)
+
+        response, queries = self.queries(client.get, f'/gametypes/{self.game_type.pk}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries['default'], 0)
+        self.assertGreater(queries['replica'], 0)
+
+        response, queries = self.queries(client.get, '/reports/usergames')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries['default'], 0)
+        self.assertGreater(queries['replica'], 0)
+
+    def test_writes_stick_to_primary(self):
+        """
+        Ensure writes go to the primary, then the writer reads from it and others don't
+        """
+        writer, other = self.clients
+        game = {
+            "title": "Clue",
+            "maker": "Milton Bradley",
+            "skill_level": 5,
+            "number_of_players": 6,
+            "game_type": self.game_type.pk,
+        }
+
+        response, queries = self.queries(writer.post, '/games', game, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(queries['replica'], 0)
+        self.assertGreater(queries['default'], 0)
+
+        # The writer reads its own game from the primary
+        response, queries = self.queries(writer.get, '/games')
+        self.assertEqual([game['title'] for game in response.data], ["Clue"])
+        self.assertEqual(queries['replica'], 0)
+
+        # Other clients read from the replica, which hasn't got the game yet
+        response, queries = self.queries(other.get, '/games')
+        self.assertEqual(response.data, [])
+        self.assertEqual(queries['default'], 0)
+        self.assertGreater(queries['replica'], 0)
@@ -0,0 +1,98 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from levelupapi.models import Event, Game, Gamer, GameType
+from levelupreports.models import GameEventReport, UserGameReport
+
+
+class ReportTests(TestCase):
+    def setUp(self):
+        """
+        Create two gamers who each own some games
+        """
+        game_type = GameType.objects.create(label="Board game")
+
+        self.gamers = []
+        for first_name in ("Ada", "Grace"):
+            user = User.objects.create_user(
+                username=first_name.lower(), password="Admin8*",
+                first_name=first_name, last_name="Gamer")
+            self.gamers.append(Gamer.objects.create(user=user, bio="Gamez"))
+
+        # Interleave the games so the rows of a gamer are not next to each other
+        for index, title in enumerate(["Clue", "Risk", "Sorry", "Trouble"]):
+            Game.objects.create(
+                game_type=game_type, gamer=self.gamers[index % 2], title=title,
+                maker="Milton Bradley", skill_level=3, number_of_players=4)
+
+    def test_games_by_user(self):
+        """
+        Ensure the games by user report nests each gamer's games under them
+        """
+        response = self.client.get('/reports/usergames')
+
+        self.assertEqual(response.status_code, 200)
+        usergame_list = response.context["usergame_list"]
+        self.assertEqual(
+            [(user["full_name"], [game["title"] for game in user["games"]])
+             for user in usergame_list],
+            [("Ada Gamer", ["Clue", "Sorry"]), ("Grace Gamer", ["Risk", "Trouble"])])
+
+    def test_games_by_user_csv(self):
+        """
+        Ensure the games by user report can be streamed as CSV
+        """
+        response = self.client.get('/reports/usergames?format=csv')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'gamer_id,full_name,game_id,game_title,game_maker')
+        self.assertEqual(len(lines), 5)
+        self.assertIn(',Ada Gamer,', lines[1])
+        self.assertTrue(lines[1].endswith(',Clue,Milton Bradley'))
+
+    def test_reports_follow_changes(self):
+        """
+        Ensure the precomputed report rows are updated when the data changes
+        """
+        ada, grace = self.gamers
+        clue = Game.objects.get(title="Clue")
+
+        # Schedule an event that Grace attends
+        event = Event.objects.create(
+            game=clue, organizer=ada, description="Game night",
+            date=datetime.date(2022, 2, 1), time=datetime.time(19, 30))
+        event.attendees.add(grace)
+
+        response = self.client.get('/reports/gameevents')
+        self.assertEqual(response.context["gameevent_list"][0]["game_title"], "Clue")
+        self.assertEqual(response.context["gameevent_list"][0]["event_count"], 1)
+
+        response = self.client.get('/reports/gamerattendance')
+        self.assertEqual(
+            [(gamer["full_name"], gamer["events_attended"])
+             for gamer in response.context["attendance_list"]],
+            [("Grace Gamer", 1), ("Ada Gamer", 0)])
+
+        # Renaming a user renames their rows
+        ada.user.last_name = "Lovelace"
+        ada.user.save()
+        self.assertEqual(
+            set(UserGameReport.objects.filter(gamer_id=ada.id).values_list('full_name', flat=True)),
+            {"Ada Lovelace"})
+
+        # Deleting the event's game removes it from the reports
+        clue.delete()
+        self.assertFalse(GameEventReport.objects.filter(game_id=clue.id).exists())
+        response = self.client.get('/reports/gamerattendance')
+        self.assertEqual(response.context["attendance_list"][1]["events_attended"], 0)
+
+        # The rebuild command recreates rows that went missing
+        UserGameReport.objects.all().delete()
+        call_command('rebuild_reports', stdout=StringIO())
+        self.assertEqual(UserGameReport.objects.count(), 3)